@@ -0,0 +1,24 @@
+# ruff: noqa
+"""
+ASGI config for epainos project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The live leaderboard stream is an async view: serve the site with an ASGI worker,
+e.g. ``gunicorn config.asgi -k uvicorn_worker.UvicornWorker``, so open streams do
+not each hold a worker.
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# epainos directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "epainos"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+application = get_asgi_application()
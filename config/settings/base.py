@@ -252,6 +252,17 @@ EMAIL_BACKEND = env(
 )
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-timeout
 EMAIL_TIMEOUT = 5
+# Outbox drained by the send_outbox_emails command: emails sent per connection,
+# attempts before an email is dead-lettered, first retry delay in seconds (doubled
+# on every attempt), emails sent per minute at most (0 for no cap) and seconds a
+# sender holds the emails it claimed before others may retry them.
+EMAIL_OUTBOX_BATCH_SIZE = env.int("DJANGO_EMAIL_OUTBOX_BATCH_SIZE", default=50)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("DJANGO_EMAIL_OUTBOX_MAX_ATTEMPTS", default=5)
+EMAIL_OUTBOX_RETRY_DELAY = env.int("DJANGO_EMAIL_OUTBOX_RETRY_DELAY", default=60)
+EMAIL_OUTBOX_PER_MINUTE = env.int("DJANGO_EMAIL_OUTBOX_PER_MINUTE", default=100)
+EMAIL_OUTBOX_CLAIM_SECONDS = env.int("DJANGO_EMAIL_OUTBOX_CLAIM_SECONDS", default=300)
+# addresses sent the provider's answer to every payment verification, none by default
+VERIFICATION_EMAIL_RECIPIENTS = env.list("DJANGO_VERIFICATION_EMAIL_RECIPIENTS", default=[])
 
 # ADMIN
 # ------------------------------------------------------------------------------
@@ -317,6 +328,91 @@ SOCIALACCOUNT_FORMS = {"signup": "epainos.users.forms.UserSocialSignupForm"}
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# VOTING
+# ------------------------------------------------------------------------------
+# "database" credits votes straight onto Contestant.number_of_vote, "redis" buffers
+# them in sharded counters on the default django-redis cache until the
+# flush_vote_counters command folds them into the database.
+VOTE_COUNTER_BACKEND = env("DJANGO_VOTE_COUNTER_BACKEND", default="database")
+VOTE_COUNTER_SHARDS = env.int("DJANGO_VOTE_COUNTER_SHARDS", default=8)
+# rows the site revenue and vote totals are spread over, see epainos.users.totals
+SITE_TOTALS_SLOTS = env.int("DJANGO_SITE_TOTALS_SLOTS", default=8)
+# rows each hour of a contestant's vote and revenue rollup is spread over, see epainos.users.rollups
+HOURLY_ROLLUP_SLOTS = env.int("DJANGO_HOURLY_ROLLUP_SLOTS", default=8)
+# the refresh_standings command refreshes the contestant standings view after this
+# many seconds or this many credited votes, whichever comes first
+STANDINGS_REFRESH_INTERVAL = env.int("DJANGO_STANDINGS_REFRESH_INTERVAL", default=300)
+STANDINGS_REFRESH_VOTES = env.int("DJANGO_STANDINGS_REFRESH_VOTES", default=1000)
+# seconds a ranking report for a date range or stage is cached
+RANKING_REPORT_CACHE_TIMEOUT = env.int("DJANGO_RANKING_REPORT_CACHE_TIMEOUT", default=60)
+# longest range an hourly vote and revenue series can cover (31 days)
+ROLLUP_SERIES_MAX_HOURS = env.int("DJANGO_ROLLUP_SERIES_MAX_HOURS", default=744)
+# "redis" keeps the leaderboard in a sorted set on the default django-redis cache
+# (fill it with the rebuild_leaderboard command), "database" ranks in Postgres.
+LEADERBOARD_BACKEND = env("DJANGO_LEADERBOARD_BACKEND", default="database")
+# with the redis leaderboard, the live stream sends the changed ranks at most once
+# per interval, and a keepalive comment after this many idle seconds
+LIVE_LEADERBOARD_INTERVAL_MS = env.int("DJANGO_LIVE_LEADERBOARD_INTERVAL_MS", default=500)
+LIVE_LEADERBOARD_KEEPALIVE = env.int("DJANGO_LIVE_LEADERBOARD_KEEPALIVE", default=15)
+# seconds shared caches may keep the JSON leaderboard, and its largest ?limit=
+LEADERBOARD_API_MAX_AGE = env.int("DJANGO_LEADERBOARD_API_MAX_AGE", default=5)
+LEADERBOARD_API_MAX_LIMIT = env.int("DJANGO_LEADERBOARD_API_MAX_LIMIT", default=1000)
+# contestant IDs and payment references reserved from the database per round trip
+ID_BLOCK_SIZE = env.int("DJANGO_ID_BLOCK_SIZE", default=100)
+# seconds between rebuilds of the public pages' stats snapshot while votes come in,
+# and how long a snapshot may be served at most
+SITE_STATS_DEBOUNCE = env.int("DJANGO_SITE_STATS_DEBOUNCE", default=5)
+SITE_STATS_MAX_AGE = env.int("DJANGO_SITE_STATS_MAX_AGE", default=300)
+# rows fetched from the server-side cursor (and written out) at a time by the
+# dashboard CSV/JSON exports
+EXPORT_CHUNK_SIZE = env.int("DJANGO_EXPORT_CHUNK_SIZE", default=2000)
+# write spreadsheet exports from the run_export_worker command instead of in the
+# request (needs the default cache to be django-redis), and hand out an export
+# with the same filters made in the last this many seconds instead of a new one
+EXPORTS_IN_BACKGROUND = env.bool("DJANGO_EXPORTS_IN_BACKGROUND", default=False)
+EXPORT_JOB_REUSE_SECONDS = env.int("DJANGO_EXPORT_JOB_REUSE_SECONDS", default=600)
+
+# PAYMENTS
+# ------------------------------------------------------------------------------
+TEST_PAYMENT = env.bool("DJANGO_TEST_PAYMENT", default=False)
+FLUTTERWAVE_SECRET_KEY = env("FLUTTERWAVE_SECRET_KEY", default="")
+FLUTTERWAVE_SECRET_KEY_TEST = env("FLUTTERWAVE_SECRET_KEY_TEST", default="")
+# the "secret hash" set on the Flutterwave dashboard, sent back in the verif-hash header of webhooks
+FLUTTERWAVE_SECRET_HASH = env("FLUTTERWAVE_SECRET_HASH", default="")
+FLUTTERWAVE_BASE_URL = env("FLUTTERWAVE_BASE_URL", default="https://api.flutterwave.com/v3/transactions/")
+# (connect, read) timeouts in seconds for every Flutterwave API call
+FLUTTERWAVE_TIMEOUT = (3.05, 10)
+FLUTTERWAVE_MAX_RETRIES = env.int("FLUTTERWAVE_MAX_RETRIES", default=2)
+FLUTTERWAVE_POOL_SIZE = env.int("FLUTTERWAVE_POOL_SIZE", default=8)
+# Verify payments and apply webhook events from the run_verification_worker and
+# run_webhook_consumer commands instead of in the request. Needs the default cache
+# to be django-redis.
+VERIFY_PAYMENTS_IN_BACKGROUND = env.bool("DJANGO_VERIFY_PAYMENTS_IN_BACKGROUND", default=False)
+
+# RATE LIMITING
+# ------------------------------------------------------------------------------
+# Token buckets in front of vote submission and payment verification, see
+# helpers.ratelimit. Needs the default cache to be django-redis.
+RATE_LIMIT_ENABLED = env.bool("DJANGO_RATE_LIMIT_ENABLED", default=False)
+# request.META entry holding the client address, e.g. "HTTP_X_FORWARDED_FOR" behind a proxy
+RATE_LIMIT_IP_META = env("DJANGO_RATE_LIMIT_IP_META", default="REMOTE_ADDR")
+# view -> scope -> (tokens per second, burst)
+RATE_LIMITS = {
+    "vote_submit": {"ip": (1, 20), "session": (0.5, 5), "contestant": (50, 500)},
+    "payment_verify": {"ip": (2, 30), "session": (1, 10)},
+}
+
+# PAGE CACHE
+# ------------------------------------------------------------------------------
+# Public pages served to anonymous visitors from the default cache, see
+# helpers.pagecache. Crediting votes (with the Redis vote counters, flushing them)
+# and editing contestants invalidates them.
+PAGE_CACHE_ENABLED = env.bool("DJANGO_PAGE_CACHE_ENABLED", default=False)
+# seconds a page is served before it is re-rendered, and how long a stale page
+# may still be served while one request re-renders it
+PAGE_CACHE_TIMEOUT = env.int("DJANGO_PAGE_CACHE_TIMEOUT", default=60)
+PAGE_CACHE_STALE_TIMEOUT = env.int("DJANGO_PAGE_CACHE_STALE_TIMEOUT", default=600)
+
 # SECURITY
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#secure-proxy-ssl-header
@@ -37,6 +37,22 @@ CACHES = {
     },
 }
 
+# PAYMENTS
+# ------------------------------------------------------------------------------
+VERIFY_PAYMENTS_IN_BACKGROUND = env.bool("DJANGO_VERIFY_PAYMENTS_IN_BACKGROUND", default=True)
+
+# EXPORTS
+# ------------------------------------------------------------------------------
+EXPORTS_IN_BACKGROUND = env.bool("DJANGO_EXPORTS_IN_BACKGROUND", default=True)
+
+# RATE LIMITING
+# ------------------------------------------------------------------------------
+RATE_LIMIT_ENABLED = env.bool("DJANGO_RATE_LIMIT_ENABLED", default=True)
+
+# PAGE CACHE
+# ------------------------------------------------------------------------------
+PAGE_CACHE_ENABLED = env.bool("DJANGO_PAGE_CACHE_ENABLED", default=True)
+
 # SECURITY
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#secure-proxy-ssl-header
@@ -8,6 +8,7 @@ from django.views import defaults as default_views
 from django.views.generic import TemplateView
 
 from epainos.users import views
+from helpers.pagecache import cache_public_page
 
 urlpatterns = [
     path("", views.home_index, name="home"),
@@ -18,7 +19,7 @@ urlpatterns = [
 
     path(
         "about/",
-        TemplateView.as_view(template_name="pages/about.html"),
+        cache_public_page(TemplateView.as_view(template_name="pages/about.html")),
         name="about",
     ),
     # Django Admin, use {% url 'admin:index' %}
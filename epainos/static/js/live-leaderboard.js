@@ -0,0 +1,26 @@
+/* Live vote counts on the contestant grids.
+ *
+ * Listens to the leaderboard stream (users:leaderboard_stream) and updates the
+ * [data-live-votes] element of every [data-contestant] card it has news for.
+ * The stream only exists with the Redis leaderboard: when it cannot be opened
+ * the page simply keeps the counts it was rendered with.
+ */
+(function () {
+    var script = document.currentScript;
+    if (!script || !window.EventSource) {
+        return;
+    }
+    var source = new EventSource(script.dataset.streamUrl);
+    source.addEventListener('leaderboard', function (event) {
+        JSON.parse(event.data).forEach(function (update) {
+            document.querySelectorAll('[data-contestant="' + update.contestant + '"] [data-live-votes]')
+                .forEach(function (votes) { votes.textContent = update.votes; });
+        });
+    });
+    source.onerror = function () {
+        // a 404 (no Redis leaderboard) closes the stream for good; drops are retried
+        if (source.readyState === EventSource.CLOSED) {
+            source.close();
+        }
+    };
+})();
@@ -327,6 +327,20 @@
       data: [92, 105, 125, 85, 110, 106, 131, 105, 110, 131, 105, 110]
     }]
   };
+  // today's hours from the rollups, when the page has them
+  var todayChart = document.getElementById('today-chart');
+  if (todayChart) {
+    todayChart = JSON.parse(todayChart.textContent);
+    [[todayRevenue, todayChart.revenue], [todayCustomers, todayChart.votes], [todayVisitors, todayChart.transactions]].forEach(function (chart) {
+      chart[0].labels = todayChart.labels;
+      chart[0].datasets[0].data = chart[1];
+    });
+    todayRevenue.dataUnit = 'Revenue';
+    todayCustomers.dataUnit = 'Votes';
+    todayCustomers.datasets[0].label = 'Votes';
+    todayVisitors.dataUnit = 'Transactions';
+    todayVisitors.datasets[0].label = 'Transactions';
+  }
   function ecommerceLineS3(selector, set_data) {
     var $selector = selector ? $(selector) : $('.ecommerce-line-chart-s3');
     $selector.each(function () {
@@ -6,6 +6,8 @@ from django.utils.translation import gettext_lazy as _
 from import_export.admin import ImportExportActionModelAdmin, ExportActionModelAdmin
 from import_export import resources
 
+from . import ledger
+from . import outbox
 from .forms import UserAdminChangeForm
 from .forms import UserAdminCreationForm
 from .models import User
@@ -13,6 +15,8 @@ from .models import Contestant
 from .models import ContestantImage
 from .models import Transactions
 from .models import ContestantStage
+from .models import OutboxEmail
+from .models import ExportJob
 
 if settings.DJANGO_ADMIN_FORCE_ALLAUTH:
     # Force the `admin` sign in process to go through the `django-allauth` workflow:
@@ -24,6 +28,8 @@ if settings.DJANGO_ADMIN_FORCE_ALLAUTH:
 class ContestantResource(resources.ModelResource):
     class Meta:
         model = Contestant
+        # no bulk import: the contestants need Contestant.save and its signals
+        # (ID, name, leaderboard entry, cover image, stats and page cache)
 
 
 class TransactionsResource(resources.ModelResource):
@@ -67,7 +73,8 @@ class UserAdmin(auth_admin.UserAdmin):
 
 @admin.action(description='Reset Voter Count')
 def reset_count(modeladmin, request, queryset):
-    queryset.update(number_of_vote=0)
+    # recorded as adjustments so the vote ledger still adds up
+    ledger.adjust(queryset, lambda contestant: -(contestant.number_of_vote or 0))
 
 @admin.register(Contestant)
 class ContestantAdmin(admin.ModelAdmin):
@@ -92,3 +99,24 @@ class TransactionsAdmin(admin.ModelAdmin):
 class ContestantStageAdmin(admin.ModelAdmin):
     list_display = ('stage',)
     list_display_links = ('stage',)
+
+
+@admin.action(description='Requeue Dead Emails')
+def requeue_emails(modeladmin, request, queryset):
+    outbox.requeue(queryset)
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_date', 'sent_date')
+    list_display_links = ('subject', 'status', 'attempts', 'next_attempt_date', 'sent_date')
+    list_filter = ('status',)
+    readonly_fields = ('subject', 'body', 'from_email', 'recipients', 'attempts', 'sent_date', 'last_error')
+    actions = [requeue_emails]
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'rows_done', 'rows_total', 'requested_by', 'created_date', 'finished_date')
+    list_display_links = ('kind', 'status', 'rows_done', 'rows_total', 'requested_by', 'created_date', 'finished_date')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('params', 'params_hash', 'rows_done', 'rows_total', 'file', 'finished_date', 'last_error')
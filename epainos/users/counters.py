@@ -0,0 +1,149 @@
+"""Sharded Redis vote counters.
+
+With ``VOTE_COUNTER_BACKEND = "redis"`` the statement that settles a transaction
+records its ``VoteEvent`` as not yet flushed instead of updating the hot
+``Contestant`` row, and once it commits the votes are added to one of
+``VOTE_COUNTER_SHARDS`` Redis hashes (contestant id -> unflushed votes), which
+the pages read to show the votes that are not in the database totals yet.
+
+``flush`` periodically folds the unflushed events of the ledger into
+``Contestant.number_of_vote``, marking them flushed in the same transaction, and
+drops the counters they were added to. The ledger, not Redis, is what gets
+applied, so a process dying or Redis failing between the commit and the counter
+increment loses no vote; such votes are only missing from the pages until the
+next flush. An increment landing after a flush started may likewise be shown
+twice until the next one. Run a last flush after switching back to the database
+backend.
+"""
+import logging
+import random
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from .ledger import apply_deltas
+from .models import VoteEvent
+
+logger = logging.getLogger(__name__)
+
+SHARD_KEY = "votes:shard:{shard}"
+BATCH_KEY = "votes:batch:{batch}"
+FLUSHING_KEY = "votes:flushing"
+FLUSH_LOCK_KEY = "votes:flush-lock"
+
+# marks the unflushed events flushed, returning their votes per contestant
+FLUSH_SQL = f"""
+    WITH flushed AS (
+        UPDATE {VoteEvent._meta.db_table}
+           SET flushed = TRUE, modified_date = NOW()
+         WHERE flushed IS FALSE
+     RETURNING contestant_id, votes
+    )
+    SELECT contestant_id, SUM(votes) FROM flushed WHERE contestant_id IS NOT NULL GROUP BY contestant_id
+"""
+
+
+def enabled():
+    return settings.VOTE_COUNTER_BACKEND == "redis"
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def shard_keys():
+    return [SHARD_KEY.format(shard=shard) for shard in range(settings.VOTE_COUNTER_SHARDS)]
+
+
+def incr(contestant_id, votes):
+    """Add ``votes`` to a random shard of the contestant's counter."""
+    key = random.choice(shard_keys())  # noqa: S311
+    get_connection().hincrby(key, str(contestant_id), votes)
+
+
+def incr_many(credited):
+    """Add the ``(contestant_id, votes)`` just credited to the counters.
+
+    Called once the settlement committed: a Redis failure is only logged, the
+    votes reach the database totals with the next flush anyway.
+    """
+    try:
+        for contestant_id, votes in credited:
+            incr(contestant_id, votes)
+    except RedisError:
+        logger.exception("Could not add %s credited votes to the counters", len(credited))
+
+
+def _read(conn, keys):
+    pipe = conn.pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    deltas = Counter()
+    for shard in pipe.execute():
+        for contestant_id, votes in shard.items():
+            deltas[contestant_id.decode()] += int(votes)
+    return deltas
+
+
+def _pending_batches(conn):
+    return sorted(key.decode() for key in conn.smembers(FLUSHING_KEY))
+
+
+def pending_votes():
+    """Return a ``Counter`` of votes per contestant id not yet in the database."""
+    return _read(get_connection(), shard_keys())
+
+
+def with_pending(contestants):
+    """Fold unflushed votes into ``contestants`` and return them ordered by votes."""
+    if not enabled():
+        return contestants
+    pending = pending_votes()
+    contestants = list(contestants)
+    for contestant in contestants:
+        contestant.number_of_vote = (contestant.number_of_vote or 0) + pending[str(contestant.pk)]
+    return sorted(contestants, key=lambda contestant: -contestant.number_of_vote)
+
+
+def total_with_pending(total_vote):
+    """Add every unflushed vote to the persisted ``total_vote``."""
+    if not enabled():
+        return total_vote
+    return (total_vote or 0) + sum(pending_votes().values())
+
+
+def flush():
+    """Fold every unflushed vote event into ``Contestant.number_of_vote``.
+
+    Returns:
+        int: the number of votes written to the database by this call.
+    """
+    conn = get_connection()
+    with conn.lock(FLUSH_LOCK_KEY, timeout=300, blocking_timeout=0):
+        for key in shard_keys():
+            # only the flusher removes shard keys, so the key cannot vanish in between
+            if conn.exists(key):
+                batch = BATCH_KEY.format(batch=uuid.uuid4().hex)
+                pipe = conn.pipeline()
+                pipe.rename(key, batch)
+                pipe.sadd(FLUSHING_KEY, batch)
+                pipe.execute()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(FLUSH_SQL)
+                deltas = {str(contestant_id): int(votes) for contestant_id, votes in cursor.fetchall()}
+            apply_deltas(deltas)
+
+        # the counters renamed above, and those left behind by a flush that died
+        batches = _pending_batches(conn)
+        if batches:
+            pipe = conn.pipeline()
+            pipe.delete(*batches)
+            pipe.srem(FLUSHING_KEY, *batches)
+            pipe.execute()
+        return sum(deltas.values())
@@ -0,0 +1,148 @@
+"""Spreadsheet exports of the dashboard lists, built in the background.
+
+A spreadsheet cannot be streamed to the client, so ``request_export`` records an
+``ExportJob`` and the ``run_export_worker`` command writes it with openpyxl's
+write-only workbook, which flushes rows to disk as they are appended: memory stays
+flat whatever the number of rows. The file goes to the default storage. The
+dashboard polls the job's ``rows_done`` / ``rows_total`` until it is done.
+
+A job asked for again with the same list and filter parameters within
+``EXPORT_JOB_REUSE_SECONDS`` returns the existing one instead of a new export.
+Without ``EXPORTS_IN_BACKGROUND`` the spreadsheet is written right away.
+"""
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from helpers.queue import RedisQueue
+
+from .admin import ContestantResource, TransactionsResource
+from .exports import export_rows
+from .filters import ContestantFilter, TransactionsFilter
+from .models import Contestant, ExportJob, Transactions
+
+logger = logging.getLogger(__name__)
+
+EXPORTS = {
+    ExportJob.TRANSACTIONS: (Transactions, TransactionsFilter, TransactionsResource),
+    ExportJob.CONTESTANTS: (Contestant, ContestantFilter, ContestantResource),
+}
+# query string parameters that do not change the rows
+IGNORED_PARAMS = {"cursor", "page", "csrfmiddlewaretoken"}
+
+export_queue = RedisQueue("exports")
+
+
+def export_params(query):
+    """The filter parameters of a ``QueryDict``, in a stable form."""
+    return {key: sorted(query.getlist(key)) for key in sorted(query) if key not in IGNORED_PARAMS}
+
+
+def params_digest(kind, params):
+    payload = json.dumps([kind, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def export_queryset(job):
+    model, filterset, _ = EXPORTS[job.kind]
+    query = QueryDict(mutable=True)
+    for key, values in job.params.items():
+        query.setlist(key, values)
+    return filterset(query, queryset=model.objects.all()).qs
+
+
+def request_export(kind, query, user=None):
+    """The ``ExportJob`` of the ``kind`` list filtered by ``query``, a recent one if any."""
+    params = export_params(query)
+    digest = params_digest(kind, params)
+    with transaction.atomic():
+        # one job per parameters even when the same export is asked for twice at once
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [digest])
+        recent = (
+            ExportJob.objects.filter(
+                params_hash=digest,
+                created_date__gte=timezone.now() - timedelta(seconds=settings.EXPORT_JOB_REUSE_SECONDS),
+            )
+            .exclude(status=ExportJob.FAILED)
+            .first()
+        )
+        if recent is not None:
+            return recent
+        job = ExportJob.objects.create(
+            kind=kind,
+            params=params,
+            params_hash=digest,
+            requested_by=user if user is not None and user.is_authenticated else None,
+        )
+    if settings.EXPORTS_IN_BACKGROUND:
+        transaction.on_commit(lambda: export_queue.enqueue({"job": str(job.pk)}, dedupe=str(job.pk)))
+    else:
+        run_export(job)
+    return job
+
+
+def _cell(value):
+    if value is None or isinstance(value, (int, float, Decimal, datetime, date)):
+        return value
+    # e.g. the UUID of a foreign key
+    return ILLEGAL_CHARACTERS_RE.sub("", str(value))
+
+
+def write_xlsx(job, path):
+    """Write the rows of ``job`` to ``path``, recording the progress every chunk."""
+    _, _, resource_class = EXPORTS[job.kind]
+    resource = resource_class()
+    queryset = export_queryset(job)
+    job.rows_total = queryset.count()
+    ExportJob.objects.filter(pk=job.pk).update(rows_total=job.rows_total)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(job.kind)
+    sheet.append(resource.get_export_headers())
+    rows_done = 0
+    for row in export_rows(resource, queryset):
+        sheet.append([_cell(value) for value in row])
+        rows_done += 1
+        if rows_done % settings.EXPORT_CHUNK_SIZE == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_done=rows_done)
+    workbook.save(path)
+    job.rows_done = rows_done
+
+
+def run_export(job):
+    """Write the spreadsheet of ``job`` and store it; the job is marked failed on errors."""
+    ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.RUNNING)
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as spreadsheet:
+            write_xlsx(job, spreadsheet.name)
+            name = f"{job.kind}-{timezone.now():%Y%m%d-%H%M%S}-{str(job.pk)[:8]}.xlsx"
+            job.file.save(name, File(spreadsheet), save=False)
+    except Exception as exc:
+        logger.exception("Export %s failed", job.pk)
+        job.status = ExportJob.FAILED
+        job.last_error = repr(exc)
+    else:
+        job.status = ExportJob.DONE
+    job.finished_date = timezone.now()
+    job.save(
+        update_fields=["status", "rows_done", "rows_total", "file", "finished_date", "last_error", "modified_date"]
+    )
+    return job
+
+
+def handle_export_job(payload):
+    # only the worker that moves the job out of pending runs it
+    if ExportJob.objects.filter(pk=payload["job"], status=ExportJob.PENDING).update(status=ExportJob.RUNNING):
+        run_export(ExportJob.objects.get(pk=payload["job"]))
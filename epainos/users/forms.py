@@ -1,18 +1,25 @@
+from datetime import timedelta
+
 from allauth.account.forms import SignupForm
 from allauth.socialaccount.forms import SignupForm as SocialSignupForm
+from django.conf import settings
 from django.contrib.auth import forms as admin_forms
 from django.forms import EmailField
 from django import forms
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.forms.widgets import TextInput
 
-from .models import User, Contestant, ContestantImage
+from . import rollups
+from .models import User, Contestant, ContestantImage, ContestantStage
 
 
 FORMAT_CHOICES = (
-    ('xls', 'xls'),
+    ('xlsx', 'xlsx'),
     ('csv', 'csv'),
     ('json', 'json'),
+    ('parquet', 'parquet'),
+    ('arrow', 'arrow'),
 )
 
 class FormatForm(forms.Form):
@@ -21,6 +28,48 @@ class FormatForm(forms.Form):
         # widget=forms.Select(attrs={'class':'form-select'})
     )
 
+
+class RankingReportForm(forms.Form):
+    start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    stage = forms.ChoiceField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        stages = ContestantStage.objects.exclude(stage__isnull=True).exclude(stage="").values_list("stage", flat=True)
+        self.fields["stage"].choices = [("", _("All stages"))] + [(stage, stage) for stage in sorted(set(stages))]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, end_date = cleaned_data.get("start_date"), cleaned_data.get("end_date")
+        if start_date and end_date and end_date < start_date:
+            raise forms.ValidationError(_("The end date must not be before the start date."))
+        return cleaned_data
+
+
+class RollupSeriesForm(forms.Form):
+    start = forms.DateTimeField()
+    end = forms.DateTimeField(required=False)
+    granularity = forms.ChoiceField(choices=[(name, name) for name in rollups.GRANULARITIES], required=False)
+    contestant = forms.UUIDField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get("start")
+        if start is None:
+            return cleaned_data
+        end = cleaned_data.get("end") or timezone.now()
+        if end <= start:
+            raise forms.ValidationError(_("The end must be after the start."))
+        granularity = cleaned_data.get("granularity") or rollups.HOUR
+        if granularity == rollups.HOUR and end - start > timedelta(hours=settings.ROLLUP_SERIES_MAX_HOURS):
+            raise forms.ValidationError(
+                _("Hourly series cover at most %(hours)s hours.") % {"hours": settings.ROLLUP_SERIES_MAX_HOURS}
+            )
+        cleaned_data.update(end=end, granularity=granularity)
+        return cleaned_data
+
+
 class UserAdminChangeForm(admin_forms.UserChangeForm):
     class Meta(admin_forms.UserChangeForm.Meta):  # type: ignore[name-defined]
         model = User
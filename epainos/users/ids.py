@@ -0,0 +1,92 @@
+"""Collision-free allocation of contestant IDs and payment references.
+
+IDs are numbered from a Postgres sequence, a block of ``ID_BLOCK_SIZE`` numbers per
+``nextval``, so a process only touches the database once per block. Numbers are
+shown as 10 digits: in allocation order for a ``sortable`` space, otherwise
+scrambled by a bijection on the 10-digit range so consecutive IDs do not look
+consecutive. Distinct numbers always give distinct IDs; the one query per block
+only drops the few that collide with rows created before the allocator existed.
+
+Neither order is a secret, so IDs that must not be guessable (payment references
+are enough to cancel a pending payment on the verify page) get ``secret_bytes``
+random bytes appended in hex, which no earlier ID has.
+"""
+import math
+import secrets
+import threading
+from collections import deque
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+
+ID_SPACE = 10**10
+# odd and not a multiple of 5, i.e. coprime with ID_SPACE, so n -> n * A + C is a bijection
+MULTIPLIER = 3_367_900_313
+OFFSET = 1_234_567_891
+
+
+class IdSpace:
+    def __init__(self, sequence, model, field, prefix="", sortable=False, secret_bytes=0):
+        self.sequence = sequence
+        self.model = model
+        self.field = field
+        self.prefix = prefix
+        self.sortable = sortable
+        self.secret_bytes = secret_bytes
+        self.lock = threading.Lock()
+        self.available = deque()
+
+    def format(self, number):
+        if not self.sortable:
+            number = (number * MULTIPLIER + OFFSET) % ID_SPACE
+        return f"{self.prefix}{number:010d}"
+
+    def _reserve_blocks(self, count):
+        block_size = settings.ID_BLOCK_SIZE
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)", [self.sequence, math.ceil(count / block_size)]
+            )
+            blocks = [block for (block,) in cursor.fetchall()]
+        candidates = [
+            self.format(number) for block in blocks for number in range(block * block_size, (block + 1) * block_size)
+        ]
+        if self.secret_bytes:
+            # nothing allocated before had a random part, so nothing can collide
+            self.available.extend(candidates)
+            return
+        model = apps.get_model(self.model)
+        taken = set(model.objects.filter(**{f"{self.field}__in": candidates}).values_list(self.field, flat=True))
+        self.available.extend(candidate for candidate in candidates if candidate not in taken)
+
+    def allocate_many(self, count):
+        """Return ``count`` unique IDs, reserving as many blocks as needed in one query."""
+        with self.lock:
+            while len(self.available) < count:
+                self._reserve_blocks(count - len(self.available))
+            ids = [self.available.popleft() for _ in range(count)]
+        if self.secret_bytes:
+            ids = [f"{value}_{secrets.token_hex(self.secret_bytes)}" for value in ids]
+        return ids
+
+    def allocate(self):
+        return self.allocate_many(1)[0]
+
+    def assign(self, objs):
+        """Give every object of ``objs`` without an ID a new one, e.g. before ``bulk_create``."""
+        missing = [obj for obj in objs if not getattr(obj, self.field)]
+        for obj, value in zip(missing, self.allocate_many(len(missing)), strict=True):
+            setattr(obj, self.field, value)
+        return objs
+
+
+CONTESTANT_ID = IdSpace("users_contestant_id_block_seq", "users.Contestant", "contestant_id")
+PAYMENT_REF = IdSpace(
+    "users_payment_ref_block_seq",
+    "users.Transactions",
+    "payment_ref",
+    prefix="EPAINOS_REF_",
+    sortable=True,
+    secret_bytes=8,
+)
@@ -0,0 +1,218 @@
+"""Contestant leaderboard in a Redis sorted set.
+
+With ``LEADERBOARD_BACKEND = "redis"`` every credited vote is also added to the
+``leaderboard:votes`` sorted set once its transaction commits (see ``voting`` and
+the ``ledger.votes_adjusted`` signal), so top-N, rank and neighbourhood queries
+are O(log n) reads instead of sorting every contestant in Postgres. Scores are
+stored negated: with the default ascending order, ties then fall back to the
+contestant id, the same order as ``ledger.leaderboard()``. With the Redis vote
+counters the set is updated as votes are counted, so it includes the votes still
+waiting for a flush.
+
+The ``rebuild_leaderboard`` command reloads the set from the database. Votes
+added while a rebuild runs are also kept in a journal that is merged into the new
+set as it is swapped in; one committed just before the rebuild read the database
+but added just after it started may be counted twice until the next rebuild. Without
+the Redis backend, or when Redis is unreachable, every query falls back to the
+database.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from . import counters, ledger
+from .models import Contestant
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_KEY = "leaderboard:votes"
+UPDATES_CHANNEL = "leaderboard:updates"
+REBUILD_KEY = f"{LEADERBOARD_KEY}:rebuild"
+JOURNAL_KEY = f"{LEADERBOARD_KEY}:journal"
+# set while a rebuild runs, expiring in case it dies
+REBUILDING_KEY = "leaderboard:rebuilding"
+REBUILDING_TIMEOUT = 600
+
+# KEYS: the set, the rebuilding flag and the journal, ARGV: contestant id and votes
+# pairs. Returns the new scores, then the new ranks, in the order of the pairs.
+ADD_SCRIPT = """
+local journal = redis.call('EXISTS', KEYS[2]) == 1
+local results = {}
+for i = 1, #ARGV, 2 do
+    table.insert(results, redis.call('ZINCRBY', KEYS[1], -ARGV[i + 1], ARGV[i]))
+    if journal then
+        redis.call('ZINCRBY', KEYS[3], -ARGV[i + 1], ARGV[i])
+    end
+end
+for i = 1, #ARGV, 2 do
+    table.insert(results, redis.call('ZRANK', KEYS[1], ARGV[i]))
+end
+return results
+"""
+
+
+def enabled():
+    return settings.LEADERBOARD_BACKEND == "redis"
+
+
+def get_connection():
+    return get_redis_connection("default")
+
+
+def add(deltas):
+    """Add ``(contestant_id, votes)`` pairs to the sorted set.
+
+    The new totals and ranks are published for the live leaderboard (see ``live``).
+    """
+    deltas = [(str(contestant_id), votes) for contestant_id, votes in deltas]
+    if not enabled() or not deltas:
+        return
+    try:
+        conn = get_connection()
+        results = conn.register_script(ADD_SCRIPT)(
+            keys=[LEADERBOARD_KEY, REBUILDING_KEY, JOURNAL_KEY],
+            args=[value for delta in deltas for value in delta],
+        )
+        scores, ranks = results[: len(deltas)], results[len(deltas) :]
+        updates = [
+            [contestant_id, int(-float(score)), position + 1]
+            for (contestant_id, _), score, position in zip(deltas, scores, ranks, strict=True)
+        ]
+        conn.publish(UPDATES_CHANNEL, json.dumps(updates))
+    except RedisError:
+        # the set is behind the database until the next rebuild_leaderboard
+        logger.exception("Could not update the leaderboard")
+
+
+def remove(contestant_id):
+    if enabled():
+        try:
+            get_connection().zrem(LEADERBOARD_KEY, str(contestant_id))
+        except RedisError:
+            logger.exception("Could not update the leaderboard")
+
+
+def rebuild():
+    """Reload the sorted set from the database, swapping it in atomically.
+
+    Votes added while the database is read are journaled and merged in on the swap.
+
+    Returns:
+        int: the number of contestants in the leaderboard.
+    """
+    conn = get_connection()
+    pipe = conn.pipeline()
+    pipe.delete(JOURNAL_KEY)
+    pipe.set(REBUILDING_KEY, 1, ex=REBUILDING_TIMEOUT)
+    pipe.execute()
+    scores = _scores()
+    pipe = conn.pipeline()
+    pipe.delete(REBUILD_KEY)
+    if scores:
+        pipe.zadd(REBUILD_KEY, {contestant_id: -votes for contestant_id, votes in scores.items()})
+    pipe.zunionstore(LEADERBOARD_KEY, [REBUILD_KEY, JOURNAL_KEY])
+    pipe.delete(REBUILD_KEY, JOURNAL_KEY, REBUILDING_KEY)
+    pipe.execute()
+    return len(scores)
+
+
+def _scores():
+    """contestant id -> votes, from the database and the unflushed vote counters."""
+    scores = {str(pk): votes or 0 for pk, votes in Contestant.objects.values_list("pk", "number_of_vote")}
+    if counters.enabled():
+        for contestant_id, votes in counters.pending_votes().items():
+            if contestant_id in scores:
+                scores[contestant_id] += votes
+    return scores
+
+
+def _entries(rows, start):
+    return [(start + index + 1, member.decode(), int(-score)) for index, (member, score) in enumerate(rows)]
+
+
+def _db_rank(contestant):
+    votes = contestant.number_of_vote or 0
+    ahead = Contestant.objects.filter(
+        Q(number_of_vote__gt=votes) | Q(number_of_vote=votes, pk__lt=contestant.pk)
+    ).count()
+    return ahead + 1
+
+
+def top(limit=10, offset=0):
+    """The contestants ranked ``offset + 1`` to ``offset + limit``, all of them for no ``limit``.
+
+    Returns:
+        list: ``(rank, contestant_id, votes)`` tuples, best first.
+    """
+    end = -1 if limit is None else offset + limit - 1
+    if enabled():
+        try:
+            return _entries(get_connection().zrange(LEADERBOARD_KEY, offset, end, withscores=True), offset)
+        except RedisError:
+            logger.exception("Leaderboard unavailable, reading the database")
+    rows = ledger.leaderboard().values_list("pk", "number_of_vote")[offset:None if limit is None else offset + limit]
+    return [(offset + index + 1, str(pk), votes or 0) for index, (pk, votes) in enumerate(rows)]
+
+
+def rank(contestant_id):
+    """The 1-based rank of a contestant, ``None`` if it is not on the leaderboard."""
+    if enabled():
+        try:
+            position = get_connection().zrank(LEADERBOARD_KEY, str(contestant_id))
+            return None if position is None else position + 1
+        except RedisError:
+            logger.exception("Leaderboard unavailable, reading the database")
+    contestant = Contestant.objects.filter(pk=contestant_id).only("pk", "number_of_vote").first()
+    return _db_rank(contestant) if contestant else None
+
+
+def around(contestant_id, radius=2):
+    """The contestant and up to ``radius`` contestants ranked on either side of it."""
+    position = rank(contestant_id)
+    if position is None:
+        return []
+    offset = max(position - 1 - radius, 0)
+    return top(limit=position + radius - offset, offset=offset)
+
+
+def contestants(entries):
+    """The ``Contestant`` rows for ``(rank, contestant_id, votes)`` entries, in rank order.
+
+    Each contestant gets ``rank`` and, from the leaderboard, ``number_of_vote``.
+    """
+    by_id = {
+        str(pk): contestant
+        for pk, contestant in Contestant.objects.in_bulk([contestant_id for _, contestant_id, _ in entries]).items()
+    }
+    ranked = []
+    for position, contestant_id, votes in entries:
+        contestant = by_id.get(contestant_id)
+        if contestant is not None:
+            contestant.rank = position
+            contestant.number_of_vote = votes
+            ranked.append(contestant)
+    return ranked
+
+
+def with_scores(summaries):
+    """Give ``summaries`` (anything with ``pk`` and ``number_of_vote``) their live vote
+    totals and return them in leaderboard order."""
+    if not enabled():
+        return counters.with_pending(summaries)
+    summaries = list(summaries)
+    try:
+        pipe = get_connection().pipeline(transaction=False)
+        for summary in summaries:
+            pipe.zscore(LEADERBOARD_KEY, str(summary.pk))
+        scores = pipe.execute()
+    except RedisError:
+        logger.exception("Leaderboard unavailable, reading the database")
+        return counters.with_pending(summaries)
+    for summary, score in zip(summaries, scores, strict=True):
+        if score is not None:
+            summary.number_of_vote = int(-score)
+    return sorted(summaries, key=lambda summary: (-summary.number_of_vote, str(summary.pk)))
@@ -0,0 +1,146 @@
+"""Append-only vote ledger.
+
+Every credited vote is recorded as a ``VoteEvent`` (in the same statement that
+settles its transaction, see ``voting``) and added to the contestant's
+``ContestantVoteTotal``. ``Contestant.number_of_vote`` is kept equal to that
+total in the same statement, so the leaderboard can sort on its index (with the
+Redis vote counters, by the next flush instead, see ``counters``). Events are
+never deleted and their votes never change: corrections are recorded as
+adjustment events, and the totals can always be rebuilt from the ledger with
+``rebuild_totals``.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+from . import totals as site_totals
+from .models import Contestant, ContestantStage, ContestantVoteTotal, SiteTotals, VoteEvent
+
+# sent once a transaction that changed contestant vote totals commits
+totals_changed = Signal()
+# sent with the ``deltas`` (contestant id -> votes) of an adjustment once it commits
+votes_adjusted = Signal()
+
+# the active stage, i.e. what ``ContestantStage.objects.first()`` returns
+CURRENT_STAGE_SQL = f"""
+    SELECT stage FROM {ContestantStage._meta.db_table} ORDER BY created_date DESC LIMIT 1
+"""
+
+# expects a ``deltas (contestant_id, votes)`` relation in the surrounding query
+UPSERT_TOTALS_SQL = f"""
+    INSERT INTO {ContestantVoteTotal._meta.db_table}
+           (id, created_date, modified_date, contestant_id, votes)
+    SELECT gen_random_uuid(), NOW(), NOW(), deltas.contestant_id, deltas.votes FROM deltas
+        ON CONFLICT (contestant_id) DO UPDATE
+       SET votes = {ContestantVoteTotal._meta.db_table}.votes + EXCLUDED.votes,
+           modified_date = NOW()
+"""
+
+
+# every table ``rebuild_totals`` reads or rewrites, taken at once so writers
+# holding one of them cannot deadlock it; reads go on, writes wait for the rebuild
+REBUILD_LOCK_SQL = f"""
+    LOCK TABLE {SiteTotals._meta.db_table}, {Contestant._meta.db_table},
+               {VoteEvent._meta.db_table}, {ContestantVoteTotal._meta.db_table}
+        IN EXCLUSIVE MODE
+"""
+
+
+def notify_totals_changed():
+    transaction.on_commit(lambda: totals_changed.send(sender=ContestantVoteTotal))
+
+
+def leaderboard():
+    """Contestants ordered by their vote total, highest first (``users_contestant_rank_idx``)."""
+    return Contestant.objects.leaderboard()
+
+
+def apply_deltas(deltas):
+    """Add ``deltas`` (contestant id -> votes) to the contestant totals,
+    ``Contestant.number_of_vote`` and the site vote total in one statement."""
+    deltas = {contestant_id: votes for contestant_id, votes in deltas.items() if votes}
+    if not deltas:
+        return 0
+    values = ", ".join(["(%s::uuid, %s::integer)"] * len(deltas))
+    params = [value for item in deltas.items() for value in item]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH deltas (contestant_id, votes) AS (VALUES {values}),
+                 totals AS ({UPSERT_TOTALS_SQL}),
+                 credited AS (
+                     UPDATE {Contestant._meta.db_table} AS contestant
+                        SET number_of_vote = COALESCE(contestant.number_of_vote, 0) + deltas.votes,
+                            modified_date = NOW()
+                       FROM deltas
+                      WHERE contestant.id = deltas.contestant_id
+                  RETURNING deltas.votes
+                 ),
+                 site_totals AS ({site_totals.upsert_sql("credited", votes="COALESCE(SUM(votes), 0)")})
+            SELECT COUNT(*) FROM credited
+            """,
+            [*params, site_totals.slot()],
+        )
+        notify_totals_changed()
+        return cursor.fetchone()[0]
+
+
+def current_stage():
+    stage = ContestantStage.objects.first()
+    return stage.stage if stage else None
+
+
+def adjust(contestants, votes):
+    """Record an adjustment of ``votes`` for each contestant, e.g. to reset a count.
+
+    Args:
+        contestants: a ``Contestant`` queryset.
+        votes: a callable returning the vote adjustment for a contestant.
+    """
+    stage = current_stage()
+    with transaction.atomic():
+        deltas = {}
+        events = []
+        for contestant in contestants.select_for_update():
+            delta = votes(contestant)
+            if delta:
+                deltas[str(contestant.pk)] = delta
+                events.append(VoteEvent(contestant=contestant, votes=delta, stage=stage))
+        VoteEvent.objects.bulk_create(events)
+        apply_deltas(deltas)
+        transaction.on_commit(lambda: votes_adjusted.send(sender=VoteEvent, deltas=deltas))
+
+
+def rebuild_totals(chunk_size=5000):
+    """Recompute every contestant total from the ledger in one streaming pass.
+
+    ``Contestant.number_of_vote`` is brought back in line with the ledger too.
+    Events the vote counters have not flushed yet are left out, so the next flush
+    does not add them twice. The ledger is read and the totals are written in one
+    transaction holding ``REBUILD_LOCK_SQL``, so no vote lands in between.
+
+    Returns:
+        dict: contestant id -> rebuilt total.
+    """
+    totals = Counter()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(REBUILD_LOCK_SQL)
+        events = VoteEvent.objects.filter(contestant__isnull=False, flushed=True).values_list("contestant_id", "votes")
+        for contestant_id, votes in events.iterator(chunk_size=chunk_size):
+            totals[str(contestant_id)] += votes
+
+        ContestantVoteTotal.objects.all().delete()
+        ContestantVoteTotal.objects.bulk_create(
+            [ContestantVoteTotal(contestant_id=contestant_id, votes=votes) for contestant_id, votes in totals.items()],
+            batch_size=chunk_size,
+        )
+        Contestant.objects.exclude(pk__in=list(totals)).update(number_of_vote=0)
+        contestants = list(Contestant.objects.filter(pk__in=list(totals)).only("pk"))
+        for contestant in contestants:
+            contestant.number_of_vote = totals[str(contestant.pk)]
+        Contestant.objects.bulk_update(contestants, ["number_of_vote"], batch_size=chunk_size)
+        site_totals.repair()
+        notify_totals_changed()
+    return dict(totals)
@@ -0,0 +1,140 @@
+"""Live leaderboard updates over Server-Sent Events.
+
+``leaderboard.add`` publishes ``[contestant_id, votes, rank]`` entries on the
+``leaderboard:updates`` channel. Each server process holds a single pub/sub
+subscription (``Broadcaster``), started with the first stream and stopped with the
+last one. It collects the contestants that changed and, at most once every
+``LIVE_LEADERBOARD_INTERVAL_MS``, reads their current votes and rank in one round
+trip and hands them to every open stream, so the entries of a message are
+consistent with each other even when a later vote moved an earlier contestant
+down. A slow client only ever holds the newest state, never a backlog. When the
+subscription fails or drops it is opened again, backing off from ``RETRY_DELAY``
+to ``MAX_RETRY_DELAY`` seconds; updates published meanwhile are missed.
+
+The streams are async views: run the site with an ASGI worker (``config.asgi``)
+so idle connections do not hold a sync worker each.
+"""
+import asyncio
+import json
+import logging
+
+import redis.asyncio as aioredis
+from django.conf import settings
+
+from .leaderboard import LEADERBOARD_KEY, UPDATES_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 30
+
+
+class Subscriber:
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, entries):
+        self.pending.update(entries)
+        self.ready.set()
+
+    def take(self):
+        entries, self.pending = self.pending, {}
+        self.ready.clear()
+        return entries
+
+
+class Broadcaster:
+    def __init__(self):
+        self.subscribers = set()
+        self.task = None
+
+    def subscribe(self):
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def current(self, client, contestant_ids):
+        """Votes and rank of ``contestant_ids`` as of now, read in one round trip."""
+        pipe = client.pipeline(transaction=True)
+        for contestant_id in contestant_ids:
+            pipe.zscore(LEADERBOARD_KEY, contestant_id)
+            pipe.zrank(LEADERBOARD_KEY, contestant_id)
+        results = await pipe.execute()
+        return {
+            contestant_id: {"contestant": contestant_id, "votes": int(-score), "rank": position + 1}
+            for contestant_id, score, position in zip(contestant_ids, results[::2], results[1::2], strict=True)
+            if score is not None
+        }
+
+    async def run(self):
+        """Relay the updates until cancelled, resubscribing after a failure."""
+        loop = asyncio.get_running_loop()
+        delay = RETRY_DELAY
+        while True:
+            started = loop.time()
+            try:
+                await self.listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live leaderboard subscription failed, retrying in %ss", delay)
+            # a subscription that lived a while starts the backoff over
+            if loop.time() - started > MAX_RETRY_DELAY:
+                delay = RETRY_DELAY
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    async def listen(self):
+        interval = settings.LIVE_LEADERBOARD_INTERVAL_MS / 1000
+        client = aioredis.from_url(settings.CACHES["default"]["LOCATION"])
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(UPDATES_CHANNEL)
+            merged = {}
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + interval
+            while True:
+                message = await pubsub.get_message(timeout=max(deadline - loop.time(), 0))
+                if message is not None:
+                    merged.update((contestant_id, None) for contestant_id, _, _ in json.loads(message["data"]))
+                if loop.time() >= deadline:
+                    if merged:
+                        updates = await self.current(client, list(merged))
+                        for subscriber in self.subscribers:
+                            subscriber.push(updates)
+                        merged = {}
+                    deadline = loop.time() + interval
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+broadcaster = Broadcaster()
+
+
+async def stream():
+    """Yield the SSE messages of one connection until the client goes away."""
+    subscriber = broadcaster.subscribe()
+    keepalive = settings.LIVE_LEADERBOARD_KEEPALIVE
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.ready.wait(), timeout=keepalive)
+            except TimeoutError:
+                # a comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            updates = sorted(subscriber.take().values(), key=lambda update: update["rank"])
+            yield f"event: leaderboard\ndata: {json.dumps(updates)}\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from epainos.users import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly vote and revenue rollups from the transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Rebuild from this ISO 8601 datetime, the first transaction by default.")
+        parser.add_argument("--until", help="Rebuild up to this ISO 8601 datetime, the last transaction by default.")
+        parser.add_argument(
+            "--chunk-hours",
+            type=int,
+            default=24,
+            help="Number of hours rebuilt per database transaction.",
+        )
+
+    def moment(self, value):
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            raise CommandError(f"Invalid datetime: {value}")
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+
+    def handle(self, *args, **options):
+        if options["chunk_hours"] < 1:
+            raise CommandError("--chunk-hours must be at least 1.")
+        chunks = 0
+        for start, end in rollups.backfill(
+            self.moment(options["since"]), self.moment(options["until"]), timedelta(hours=options["chunk_hours"])
+        ):
+            chunks += 1
+            self.stdout.write(f"Rebuilt {start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M}.")
+        self.stdout.write(f"Rebuilt the rollups in {chunks} chunks.")
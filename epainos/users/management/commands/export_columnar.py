@@ -0,0 +1,63 @@
+import pyarrow as pa
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from epainos.users import columnar
+from epainos.users.models import Contestant, Transactions
+
+MODELS = {"transactions": Transactions, "contestants": Contestant}
+
+
+class Command(BaseCommand):
+    help = "Export transactions or contestants to a typed Parquet or Arrow file for analytics"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(MODELS), help="The rows to export.")
+        parser.add_argument("output", help="The file to write.")
+        parser.add_argument("--format", choices=sorted(columnar.CONTENT_TYPES), default=columnar.PARQUET)
+        parser.add_argument(
+            "--compression",
+            default="zstd",
+            help="Parquet codec (zstd, snappy, gzip, lz4, brotli, none), or Arrow codec (zstd, lz4, none).",
+        )
+        parser.add_argument(
+            "--watermark-field",
+            choices=columnar.WATERMARK_FIELDS,
+            help="Export incrementally on this field, recording the watermark in the file.",
+        )
+        since = parser.add_mutually_exclusive_group()
+        since.add_argument("--since", help="Only export the rows after this ISO 8601 datetime.")
+        since.add_argument("--since-file", help="Only export the rows after the watermark of this earlier export.")
+
+    def handle(self, *args, **options):
+        watermark_field = options["watermark_field"]
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid datetime: {options['since']}")
+        elif options["since_file"]:
+            file_field, since = columnar.read_watermark(options["since_file"])
+            if file_field is None:
+                raise CommandError(f"{options['since_file']} has no watermark.")
+            if watermark_field and watermark_field != file_field:
+                raise CommandError(f"{options['since_file']} is incremental on {file_field}.")
+            watermark_field = file_field
+        if since is not None and watermark_field is None:
+            raise CommandError("--since needs --watermark-field.")
+
+        try:
+            export = columnar.Export(
+                MODELS[options["kind"]].objects.all(),
+                options["format"],
+                compression=options["compression"],
+                watermark_field=watermark_field,
+                since=since,
+            )
+            with open(options["output"], "wb") as output:
+                rows = sum(export.write(output))
+        except (ValueError, OSError, pa.ArrowException) as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(f"Exported {rows} {options['kind']} to {options['output']}.")
+        if watermark_field:
+            self.stdout.write(f"Watermark: {export.watermark.isoformat() if export.watermark else 'none'}")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import LockError
+
+from epainos.users import counters
+
+
+class Command(BaseCommand):
+    help = "Fold the sharded Redis vote counters into Contestant.number_of_vote"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep flushing every INTERVAL seconds instead of flushing once.",
+        )
+
+    def handle(self, *args, **options):
+        if not counters.enabled():
+            raise CommandError('VOTE_COUNTER_BACKEND is not "redis", there is nothing to flush.')
+
+        interval = options["interval"]
+        while True:
+            try:
+                votes = counters.flush()
+            except LockError:
+                self.stderr.write("Another flush is running, skipping.")
+            else:
+                self.stdout.write(f"Flushed {votes} votes.")
+            if not interval:
+                break
+            time.sleep(interval)
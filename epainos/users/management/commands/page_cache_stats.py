@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from helpers import pagecache
+
+
+class Command(BaseCommand):
+    help = "Show how the public page cache served requests: hits, misses, stale pages and bypasses"
+
+    def handle(self, *args, **options):
+        counts = pagecache.counts()
+        total = sum(counts.values())
+        for outcome, count in counts.items():
+            share = f" ({count / total:.1%})" if total else ""
+            self.stdout.write(f"{outcome}: {count}{share}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from helpers.ratelimit import shed_counts
+
+
+class Command(BaseCommand):
+    help = "Show how many requests the rate limiter has rejected, per view and scope"
+
+    def handle(self, *args, **options):
+        counts = shed_counts()
+        if not counts:
+            self.stdout.write("No requests were rejected.")
+        for name, count in sorted(counts.items()):
+            self.stdout.write(f"{name}: {count}")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from epainos.users import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Reload the Redis leaderboard from the contestant vote totals"
+
+    def handle(self, *args, **options):
+        if not leaderboard.enabled():
+            raise CommandError('LEADERBOARD_BACKEND is not "redis", there is nothing to rebuild.')
+        self.stdout.write(f"Rebuilt the leaderboard with {leaderboard.rebuild()} contestants.")
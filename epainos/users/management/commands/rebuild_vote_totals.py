@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from epainos.users import leaderboard, ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild the contestant vote totals from the vote ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of vote events fetched per round trip.",
+        )
+
+    def handle(self, *args, **options):
+        totals = ledger.rebuild_totals(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            f"Rebuilt {len(totals)} contestant totals ({sum(totals.values())} votes)."
+        )
+        if leaderboard.enabled():
+            self.stdout.write(f"Rebuilt the leaderboard with {leaderboard.rebuild()} contestants.")
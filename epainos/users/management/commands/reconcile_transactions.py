@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from epainos.users import reconciliation
+
+
+class Command(BaseCommand):
+    help = "Verify pending transactions with Flutterwave and settle or close them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Transactions verified and applied per chunk.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Verification requests in flight at once.")
+        parser.add_argument("--rate", type=float, default=10, help="Verification requests per second at most.")
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=30,
+            help="Only reconcile transactions created at least this many minutes ago.",
+        )
+        parser.add_argument("--after", help="Resume after this cursor, as printed after each chunk.")
+        parser.add_argument("--dry-run", action="store_true", help="Verify and report without writing anything.")
+
+    def handle(self, *args, **options):
+        try:
+            after = reconciliation.decode_cursor(options["after"]) if options["after"] else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid cursor {options['after']!r}") from exc
+
+        def progress(stats, cursor):
+            self.stdout.write(f"{stats} -- cursor {cursor}")
+
+        stats = reconciliation.reconcile(
+            chunk_size=options["chunk_size"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            after=after,
+            older_than=timedelta(minutes=options["older_than"]),
+            dry_run=options["dry_run"],
+            progress=progress,
+        )
+        prefix = "Dry run: " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{stats}"))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from epainos.users import standings
+
+
+class Command(BaseCommand):
+    help = "Refresh the contestant standings materialized view when it is due"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Refresh even if the view is not due.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, checking every INTERVAL seconds whether a refresh is due.",
+        )
+
+    def handle(self, *args, **options):
+        if options["force"]:
+            standings.refresh()
+            self.stdout.write("Refreshed the contestant standings.")
+        interval = options["interval"]
+        while True:
+            if standings.refresh_if_due():
+                self.stdout.write("Refreshed the contestant standings.")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,33 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from helpers.queue import run_worker
+from epainos.users.export_jobs import export_queue, handle_export_job
+from epainos.users.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Write the queued spreadsheet exports with a bounded pool of threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2, help="Exports written at the same time.")
+        parser.add_argument(
+            "--recover",
+            action="store_true",
+            help="Restart exports left running by a worker that died (run with a single worker).",
+        )
+
+    def handle(self, *args, **options):
+        if options["recover"]:
+            ExportJob.objects.filter(status=ExportJob.RUNNING).update(status=ExportJob.PENDING)
+            self.stdout.write(f"Recovered {export_queue.recover()} exports.")
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.stdout.write(f"Writing exports with {options['concurrency']} workers.")
+        # a failed export is recorded on its job, not retried
+        run_worker(export_queue, handle_export_job, concurrency=options["concurrency"], max_attempts=1, stop=stop)
@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from helpers.queue import run_worker
+from epainos.users.verification import handle_verification_job, verification_queue
+
+
+class Command(BaseCommand):
+    help = "Verify queued payments against Flutterwave with a bounded pool of threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=8, help="Payments verified at the same time.")
+        parser.add_argument("--max-attempts", type=int, default=8, help="Attempts before a payment is left pending.")
+        parser.add_argument("--backoff", type=float, default=2, help="Retry n waits BACKOFF ** n seconds.")
+        parser.add_argument(
+            "--recover",
+            action="store_true",
+            help="Requeue payments left in processing by a worker that died (run with a single worker).",
+        )
+
+    def handle(self, *args, **options):
+        if options["recover"]:
+            self.stdout.write(f"Recovered {verification_queue.recover()} payments.")
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.stdout.write(f"Verifying payments with {options['concurrency']} workers.")
+        run_worker(
+            verification_queue,
+            handle_verification_job,
+            concurrency=options["concurrency"],
+            max_attempts=options["max_attempts"],
+            backoff=options["backoff"],
+            stop=stop,
+        )
@@ -0,0 +1,36 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from epainos.users import webhooks
+
+
+class Command(BaseCommand):
+    help = "Apply queued Flutterwave webhook events to the transactions in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="Events applied per batch.")
+        parser.add_argument(
+            "--recover",
+            action="store_true",
+            help="Requeue events left in processing by a consumer that died (run with a single consumer).",
+        )
+        parser.add_argument(
+            "--requeue-dead",
+            action="store_true",
+            help="Requeue the dead-lettered events with a fresh set of attempts.",
+        )
+
+    def handle(self, *args, **options):
+        if options["recover"]:
+            self.stdout.write(f"Recovered {webhooks.webhook_queue.recover()} events.")
+        if options["requeue_dead"]:
+            self.stdout.write(f"Requeued {webhooks.webhook_queue.requeue_dead()} dead-lettered events.")
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.stdout.write(f"Applying webhook events in batches of {options['batch_size']}.")
+        webhooks.consume(batch_size=options["batch_size"], stop=stop)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from epainos.users import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver the emails waiting in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Emails sent per connection.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep draining the outbox, checking every INTERVAL seconds once it is empty.",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            sent, failed = outbox.send_batch(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed.")
+                continue
+            if not interval:
+                break
+            time.sleep(interval)
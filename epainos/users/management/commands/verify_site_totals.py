@@ -0,0 +1,33 @@
+from dataclasses import asdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from epainos.users import totals
+
+
+class Command(BaseCommand):
+    help = "Compare the site totals with the settled transactions and contestant votes, and optionally repair them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite the site totals from the transactions and contestants when they differ.",
+        )
+
+    def handle(self, *args, **options):
+        stored, actual = totals.verify()
+        drift = {
+            name: (value, getattr(actual, name))
+            for name, value in asdict(stored).items()
+            if value != getattr(actual, name)
+        }
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("The site totals are correct."))
+            return
+        for name, (value, expected) in drift.items():
+            self.stdout.write(f"{name}: stored {value}, actual {expected}")
+        if not options["repair"]:
+            raise CommandError("The site totals are out of date, run with --repair to fix them.")
+        repaired = totals.repair()
+        self.stdout.write(self.style.SUCCESS(f"Repaired the site totals: {asdict(repaired)}"))
@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING
 
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager as DjangoUserManager
+from django.db import models
 
 if TYPE_CHECKING:
     from .models import User  # noqa: F401
@@ -40,3 +41,13 @@ class UserManager(DjangoUserManager["User"]):
             raise ValueError(msg)
 
         return self._create_user(email, password, **extra_fields)
+
+
+class ContestantQuerySet(models.QuerySet):
+    def leaderboard(self):
+        """Contestants by vote total, highest first (``users_contestant_rank_idx``).
+
+        Each row carries its ``cover_image_url``, so a grid of contestants renders
+        its cover images without a query per contestant.
+        """
+        return self.order_by("-number_of_vote", "id")
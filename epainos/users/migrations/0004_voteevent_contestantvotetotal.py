@@ -0,0 +1,167 @@
+# Generated by Django 5.0.10 on 2026-10-18 15:47
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_alter_contestant_contestant_images_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContestantVoteTotal",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="The unique identifier of an object.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        help_text="Timestamp when the record was created. The date and time\n            are displayed in the Timezone from where request is made.\n            e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "modified_date",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was modified. The date and\n            time are displayed in the Timezone from where request\n            is made. e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC\n            ",
+                        null=True,
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "votes",
+                    models.IntegerField(
+                        default=0,
+                        help_text="this hold the sum of the contestant vote events",
+                        verbose_name="Votes",
+                    ),
+                ),
+                (
+                    "contestant",
+                    models.OneToOneField(
+                        help_text="this hold the contestant the total belongs to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vote_total",
+                        to="users.contestant",
+                        verbose_name="Contestant Account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Contestant Vote Total",
+                "verbose_name_plural": "Contestant Vote Totals",
+                "ordering": ["-votes"],
+            },
+        ),
+        migrations.CreateModel(
+            name="VoteEvent",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="The unique identifier of an object.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        help_text="Timestamp when the record was created. The date and time\n            are displayed in the Timezone from where request is made.\n            e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "modified_date",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was modified. The date and\n            time are displayed in the Timezone from where request\n            is made. e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC\n            ",
+                        null=True,
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "votes",
+                    models.IntegerField(
+                        help_text="this hold the number of votes credited, negative for adjustments",
+                        verbose_name="Votes",
+                    ),
+                ),
+                (
+                    "stage",
+                    models.CharField(
+                        blank=True,
+                        help_text="this hold the stage that was active when the votes were credited",
+                        max_length=100,
+                        null=True,
+                        verbose_name="Stage",
+                    ),
+                ),
+                (
+                    "flushed",
+                    models.BooleanField(
+                        default=True,
+                        help_text="this hold whether the votes are in the contestant totals yet",
+                        verbose_name="Flushed",
+                    ),
+                ),
+                (
+                    "contestant",
+                    models.ForeignKey(
+                        help_text="this hold the contestant the votes were credited to",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="vote_events",
+                        to="users.contestant",
+                        verbose_name="Contestant Account",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.OneToOneField(
+                        blank=True,
+                        help_text="this hold the settled transaction that paid for the votes, empty for adjustments",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="vote_event",
+                        to="users.transactions",
+                        verbose_name="Transaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Vote Event",
+                "verbose_name_plural": "Vote Events",
+                "ordering": ["-created_date"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("flushed", False)),
+                        fields=["contestant"],
+                        name="users_voteevent_unflushed_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def seed_vote_ledger(apps, schema_editor):
+    """Open the ledger with the votes credited before it existed."""
+    Contestant = apps.get_model("users", "Contestant")
+    ContestantStage = apps.get_model("users", "ContestantStage")
+    ContestantVoteTotal = apps.get_model("users", "ContestantVoteTotal")
+    VoteEvent = apps.get_model("users", "VoteEvent")
+
+    current_stage = ContestantStage.objects.order_by("-created_date").first()
+    stage = current_stage.stage if current_stage else None
+    events, totals = [], []
+    for contestant in Contestant.objects.exclude(number_of_vote=0).exclude(number_of_vote=None):
+        events.append(VoteEvent(contestant=contestant, votes=contestant.number_of_vote, stage=stage))
+        totals.append(ContestantVoteTotal(contestant=contestant, votes=contestant.number_of_vote))
+    VoteEvent.objects.bulk_create(events)
+    ContestantVoteTotal.objects.bulk_create(totals)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_voteevent_contestantvotetotal"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_vote_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0005_seed_vote_ledger"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contestant",
+            index=models.Index(
+                models.OrderBy(models.F("number_of_vote"), descending=True),
+                models.F("id"),
+                name="users_contestant_rank_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transactions",
+            index=models.Index(
+                condition=models.Q(("settled", True)),
+                fields=["-created_date"],
+                include=("amount_paid",),
+                name="users_tranx_settled_amount_idx",
+            ),
+        ),
+    ]
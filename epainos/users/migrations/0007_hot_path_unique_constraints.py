@@ -0,0 +1,74 @@
+from django.db import migrations, models
+
+# Build the unique indexes without locking writes, then promote them to constraints.
+CONSTRAINTS = [
+    ("users_contestant", "contestant_id", "users_contestant_contestant_id_uniq"),
+    ("users_transactions", "payment_ref", "users_transactions_payment_ref_uniq"),
+]
+
+
+def check_duplicates(apps, schema_editor):
+    """Stop before building anything when a column holds duplicates: the unique
+    index would fail on them and leave an invalid index behind."""
+    with schema_editor.connection.cursor() as cursor:
+        for table, column, _ in CONSTRAINTS:
+            cursor.execute(
+                f'SELECT "{column}", COUNT(*) FROM "{table}" WHERE "{column}" IS NOT NULL '
+                f'GROUP BY "{column}" HAVING COUNT(*) > 1 ORDER BY COUNT(*) DESC LIMIT 10'
+            )
+            duplicates = cursor.fetchall()
+            if duplicates:
+                listed = ", ".join(f"{value!r} ({count} rows)" for value, count in duplicates)
+                raise RuntimeError(f"{table}.{column} must be made unique before migrating, duplicated: {listed}")
+
+
+def drop_invalid_indexes(apps, schema_editor):
+    """Drop what a failed concurrent build left behind, which IF NOT EXISTS would keep."""
+    with schema_editor.connection.cursor() as cursor:
+        for _, _, name in CONSTRAINTS:
+            cursor.execute(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                "WHERE pg_class.relname = %s AND NOT pg_index.indisvalid",
+                [name],
+            )
+            if cursor.fetchone():
+                cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0006_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop, atomic=False),
+        migrations.RunPython(drop_invalid_indexes, migrations.RunPython.noop, atomic=False),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=[
+                        f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" ("{column}")',
+                        f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" UNIQUE USING INDEX "{name}"',
+                    ],
+                    reverse_sql=f'ALTER TABLE "{table}" DROP CONSTRAINT "{name}"',
+                )
+                for table, column, name in CONSTRAINTS
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="contestant",
+                    constraint=models.UniqueConstraint(
+                        fields=("contestant_id",), name="users_contestant_contestant_id_uniq"
+                    ),
+                ),
+                migrations.AddConstraint(
+                    model_name="transactions",
+                    constraint=models.UniqueConstraint(
+                        fields=("payment_ref",), name="users_transactions_payment_ref_uniq"
+                    ),
+                ),
+            ],
+        ),
+    ]
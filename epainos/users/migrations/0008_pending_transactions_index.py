@@ -0,0 +1,23 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0007_hot_path_unique_constraints"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="transactions",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__isnull", True), models.Q(("settled", True), _negated=True)
+                ),
+                fields=["created_date", "id"],
+                name="users_tranx_pending_idx",
+            ),
+        ),
+    ]
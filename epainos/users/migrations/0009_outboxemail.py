@@ -0,0 +1,145 @@
+# Generated by Django 5.0.10 on 2026-10-18 15:58
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_pending_transactions_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="The unique identifier of an object.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        help_text="Timestamp when the record was created. The date and time\n            are displayed in the Timezone from where request is made.\n            e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "modified_date",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was modified. The date and\n            time are displayed in the Timezone from where request\n            is made. e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC\n            ",
+                        null=True,
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.CharField(
+                        help_text="this hold the subject of the email",
+                        max_length=255,
+                        verbose_name="Subject",
+                    ),
+                ),
+                (
+                    "body",
+                    models.TextField(
+                        help_text="this hold the plain text body of the email",
+                        verbose_name="Body",
+                    ),
+                ),
+                (
+                    "from_email",
+                    models.CharField(
+                        blank=True,
+                        help_text="this hold the sender of the email, DEFAULT_FROM_EMAIL when blank",
+                        max_length=255,
+                        verbose_name="From Email",
+                    ),
+                ),
+                (
+                    "recipients",
+                    models.JSONField(
+                        default=list,
+                        help_text="this hold the list of recipient addresses",
+                        verbose_name="Recipients",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sent", "Sent"),
+                            ("dead", "Dead"),
+                        ],
+                        default="pending",
+                        help_text="this hold the delivery status of the email",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="this hold the number of failed delivery attempts",
+                        verbose_name="Attempts",
+                    ),
+                ),
+                (
+                    "next_attempt_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="this hold when the sender may try to deliver the email next",
+                        verbose_name="Next Attempt Date",
+                    ),
+                ),
+                (
+                    "sent_date",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="this hold when the email was delivered",
+                        null=True,
+                        verbose_name="Sent Date",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True,
+                        help_text="this hold the error of the last failed delivery attempt",
+                        verbose_name="Last Error",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Outbox Email",
+                "verbose_name_plural": "Outbox Emails",
+                "ordering": ["-created_date"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["next_attempt_date"],
+                        name="users_outbox_due_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "sent")),
+                        fields=["sent_date"],
+                        name="users_outbox_sent_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
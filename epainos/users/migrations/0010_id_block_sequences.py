@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_outboxemail"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE SEQUENCE users_contestant_id_block_seq",
+            reverse_sql="DROP SEQUENCE users_contestant_id_block_seq",
+        ),
+        migrations.RunSQL(
+            "CREATE SEQUENCE users_payment_ref_block_seq",
+            reverse_sql="DROP SEQUENCE users_payment_ref_block_seq",
+        ),
+    ]
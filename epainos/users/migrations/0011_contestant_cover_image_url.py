@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def fill_cover_image_url(apps, schema_editor):
+    """Point every contestant with images at its newest one."""
+    Contestant = apps.get_model("users", "Contestant")
+    contestants = []
+    for contestant in Contestant.objects.prefetch_related("contestant_images"):
+        images = sorted(
+            (image for image in contestant.contestant_images.all() if image.image),
+            key=lambda image: image.created_date,
+            reverse=True,
+        )
+        if images:
+            contestant.cover_image_url = images[0].image.url
+            contestants.append(contestant)
+    Contestant.objects.bulk_update(contestants, ["cover_image_url"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_id_block_sequences"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contestant",
+            name="cover_image_url",
+            field=models.URLField(
+                blank=True,
+                db_default="",
+                editable=False,
+                help_text="this hold the url of the newest contestant image, kept in sync by update_cover_image",
+                max_length=500,
+                verbose_name="Cover Image URL",
+            ),
+        ),
+        migrations.RunPython(fill_cover_image_url, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0011_contestant_cover_image_url"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="transactions",
+            index=models.Index(
+                fields=["-created_date", "-id"], name="users_tranx_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transactions",
+            index=models.Index(
+                fields=["contestant", "-created_date", "-id"],
+                name="users_tranx_contestant_idx",
+            ),
+        ),
+    ]
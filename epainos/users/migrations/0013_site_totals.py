@@ -0,0 +1,110 @@
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_site_totals(apps, schema_editor):
+    """Start the totals from the settled transactions and contestant votes."""
+    Contestant = apps.get_model("users", "Contestant")
+    SiteTotals = apps.get_model("users", "SiteTotals")
+    Transactions = apps.get_model("users", "Transactions")
+    settled = Transactions.objects.filter(settled=True).aggregate(
+        amount_paid=Sum("amount_paid"), transactions=Count("pk")
+    )
+    votes = Contestant.objects.aggregate(votes=Sum("number_of_vote"))["votes"]
+    SiteTotals.objects.create(
+        slot=0,
+        amount_paid=settled["amount_paid"] or 0,
+        transactions=settled["transactions"],
+        votes=votes or 0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0012_transactions_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SiteTotals",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="The unique identifier of an object.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        help_text="Timestamp when the record was created. The date and time\n            are displayed in the Timezone from where request is made.\n            e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "modified_date",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was modified. The date and\n            time are displayed in the Timezone from where request\n            is made. e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC\n            ",
+                        null=True,
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "slot",
+                    models.PositiveSmallIntegerField(
+                        help_text="this hold the slot of the totals, the site totals are the sum of every slot",
+                        verbose_name="Slot",
+                    ),
+                ),
+                (
+                    "amount_paid",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="this hold the amount paid by the settled transactions",
+                        max_digits=20,
+                        verbose_name="Amount Paid",
+                    ),
+                ),
+                (
+                    "transactions",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="this hold the number of settled transactions",
+                        verbose_name="Transactions",
+                    ),
+                ),
+                (
+                    "votes",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="this hold the sum of the contestant votes",
+                        verbose_name="Votes",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Site Totals",
+                "verbose_name_plural": "Site Totals",
+                "ordering": ["slot"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="sitetotals",
+            constraint=models.UniqueConstraint(
+                fields=("slot",), name="users_sitetotals_slot_uniq"
+            ),
+        ),
+        migrations.RunPython(fill_site_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+CREATE_STANDING_VIEW = """
+    CREATE MATERIALIZED VIEW users_contestant_standing AS
+    SELECT contestant.id AS contestant_id,
+           contestant.name,
+           contestant.stage_name,
+           COALESCE(contestant.number_of_vote, 0) AS votes,
+           RANK() OVER (ORDER BY COALESCE(contestant.number_of_vote, 0) DESC) AS rank,
+           COALESCE(settled.amount_paid, 0)::numeric(20, 2) AS amount_paid,
+           COALESCE(settled.transactions, 0) AS transactions
+      FROM users_contestant AS contestant
+      LEFT JOIN (
+            SELECT contestant_id, SUM(amount_paid) AS amount_paid, COUNT(*) AS transactions
+              FROM users_transactions
+             WHERE settled IS TRUE
+             GROUP BY contestant_id
+           ) AS settled ON settled.contestant_id = contestant.id;
+    -- REFRESH ... CONCURRENTLY needs a unique index
+    CREATE UNIQUE INDEX users_standing_contestant_uniq ON users_contestant_standing (contestant_id);
+    CREATE INDEX users_standing_rank_idx ON users_contestant_standing (rank, contestant_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_site_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContestantStanding",
+            fields=[
+                (
+                    "contestant",
+                    models.OneToOneField(
+                        help_text="this hold the contestant the standing belongs to",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="standing",
+                        serialize=False,
+                        to="users.contestant",
+                        verbose_name="Contestant Account",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="this hold the contestant name",
+                        max_length=255,
+                        verbose_name="Name of Contestant",
+                    ),
+                ),
+                (
+                    "stage_name",
+                    models.CharField(
+                        help_text="this hold the contestant stage name",
+                        max_length=100,
+                        null=True,
+                        verbose_name="Stage Name",
+                    ),
+                ),
+                (
+                    "votes",
+                    models.IntegerField(
+                        help_text="this hold the contestant votes", verbose_name="Votes"
+                    ),
+                ),
+                (
+                    "rank",
+                    models.BigIntegerField(
+                        help_text="this hold the contestant rank by votes, tied contestants share a rank",
+                        verbose_name="Rank",
+                    ),
+                ),
+                (
+                    "amount_paid",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="this hold the amount paid by the contestant settled transactions",
+                        max_digits=20,
+                        verbose_name="Amount Paid",
+                    ),
+                ),
+                (
+                    "transactions",
+                    models.BigIntegerField(
+                        help_text="this hold the number of the contestant settled transactions",
+                        verbose_name="Transactions",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Contestant Standing",
+                "verbose_name_plural": "Contestant Standings",
+                "db_table": "users_contestant_standing",
+                "ordering": ["rank", "contestant"],
+                "managed": False,
+            },
+        ),
+        migrations.RunSQL(
+            CREATE_STANDING_VIEW, "DROP MATERIALIZED VIEW users_contestant_standing"
+        ),
+    ]
@@ -0,0 +1,157 @@
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0014_contestant_standing"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="The unique identifier of an object.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        help_text="Timestamp when the record was created. The date and time\n            are displayed in the Timezone from where request is made.\n            e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "modified_date",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was modified. The date and\n            time are displayed in the Timezone from where request\n            is made. e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC\n            ",
+                        null=True,
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("transactions", "Transactions"),
+                            ("contestants", "Contestants"),
+                        ],
+                        help_text="this hold the list the export is made of",
+                        max_length=20,
+                        verbose_name="Kind",
+                    ),
+                ),
+                (
+                    "params",
+                    models.JSONField(
+                        default=dict,
+                        help_text="this hold the filter parameters of the export",
+                        verbose_name="Params",
+                    ),
+                ),
+                (
+                    "params_hash",
+                    models.CharField(
+                        help_text="this hold the digest of the kind and filter parameters, to reuse recent exports",
+                        max_length=64,
+                        verbose_name="Params Hash",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        help_text="this hold the progress status of the export",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "rows_done",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="this hold the number of rows written so far",
+                        verbose_name="Rows Done",
+                    ),
+                ),
+                (
+                    "rows_total",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="this hold the number of rows to export, once counted",
+                        null=True,
+                        verbose_name="Rows Total",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        help_text="this hold the finished spreadsheet",
+                        upload_to="exports/",
+                        verbose_name="File",
+                    ),
+                ),
+                (
+                    "finished_date",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="this hold when the export finished",
+                        null=True,
+                        verbose_name="Finished Date",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True,
+                        help_text="this hold the error of a failed export",
+                        verbose_name="Last Error",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="this hold the user who asked for the export",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Requested By",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Export Job",
+                "verbose_name_plural": "Export Jobs",
+                "ordering": ["-created_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["params_hash", "-created_date"],
+                        name="users_exportjob_params_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("users", "0015_export_job"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="voteevent",
+            index=models.Index(fields=["created_date"], name="users_voteevent_created_idx"),
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+CREATE_STANDING_VIEW = """
+    DROP MATERIALIZED VIEW users_contestant_standing;
+    CREATE MATERIALIZED VIEW users_contestant_standing AS
+    SELECT contestant.id AS contestant_id,
+           contestant.name,
+           contestant.stage_name,
+           COALESCE(contestant.number_of_vote, 0) AS votes,
+           RANK() OVER (ORDER BY COALESCE(contestant.number_of_vote, 0) DESC) AS rank,
+           COALESCE(settled.amount_paid, 0)::numeric(20, 2) AS amount_paid,
+           COALESCE(settled.transactions, 0) AS transactions,
+           COALESCE(
+               ROUND(
+                   COALESCE(contestant.number_of_vote, 0) * 100.0
+                   / NULLIF(SUM(COALESCE(contestant.number_of_vote, 0)) OVER (), 0),
+                   2
+               ),
+               0
+           )::numeric(5, 2) AS percent,
+           voted.last_vote_date
+      FROM users_contestant AS contestant
+      LEFT JOIN (
+            SELECT contestant_id, SUM(amount_paid) AS amount_paid, COUNT(*) AS transactions
+              FROM users_transactions
+             WHERE settled IS TRUE
+             GROUP BY contestant_id
+           ) AS settled ON settled.contestant_id = contestant.id
+      LEFT JOIN (
+            SELECT contestant_id, MAX(created_date) AS last_vote_date
+              FROM users_voteevent
+             WHERE votes > 0
+             GROUP BY contestant_id
+           ) AS voted ON voted.contestant_id = contestant.id;
+    CREATE UNIQUE INDEX users_standing_contestant_uniq ON users_contestant_standing (contestant_id);
+    CREATE INDEX users_standing_rank_idx ON users_contestant_standing (rank, contestant_id);
+"""
+
+DROP_STANDING_COLUMNS = """
+    DROP MATERIALIZED VIEW users_contestant_standing;
+    CREATE MATERIALIZED VIEW users_contestant_standing AS
+    SELECT contestant.id AS contestant_id,
+           contestant.name,
+           contestant.stage_name,
+           COALESCE(contestant.number_of_vote, 0) AS votes,
+           RANK() OVER (ORDER BY COALESCE(contestant.number_of_vote, 0) DESC) AS rank,
+           COALESCE(settled.amount_paid, 0)::numeric(20, 2) AS amount_paid,
+           COALESCE(settled.transactions, 0) AS transactions
+      FROM users_contestant AS contestant
+      LEFT JOIN (
+            SELECT contestant_id, SUM(amount_paid) AS amount_paid, COUNT(*) AS transactions
+              FROM users_transactions
+             WHERE settled IS TRUE
+             GROUP BY contestant_id
+           ) AS settled ON settled.contestant_id = contestant.id;
+    CREATE UNIQUE INDEX users_standing_contestant_uniq ON users_contestant_standing (contestant_id);
+    CREATE INDEX users_standing_rank_idx ON users_contestant_standing (rank, contestant_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0016_voteevent_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_STANDING_VIEW, DROP_STANDING_COLUMNS),
+    ]
@@ -0,0 +1,115 @@
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0017_standing_percent_last_vote"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HourlyRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="The unique identifier of an object.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        help_text="Timestamp when the record was created. The date and time\n            are displayed in the Timezone from where request is made.\n            e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC",
+                        verbose_name="Created",
+                    ),
+                ),
+                (
+                    "modified_date",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was modified. The date and\n            time are displayed in the Timezone from where request\n            is made. e.g. 2019-14-29T00:15:09Z for April 29, 2019 0:15:09 UTC\n            ",
+                        null=True,
+                        verbose_name="Updated",
+                    ),
+                ),
+                (
+                    "hour",
+                    models.DateTimeField(
+                        help_text="this hold the hour (UTC) the transactions were created in",
+                        verbose_name="Hour",
+                    ),
+                ),
+                (
+                    "settled",
+                    models.BooleanField(
+                        help_text="this hold whether the transactions are settled",
+                        verbose_name="Settled",
+                    ),
+                ),
+                (
+                    "transactions",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="this hold the number of transactions",
+                        verbose_name="Transactions",
+                    ),
+                ),
+                (
+                    "amount_paid",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        help_text="this hold the amount of the transactions",
+                        max_digits=20,
+                        verbose_name="Amount Paid",
+                    ),
+                ),
+                (
+                    "votes",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="this hold the votes credited for the transactions",
+                        verbose_name="Votes",
+                    ),
+                ),
+                (
+                    "contestant",
+                    models.ForeignKey(
+                        help_text="this hold the contestant the transactions were for",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_rollups",
+                        to="users.contestant",
+                        verbose_name="Contestant Account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Hourly Rollup",
+                "verbose_name_plural": "Hourly Rollups",
+                "ordering": ["hour"],
+                "indexes": [
+                    models.Index(
+                        fields=["contestant", "hour"],
+                        name="users_rollup_contestant_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="hourlyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("hour", "contestant", "settled"), name="users_rollup_hour_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0018_hourly_rollup"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="hourlyrollup",
+            name="users_rollup_hour_uniq",
+        ),
+        migrations.AddField(
+            model_name="hourlyrollup",
+            name="slot",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="this hold the slot of the rollup, the hour's figures are the sum of every slot",
+                verbose_name="Slot",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="hourlyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("hour", "contestant", "settled", "slot"),
+                name="users_rollup_slot_uniq",
+            ),
+        ),
+    ]
@@ -1,5 +1,4 @@
 import uuid
-import random
 
 from typing import ClassVar
 
@@ -8,16 +7,15 @@ from django.db.models import CharField
 from django.db.models import EmailField
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from helpers.basemodels import BaseModel
 
+from .ids import CONTESTANT_ID
+from .managers import ContestantQuerySet
 from .managers import UserManager
 
 
-def generate_random_10_digits():
-    return "".join([str(random.randint(0, 9)) for _ in range(10)])
-
-
 class User(AbstractUser):
     """
     Default custom user model for epainos.
@@ -103,19 +101,29 @@ class Contestant(BaseModel):
 
     contestant_videos = models.JSONField(default="['https://www.youtube.com/watch?v=6v2L2UGZJAM']")
 
+    cover_image_url = models.URLField(
+        verbose_name=_("Cover Image URL"),
+        max_length=500,
+        blank=True,
+        db_default="",
+        editable=False,
+        help_text=_("this hold the url of the newest contestant image, kept in sync by update_cover_image")
+    )
+
+    objects = ContestantQuerySet.as_manager()
+
     def save(self, *args, **kwargs) -> None:
         self.name = f"{self.first_name} {self.last_name}"
-        max_attempts = 10
-        attempts = 0
-        while not self.contestant_id and attempts < max_attempts:
-            contestant_id = generate_random_10_digits()
-            if not Contestant.objects.filter(contestant_id=contestant_id).exists():
-                self.contestant_id = contestant_id
-            attempts += 1
         if not self.contestant_id:
-            raise ValueError("Could not generate a unique contestant ID after multiple attempts.")
+            self.contestant_id = CONTESTANT_ID.allocate()
         super().save(*args, **kwargs)
 
+    def update_cover_image(self):
+        """Point ``cover_image_url`` at the newest image, what ``contestant_images.first`` returns."""
+        image = self.contestant_images.exclude(image="").first()
+        self.cover_image_url = image.image.url if image else ""
+        Contestant.objects.filter(pk=self.pk).update(cover_image_url=self.cover_image_url)
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -123,6 +131,12 @@ class Contestant(BaseModel):
         ordering = [
             "-created_date",
         ]
+        constraints = [
+            models.UniqueConstraint(fields=["contestant_id"], name="users_contestant_contestant_id_uniq"),
+        ]
+        indexes = [
+            models.Index(models.F("number_of_vote").desc(), "id", name="users_contestant_rank_idx"),
+        ]
         verbose_name = _("Contestant Profile")
         verbose_name_plural = _("Contestant Profile")
 
@@ -236,6 +250,27 @@ class Transactions(BaseModel):
         ordering = [
             "-created_date",
         ]
+        constraints = [
+            models.UniqueConstraint(fields=["payment_ref"], name="users_transactions_payment_ref_uniq"),
+        ]
+        indexes = [
+            # settled rows only: the dashboard revenue sum and latest settled payments
+            models.Index(
+                fields=["-created_date"],
+                include=["amount_paid"],
+                condition=models.Q(settled=True),
+                name="users_tranx_settled_amount_idx",
+            ),
+            # pending rows only: the keyset walk of reconcile_transactions
+            models.Index(
+                fields=["created_date", "id"],
+                condition=models.Q(status__isnull=True) & ~models.Q(settled=True),
+                name="users_tranx_pending_idx",
+            ),
+            # keyset pages of the transaction list, unfiltered and by contestant
+            models.Index(fields=["-created_date", "-id"], name="users_tranx_created_idx"),
+            models.Index(fields=["contestant", "-created_date", "-id"], name="users_tranx_contestant_idx"),
+        ]
         verbose_name = _("Transactions")
         verbose_name_plural = _("Transactions")
 
@@ -254,4 +289,454 @@ class ContestantStage(BaseModel):
             "-created_date",
         ]
         verbose_name = _("Contestant Stage")
-        verbose_name_plural = _("Contestant Stage")
\ No newline at end of file
+        verbose_name_plural = _("Contestant Stage")
+
+
+class VoteEvent(BaseModel):
+    contestant = models.ForeignKey(
+        Contestant, on_delete=models.SET_NULL,
+        null=True,
+        related_name="vote_events",
+        verbose_name=_("Contestant Account"),
+        help_text=_("this hold the contestant the votes were credited to")
+    )
+
+    transaction = models.OneToOneField(
+        Transactions, on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="vote_event",
+        verbose_name=_("Transaction"),
+        help_text=_("this hold the settled transaction that paid for the votes, empty for adjustments")
+    )
+
+    votes = models.IntegerField(
+        verbose_name=_("Votes"),
+        help_text=_("this hold the number of votes credited, negative for adjustments")
+    )
+
+    stage = models.CharField(
+        verbose_name=_("Stage"),
+        max_length=100,
+        null=True,
+        blank=True,
+        help_text=_("this hold the stage that was active when the votes were credited")
+    )
+
+    flushed = models.BooleanField(
+        verbose_name=_("Flushed"),
+        default=True,
+        help_text=_("this hold whether the votes are in the contestant totals yet")
+    )
+
+    def __str__(self):
+        return f"{self.votes} votes"
+
+    class Meta:
+        ordering = [
+            "-created_date",
+        ]
+        indexes = [
+            # the ranking report of a date range
+            models.Index(fields=["created_date"], name="users_voteevent_created_idx"),
+            # the events the vote counter flush has yet to apply
+            models.Index(
+                fields=["contestant"], condition=models.Q(flushed=False), name="users_voteevent_unflushed_idx"
+            ),
+        ]
+        verbose_name = _("Vote Event")
+        verbose_name_plural = _("Vote Events")
+
+
+class ContestantVoteTotal(BaseModel):
+    contestant = models.OneToOneField(
+        Contestant, on_delete=models.CASCADE,
+        related_name="vote_total",
+        verbose_name=_("Contestant Account"),
+        help_text=_("this hold the contestant the total belongs to")
+    )
+
+    votes = models.IntegerField(
+        verbose_name=_("Votes"),
+        default=0,
+        help_text=_("this hold the sum of the contestant vote events")
+    )
+
+    def __str__(self):
+        return f"{self.contestant}: {self.votes}"
+
+    class Meta:
+        ordering = [
+            "-votes",
+        ]
+        verbose_name = _("Contestant Vote Total")
+        verbose_name_plural = _("Contestant Vote Totals")
+
+
+class OutboxEmail(BaseModel):
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"
+    STATUS_CHOICES = (
+        (PENDING, _("Pending")),
+        (SENT, _("Sent")),
+        (DEAD, _("Dead")),
+    )
+
+    subject = models.CharField(
+        verbose_name=_("Subject"),
+        max_length=255,
+        help_text=_("this hold the subject of the email")
+    )
+
+    body = models.TextField(
+        verbose_name=_("Body"),
+        help_text=_("this hold the plain text body of the email")
+    )
+
+    from_email = models.CharField(
+        verbose_name=_("From Email"),
+        max_length=255,
+        blank=True,
+        help_text=_("this hold the sender of the email, DEFAULT_FROM_EMAIL when blank")
+    )
+
+    recipients = models.JSONField(
+        verbose_name=_("Recipients"),
+        default=list,
+        help_text=_("this hold the list of recipient addresses")
+    )
+
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        help_text=_("this hold the delivery status of the email")
+    )
+
+    attempts = models.PositiveIntegerField(
+        verbose_name=_("Attempts"),
+        default=0,
+        help_text=_("this hold the number of failed delivery attempts")
+    )
+
+    next_attempt_date = models.DateTimeField(
+        verbose_name=_("Next Attempt Date"),
+        default=timezone.now,
+        help_text=_("this hold when the sender may try to deliver the email next")
+    )
+
+    sent_date = models.DateTimeField(
+        verbose_name=_("Sent Date"),
+        null=True,
+        blank=True,
+        help_text=_("this hold when the email was delivered")
+    )
+
+    last_error = models.TextField(
+        verbose_name=_("Last Error"),
+        blank=True,
+        help_text=_("this hold the error of the last failed delivery attempt")
+    )
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+    class Meta:
+        ordering = [
+            "-created_date",
+        ]
+        indexes = [
+            # the sender's queue of due emails
+            models.Index(
+                fields=["next_attempt_date"],
+                condition=models.Q(status="pending"),
+                name="users_outbox_due_idx",
+            ),
+            # the per-minute sending cap
+            models.Index(
+                fields=["sent_date"],
+                condition=models.Q(status="sent"),
+                name="users_outbox_sent_idx",
+            ),
+        ]
+        verbose_name = _("Outbox Email")
+        verbose_name_plural = _("Outbox Emails")
+
+
+class SiteTotals(BaseModel):
+    slot = models.PositiveSmallIntegerField(
+        verbose_name=_("Slot"),
+        help_text=_("this hold the slot of the totals, the site totals are the sum of every slot")
+    )
+
+    amount_paid = models.DecimalField(
+        verbose_name=_("Amount Paid"),
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        help_text=_("this hold the amount paid by the settled transactions")
+    )
+
+    transactions = models.BigIntegerField(
+        verbose_name=_("Transactions"),
+        default=0,
+        help_text=_("this hold the number of settled transactions")
+    )
+
+    votes = models.BigIntegerField(
+        verbose_name=_("Votes"),
+        default=0,
+        help_text=_("this hold the sum of the contestant votes")
+    )
+
+    def __str__(self):
+        return f"slot {self.slot}"
+
+    class Meta:
+        ordering = [
+            "slot",
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["slot"], name="users_sitetotals_slot_uniq"),
+        ]
+        verbose_name = _("Site Totals")
+        verbose_name_plural = _("Site Totals")
+
+
+class ExportJob(BaseModel):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, _("Pending")),
+        (RUNNING, _("Running")),
+        (DONE, _("Done")),
+        (FAILED, _("Failed")),
+    )
+    TRANSACTIONS = "transactions"
+    CONTESTANTS = "contestants"
+    KIND_CHOICES = (
+        (TRANSACTIONS, _("Transactions")),
+        (CONTESTANTS, _("Contestants")),
+    )
+
+    kind = models.CharField(
+        verbose_name=_("Kind"),
+        max_length=20,
+        choices=KIND_CHOICES,
+        help_text=_("this hold the list the export is made of")
+    )
+
+    params = models.JSONField(
+        verbose_name=_("Params"),
+        default=dict,
+        help_text=_("this hold the filter parameters of the export")
+    )
+
+    params_hash = models.CharField(
+        verbose_name=_("Params Hash"),
+        max_length=64,
+        help_text=_("this hold the digest of the kind and filter parameters, to reuse recent exports")
+    )
+
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        help_text=_("this hold the progress status of the export")
+    )
+
+    rows_done = models.PositiveIntegerField(
+        verbose_name=_("Rows Done"),
+        default=0,
+        help_text=_("this hold the number of rows written so far")
+    )
+
+    rows_total = models.PositiveIntegerField(
+        verbose_name=_("Rows Total"),
+        null=True,
+        blank=True,
+        help_text=_("this hold the number of rows to export, once counted")
+    )
+
+    file = models.FileField(
+        verbose_name=_("File"),
+        upload_to="exports/",
+        blank=True,
+        help_text=_("this hold the finished spreadsheet")
+    )
+
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Requested By"),
+        help_text=_("this hold the user who asked for the export")
+    )
+
+    finished_date = models.DateTimeField(
+        verbose_name=_("Finished Date"),
+        null=True,
+        blank=True,
+        help_text=_("this hold when the export finished")
+    )
+
+    last_error = models.TextField(
+        verbose_name=_("Last Error"),
+        blank=True,
+        help_text=_("this hold the error of a failed export")
+    )
+
+    def __str__(self):
+        return f"{self.kind} export ({self.status})"
+
+    class Meta:
+        ordering = [
+            "-created_date",
+        ]
+        indexes = [
+            # the recent export with the same parameters
+            models.Index(fields=["params_hash", "-created_date"], name="users_exportjob_params_idx"),
+        ]
+        verbose_name = _("Export Job")
+        verbose_name_plural = _("Export Jobs")
+
+
+class HourlyRollup(BaseModel):
+    hour = models.DateTimeField(
+        verbose_name=_("Hour"),
+        help_text=_("this hold the hour (UTC) the transactions were created in")
+    )
+
+    contestant = models.ForeignKey(
+        Contestant, on_delete=models.CASCADE,
+        related_name="hourly_rollups",
+        verbose_name=_("Contestant Account"),
+        help_text=_("this hold the contestant the transactions were for")
+    )
+
+    settled = models.BooleanField(
+        verbose_name=_("Settled"),
+        help_text=_("this hold whether the transactions are settled")
+    )
+
+    slot = models.PositiveSmallIntegerField(
+        verbose_name=_("Slot"),
+        default=0,
+        help_text=_("this hold the slot of the rollup, the hour's figures are the sum of every slot")
+    )
+
+    transactions = models.BigIntegerField(
+        verbose_name=_("Transactions"),
+        default=0,
+        help_text=_("this hold the number of transactions")
+    )
+
+    amount_paid = models.DecimalField(
+        verbose_name=_("Amount Paid"),
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        help_text=_("this hold the amount of the transactions")
+    )
+
+    votes = models.BigIntegerField(
+        verbose_name=_("Votes"),
+        default=0,
+        help_text=_("this hold the votes credited for the transactions")
+    )
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H}:00 {self.contestant_id} ({self.slot})"
+
+    class Meta:
+        ordering = [
+            "hour",
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["hour", "contestant", "settled", "slot"], name="users_rollup_slot_uniq"),
+        ]
+        indexes = [
+            # the series of one contestant
+            models.Index(fields=["contestant", "hour"], name="users_rollup_contestant_idx"),
+        ]
+        verbose_name = _("Hourly Rollup")
+        verbose_name_plural = _("Hourly Rollups")
+
+
+class ContestantStanding(models.Model):
+    """A row of the ``users_contestant_standing`` materialized view, refreshed by
+    ``standings.refresh``: never written through the ORM."""
+
+    contestant = models.OneToOneField(
+        Contestant, on_delete=models.DO_NOTHING,
+        primary_key=True,
+        related_name="standing",
+        verbose_name=_("Contestant Account"),
+        help_text=_("this hold the contestant the standing belongs to")
+    )
+
+    name = models.CharField(
+        verbose_name=_("Name of Contestant"),
+        max_length=255,
+        help_text=_("this hold the contestant name")
+    )
+
+    stage_name = models.CharField(
+        verbose_name=_("Stage Name"),
+        max_length=100,
+        null=True,
+        help_text=_("this hold the contestant stage name")
+    )
+
+    votes = models.IntegerField(
+        verbose_name=_("Votes"),
+        help_text=_("this hold the contestant votes")
+    )
+
+    rank = models.BigIntegerField(
+        verbose_name=_("Rank"),
+        help_text=_("this hold the contestant rank by votes, tied contestants share a rank")
+    )
+
+    amount_paid = models.DecimalField(
+        verbose_name=_("Amount Paid"),
+        max_digits=20,
+        decimal_places=2,
+        help_text=_("this hold the amount paid by the contestant settled transactions")
+    )
+
+    transactions = models.BigIntegerField(
+        verbose_name=_("Transactions"),
+        help_text=_("this hold the number of the contestant settled transactions")
+    )
+
+    percent = models.DecimalField(
+        verbose_name=_("Percent of Votes"),
+        max_digits=5,
+        decimal_places=2,
+        help_text=_("this hold the contestant share of all the votes, in percent")
+    )
+
+    last_vote_date = models.DateTimeField(
+        verbose_name=_("Last Vote Date"),
+        null=True,
+        help_text=_("this hold when votes were last credited to the contestant")
+    )
+
+    def __str__(self):
+        return f"{self.rank}. {self.name}"
+
+    class Meta:
+        managed = False
+        db_table = "users_contestant_standing"
+        ordering = [
+            "rank",
+            "contestant",
+        ]
+        verbose_name = _("Contestant Standing")
+        verbose_name_plural = _("Contestant Standings")
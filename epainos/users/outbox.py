@@ -0,0 +1,128 @@
+"""Transactional email outbox.
+
+``queue_email`` only inserts an ``OutboxEmail`` row, inside whatever transaction
+the caller is in, so the email is sent if and only if that transaction commits and
+the payment and vote paths never wait on the email provider. The
+``send_outbox_emails`` command drains the outbox with ``send_batch``: due emails
+are claimed, then delivered over one backend connection outside any transaction,
+failures are retried with exponential backoff and dead-lettered after
+``EMAIL_OUTBOX_MAX_ATTEMPTS``, and at most ``EMAIL_OUTBOX_PER_MINUTE`` emails go
+out per minute.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    return OutboxEmail.objects.create(
+        subject=subject[:255], body=body, from_email=from_email or "", recipients=list(recipients)
+    )
+
+
+def sending_allowance(batch_size):
+    """How many emails may be sent now without going over ``EMAIL_OUTBOX_PER_MINUTE``."""
+    per_minute = settings.EMAIL_OUTBOX_PER_MINUTE
+    if not per_minute:
+        return batch_size
+    sent = OutboxEmail.objects.filter(
+        status=OutboxEmail.SENT, sent_date__gte=timezone.now() - timedelta(minutes=1)
+    ).count()
+    return max(min(batch_size, per_minute - sent), 0)
+
+
+def send_batch(batch_size=None):
+    """Deliver up to ``batch_size`` due emails over a single connection.
+
+    The emails are claimed first, in a transaction of their own, by moving their
+    next attempt ``EMAIL_OUTBOX_CLAIM_SECONDS`` ahead; they are sent outside any
+    transaction and the outcome of each is saved as soon as it is known. A failure
+    to open the connection counts as a failed attempt for every claimed email.
+
+    Returns:
+        tuple: ``(sent, failed)`` email counts.
+    """
+    limit = sending_allowance(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not limit:
+        return 0, 0
+    emails = _claim(limit)
+    if not emails:
+        return 0, 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:  # noqa: BLE001
+        for email in emails:
+            _record_failure(email, exc)
+            _save(email)
+        return 0, len(emails)
+    sent = failed = 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email or None, email.recipients, connection=connection
+            )
+            try:
+                message.send()
+            except Exception as exc:  # noqa: BLE001
+                failed += 1
+                _record_failure(email, exc)
+            else:
+                sent += 1
+                email.status = OutboxEmail.SENT
+                email.sent_date = timezone.now()
+            _save(email)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _claim(limit):
+    """Take up to ``limit`` due emails out of the other senders' reach for a while.
+
+    Rows are locked with ``SKIP LOCKED`` so several senders can drain the outbox;
+    the emails of a sender that dies come due again once the claim runs out.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_date__lte=timezone.now())
+            .order_by("next_attempt_date")[:limit]
+        )
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_date=timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_SECONDS),
+                modified_date=timezone.now(),
+            )
+    return emails
+
+
+def _save(email):
+    email.modified_date = timezone.now()
+    email.save(update_fields=["status", "attempts", "next_attempt_date", "sent_date", "last_error", "modified_date"])
+
+
+def _record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = repr(exc)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        logger.error("Giving up on outbox email %s after %s attempts: %r", email.pk, email.attempts, exc)
+        email.status = OutboxEmail.DEAD
+    else:
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_date = timezone.now() + timedelta(seconds=delay)
+
+
+def requeue(emails):
+    """Give dead-lettered ``emails`` (a queryset) a fresh set of attempts."""
+    return emails.filter(status=OutboxEmail.DEAD).update(
+        status=OutboxEmail.PENDING, attempts=0, next_attempt_date=timezone.now(), modified_date=timezone.now()
+    )
@@ -0,0 +1,165 @@
+"""Bulk reconciliation of pending transactions against Flutterwave.
+
+Pending transactions (not settled, no status) are walked in keyset-paginated
+chunks ordered by ``(created_date, id)``. Each chunk is verified concurrently
+under a global rate limit, then applied with one grouped crediting statement for
+the paid ones (``credit_votes_many``) and one ``bulk_update`` for the rest.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+import requests
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from helpers.payment import NOT_FOUND, FlutterWave, build_session
+
+from .models import Transactions
+from .voting import credit_votes_many
+
+PAID = "successful"
+ABANDONED = "abandoned"
+AMOUNT_MISMATCH = "amount mismatch"
+
+
+class RateLimiter:
+    """Spaces calls from any number of threads at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+@dataclass
+class Stats:
+    checked: int = 0
+    outcomes: dict = field(default_factory=dict)
+    errors: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, outcome):
+        self.checked += 1
+        if outcome is None:
+            self.errors += 1
+        else:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    @property
+    def rate(self):
+        return self.checked / max(time.monotonic() - self.started, 1e-9)
+
+    def __str__(self):
+        outcomes = ", ".join(f"{count} {outcome}" for outcome, count in sorted(self.outcomes.items()))
+        return f"{self.checked} checked ({outcomes or 'nothing applied'}, {self.errors} errors), {self.rate:.1f}/s"
+
+
+def encode_cursor(tranx):
+    return f"{tranx.created_date.isoformat()}|{tranx.pk}"
+
+
+def decode_cursor(cursor):
+    created_date, pk = cursor.split("|")
+    return datetime.fromisoformat(created_date), pk
+
+
+def pending_chunks(chunk_size=500, after=None, older_than=None):
+    """Yield lists of pending transactions, ``chunk_size`` at a time, after the ``after`` cursor."""
+    queryset = Transactions.objects.filter(status__isnull=True).exclude(settled=True)
+    if older_than is not None:
+        queryset = queryset.filter(created_date__lt=timezone.now() - older_than)
+    queryset = queryset.order_by("created_date", "id").only("id", "created_date", "payment_ref", "amount_paid")
+    while True:
+        page = queryset
+        if after is not None:
+            created_date, pk = after
+            page = page.filter(Q(created_date__gt=created_date) | Q(created_date=created_date, id__gt=pk))
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        after = (chunk[-1].created_date, chunk[-1].pk)
+
+
+def classify(tranx, status, data):
+    """Map a Flutterwave verify answer to the outcome to apply, ``None`` to leave it pending."""
+    if status != "success":
+        # Flutterwave has never seen the reference: the voter left before paying
+        return ABANDONED if status == NOT_FOUND else None
+    if data.get("status") == "successful":
+        if tranx.amount_paid is not None and Decimal(str(data.get("amount", 0))) < tranx.amount_paid:
+            return AMOUNT_MISMATCH
+        return PAID
+    if data.get("status") in ("failed", "cancelled"):
+        return data["status"]
+    return None
+
+
+def verify_chunk(chunk, client, limiter, concurrency):
+    """Verify every transaction of ``chunk`` concurrently.
+
+    Returns:
+        list: ``(transaction, outcome)`` pairs, ``outcome`` is ``None`` on errors.
+    """
+
+    def verify(tranx):
+        limiter.wait()
+        try:
+            return tranx, classify(tranx, *client.verify_payment_flutterwave(tranx.payment_ref))
+        except (requests.RequestException, ValueError, KeyError):
+            return tranx, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(verify, chunk))
+
+
+def apply_outcomes(results):
+    """Credit the paid transactions and record the other outcomes of a chunk."""
+    paid = [tranx.payment_ref for tranx, outcome in results if outcome == PAID]
+    others = {tranx.pk: outcome for tranx, outcome in results if outcome not in (None, PAID)}
+    with transaction.atomic():
+        if paid:
+            credit_votes_many(paid, PAID)
+        if others:
+            # lock the rows so a payment settled meanwhile is never overwritten
+            closed = list(
+                Transactions.objects.select_for_update()
+                .filter(pk__in=list(others))
+                .exclude(settled=True)
+                .only("id")
+            )
+            for tranx in closed:
+                tranx.settled = False
+                tranx.status = others[tranx.pk]
+                tranx.modified_date = timezone.now()
+            Transactions.objects.bulk_update(closed, ["settled", "status", "modified_date"])
+
+
+def reconcile(chunk_size=500, concurrency=8, rate=10, after=None, older_than=None, dry_run=False, progress=None):
+    """Reconcile every pending transaction, calling ``progress(stats, cursor)`` after each chunk."""
+    client = FlutterWave()
+    client.session = build_session(pool_size=concurrency)
+    limiter = RateLimiter(rate)
+    stats = Stats()
+    for chunk in pending_chunks(chunk_size, after=after, older_than=older_than):
+        results = verify_chunk(chunk, client, limiter, concurrency)
+        if not dry_run:
+            apply_outcomes(results)
+        for _, outcome in results:
+            stats.add(outcome)
+        if progress:
+            progress(stats, encode_cursor(chunk[-1]))
+    return stats
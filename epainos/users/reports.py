@@ -0,0 +1,84 @@
+"""Contestant ranking report.
+
+Without filters the report is the ``users_contestant_standing`` materialized view
+(see ``standings``). For a date range or a stage it is one aggregate query over the
+vote ledger: the votes credited in the range (or stage), the settled revenue and
+transactions behind them and the last vote, with ``RANK()`` and the share of the
+range's votes computed by window functions in the same query. Those reports are
+cached for ``RANKING_REPORT_CACHE_TIMEOUT`` seconds per set of filters.
+"""
+import hashlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Contestant, ContestantStanding, Transactions, VoteEvent
+
+CACHE_KEY = "reports:ranking:{digest}"
+
+# the columns of the standings view, from the vote events matching {conditions}
+RANKING_SQL = f"""
+    WITH events AS (
+        SELECT event.contestant_id,
+               SUM(event.votes) AS votes,
+               MAX(event.created_date) FILTER (WHERE event.votes > 0) AS last_vote_date,
+               SUM(tranx.amount_paid) FILTER (WHERE tranx.settled IS TRUE) AS amount_paid,
+               COUNT(tranx.id) FILTER (WHERE tranx.settled IS TRUE) AS transactions
+          FROM {VoteEvent._meta.db_table} AS event
+          LEFT JOIN {Transactions._meta.db_table} AS tranx ON tranx.id = event.transaction_id
+         WHERE event.contestant_id IS NOT NULL{{conditions}}
+         GROUP BY event.contestant_id
+    )
+    SELECT contestant.id AS contestant_id,
+           contestant.name,
+           contestant.stage_name,
+           COALESCE(events.votes, 0) AS votes,
+           RANK() OVER (ORDER BY COALESCE(events.votes, 0) DESC) AS rank,
+           COALESCE(events.amount_paid, 0)::numeric(20, 2) AS amount_paid,
+           COALESCE(events.transactions, 0) AS transactions,
+           COALESCE(
+               ROUND(COALESCE(events.votes, 0) * 100.0 / NULLIF(SUM(COALESCE(events.votes, 0)) OVER (), 0), 2),
+               0
+           )::numeric(5, 2) AS percent,
+           events.last_vote_date
+      FROM {Contestant._meta.db_table} AS contestant
+      LEFT JOIN events ON events.contestant_id = contestant.id
+     ORDER BY rank, contestant.id
+"""
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def ranking(start_date=None, end_date=None, stage=None):
+    """The ``ContestantStanding`` rows of the votes credited from ``start_date`` to
+    ``end_date`` (inclusive) in ``stage``, best first.
+
+    Without any filter this is the standings view, a queryset; else a list.
+    """
+    if start_date is None and end_date is None and not stage:
+        return ContestantStanding.objects.all()
+    digest = hashlib.sha256(f"{start_date}|{end_date}|{stage or ''}".encode()).hexdigest()[:32]
+    return cache.get_or_set(
+        CACHE_KEY.format(digest=digest),
+        lambda: _ranking(start_date, end_date, stage),
+        timeout=settings.RANKING_REPORT_CACHE_TIMEOUT,
+    )
+
+
+def _ranking(start_date, end_date, stage):
+    conditions, params = [], []
+    if start_date is not None:
+        conditions.append("event.created_date >= %s")
+        params.append(_day_start(start_date))
+    if end_date is not None:
+        conditions.append("event.created_date < %s")
+        params.append(_day_start(end_date + timedelta(days=1)))
+    if stage:
+        conditions.append("event.stage = %s")
+        params.append(stage)
+    sql = RANKING_SQL.format(conditions="".join(f" AND {condition}" for condition in conditions))
+    return list(ContestantStanding.objects.raw(sql, params))
@@ -0,0 +1,206 @@
+"""Hourly vote and revenue rollups for the dashboard charts.
+
+``HourlyRollup`` rows hold, per hour (UTC), contestant and settled state, the
+number and amount of the transactions created in that hour and the votes credited
+for them. Each is spread over ``HOURLY_ROLLUP_SLOTS`` rows, every write adding to
+a random one, so concurrent vote submissions for a contestant do not queue on a
+single row lock (as with ``totals``). A transaction is added to its hour when it
+is created and taken out when it is deleted (see ``signals``), and moved from the
+unsettled to the settled rows by the statement that settles it (see ``voting``),
+so a chart is read from a few rows per hour however many transactions there are.
+Transactions without a contestant are left out.
+
+``backfill`` rebuilds the rollups from the transactions and the vote ledger a
+chunk of time at a time (see the ``backfill_rollups`` command), e.g. for the
+transactions made before the rollups existed or edited by hand.
+"""
+import random
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from .models import ContestantStage, HourlyRollup, Transactions, VoteEvent
+
+HOUR = "hour"
+DAY = "day"
+STAGE = "stage"
+GRANULARITIES = (HOUR, DAY, STAGE)
+
+# expects the ``{source} (hour, contestant_id, settled, transactions, amount_paid,
+# votes)`` relation in the surrounding query and the slot as parameter
+UPSERT_SQL = f"""
+    INSERT INTO {HourlyRollup._meta.db_table}
+           (id, created_date, modified_date, hour, contestant_id, settled, slot, transactions, amount_paid, votes)
+    SELECT gen_random_uuid(), NOW(), NOW(), hour, contestant_id, settled, %s, transactions, amount_paid, votes
+      FROM {{source}}
+        ON CONFLICT (hour, contestant_id, settled, slot) DO UPDATE
+       SET transactions = {HourlyRollup._meta.db_table}.transactions + EXCLUDED.transactions,
+           amount_paid = {HourlyRollup._meta.db_table}.amount_paid + EXCLUDED.amount_paid,
+           votes = {HourlyRollup._meta.db_table}.votes + EXCLUDED.votes,
+           modified_date = NOW()
+"""
+
+# expects the ``settled (created_date, contestant_id, amount_paid, votes)``
+# relation of the transactions just settled: out of their unsettled rows and into
+# the settled ones, with their votes
+MOVES_SQL = """
+    SELECT date_trunc('hour', settled.created_date, 'UTC') AS hour,
+           settled.contestant_id,
+           move.settled,
+           SUM(move.transactions)::bigint AS transactions,
+           SUM(move.amount_paid) AS amount_paid,
+           SUM(move.votes)::bigint AS votes
+      FROM settled
+     CROSS JOIN LATERAL (
+           VALUES (FALSE, -1, -COALESCE(settled.amount_paid, 0), 0),
+                  (TRUE, 1, COALESCE(settled.amount_paid, 0), settled.votes)
+           ) AS move (settled, transactions, amount_paid, votes)
+     WHERE settled.contestant_id IS NOT NULL
+     GROUP BY 1, 2, 3
+"""
+
+# the rollups of the transactions created from the first to the second parameter
+BACKFILL_SQL = f"""
+    SELECT date_trunc('hour', tranx.created_date, 'UTC') AS hour,
+           tranx.contestant_id,
+           COALESCE(tranx.settled, FALSE) AS settled,
+           COUNT(*) AS transactions,
+           COALESCE(SUM(tranx.amount_paid), 0) AS amount_paid,
+           COALESCE(SUM(event.votes), 0) AS votes
+      FROM {Transactions._meta.db_table} AS tranx
+      LEFT JOIN {VoteEvent._meta.db_table} AS event ON event.transaction_id = tranx.id
+     WHERE tranx.contestant_id IS NOT NULL AND tranx.created_date >= %s AND tranx.created_date < %s
+     GROUP BY 1, 2, 3
+"""
+
+
+def slot():
+    return random.randrange(settings.HOURLY_ROLLUP_SLOTS)
+
+
+def upsert_sql(source):
+    return UPSERT_SQL.format(source=source)
+
+
+def floor_hour(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def add(tranx, sign=1, votes=0):
+    """Add a transaction to the rollup of its hour, ``sign=-1`` to take it out."""
+    if tranx.contestant_id is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH source (hour, contestant_id, settled, transactions, amount_paid, votes) AS (
+                VALUES (%s::timestamptz, %s::uuid, %s, %s::bigint, %s::numeric, %s::bigint)
+            )
+            {upsert_sql("source")}
+            """,
+            [
+                floor_hour(tranx.created_date),
+                tranx.contestant_id,
+                bool(tranx.settled),
+                sign,
+                sign * (tranx.amount_paid or 0),
+                sign * votes,
+                slot(),
+            ],
+        )
+
+
+def backfill(start=None, end=None, chunk=timedelta(days=1)):
+    """Rebuild the rollups of the transactions created from ``start`` to ``end``
+    (all of them by default), each ``chunk`` of time in its own transaction.
+
+    Yields:
+        tuple: the ``(start, end)`` of each chunk once it is rebuilt.
+    """
+    bounds = Transactions.objects.aggregate(first=Min("created_date"), last=Max("created_date"))
+    if bounds["first"] is None:
+        return
+    start = floor_hour(start or bounds["first"])
+    end = end or floor_hour(bounds["last"]) + timedelta(hours=1)
+    while start < end:
+        stop = min(start + chunk, end)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # transactions settled or created meanwhile wait, so none is counted twice or missed
+            cursor.execute(f"LOCK TABLE {HourlyRollup._meta.db_table} IN EXCLUSIVE MODE")
+            HourlyRollup.objects.filter(hour__gte=start, hour__lt=stop).delete()
+            cursor.execute(f"WITH source AS ({BACKFILL_SQL}) {upsert_sql('source')}", [start, stop, 0])
+        yield start, stop
+        start = stop
+
+
+def _buckets(start, end, granularity):
+    """Every hour or day from ``start`` to ``end``."""
+    if granularity == HOUR:
+        bucket, step = floor_hour(start), timedelta(hours=1)
+    else:
+        bucket, step = timezone.make_aware(datetime.combine(timezone.localdate(start), time.min)), timedelta(days=1)
+    while bucket < end:
+        yield bucket
+        bucket += step
+
+
+def series(start, end, granularity=HOUR, contestant=None, settled=True, fill=True):
+    """The votes, amount paid and transactions of the hours from ``start`` to ``end``.
+
+    Grouped by hour, by day or by the stage active at the start of each hour;
+    ``settled=None`` counts the unsettled transactions too.
+
+    Returns:
+        list: ``{"bucket", "votes", "amount_paid", "transactions"}`` dicts in time
+        order, the bucket being the hour, the day or the stage. With ``fill`` the
+        hours and days without any are included as zeros.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"The granularity must be one of {', '.join(GRANULARITIES)}")
+    rows = HourlyRollup.objects.filter(hour__gte=floor_hour(start), hour__lt=end)
+    if settled is not None:
+        rows = rows.filter(settled=settled)
+    if contestant is not None:
+        rows = rows.filter(contestant=contestant)
+    if granularity == HOUR:
+        bucket = F("hour")
+    elif granularity == DAY:
+        bucket = TruncDay("hour")
+    else:
+        stage = ContestantStage.objects.filter(created_date__lte=OuterRef("hour")).order_by("-created_date")
+        bucket = Subquery(stage.values("stage")[:1])
+    rows = (
+        rows.values(bucket=bucket)
+        .annotate(
+            first_hour=Min("hour"),
+            total_votes=Sum("votes"),
+            total_amount_paid=Sum("amount_paid"),
+            total_transactions=Sum("transactions"),
+        )
+        .order_by("first_hour")
+    )
+    points = [
+        {
+            "bucket": row["bucket"],
+            "votes": row["total_votes"],
+            "amount_paid": row["total_amount_paid"],
+            "transactions": row["total_transactions"],
+        }
+        for row in rows
+    ]
+    if not fill or granularity == STAGE:
+        return points
+    found = {point["bucket"]: point for point in points}
+    empty = {"votes": 0, "amount_paid": Decimal(0), "transactions": 0}
+    return [found.get(bucket, {"bucket": bucket, **empty}) for bucket in _buckets(start, end, granularity)]
+
+
+def today():
+    """The hourly ``series`` of the current day."""
+    start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return series(start, start + timedelta(days=1))
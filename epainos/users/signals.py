@@ -1,8 +1,13 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from PIL import Image
 
-from .models import ContestantImage
+from helpers import pagecache
+
+from . import leaderboard, rollups, stats, totals
+from .ledger import totals_changed, votes_adjusted
+from .models import Contestant, ContestantImage, ContestantStage, Transactions, VoteEvent
 
 
 @receiver(post_save, sender=ContestantImage)
@@ -15,3 +20,85 @@ def resize_contestant_image(sender, instance, created, **kwargs):
             resized_img = img.resize((1024, 1024))
             # Save the resized image back to the same location
             resized_img.save(instance.image.path)
+
+
+@receiver(totals_changed)
+@receiver(post_save, sender=Contestant)
+@receiver(post_delete, sender=Contestant)
+@receiver(post_save, sender=ContestantStage)
+@receiver(post_delete, sender=ContestantStage)
+@receiver(post_delete, sender=ContestantImage)
+@receiver(m2m_changed, sender=Contestant.contestant_images.through)
+def mark_public_pages_stale(sender, **kwargs):
+    transaction.on_commit(stats.mark_stale)
+    transaction.on_commit(pagecache.invalidate)
+
+
+@receiver(m2m_changed, sender=Contestant.contestant_images.through)
+def sync_cover_image(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            instance.update_cover_image()
+    elif action == "pre_clear":
+        # the join rows, and so the affected contestants, are gone after the clear
+        instance._covered = list(Contestant.objects.filter(contestant_images=instance))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        contestants = instance._covered if action == "post_clear" else Contestant.objects.filter(pk__in=pk_set)
+        for contestant in contestants:
+            contestant.update_cover_image()
+
+
+@receiver(pre_delete, sender=ContestantImage)
+def remember_covered_contestants(sender, instance, **kwargs):
+    instance._covered = list(Contestant.objects.filter(contestant_images=instance))
+
+
+@receiver(post_delete, sender=ContestantImage)
+def drop_deleted_cover_image(sender, instance, **kwargs):
+    for contestant in instance._covered:
+        contestant.update_cover_image()
+
+
+@receiver(votes_adjusted)
+def adjust_leaderboard(sender, deltas, **kwargs):
+    leaderboard.add(deltas.items())
+
+
+@receiver(post_save, sender=Contestant)
+def add_to_leaderboard(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: leaderboard.add([(instance.pk, instance.number_of_vote or 0)]))
+
+
+@receiver(post_delete, sender=Contestant)
+def remove_from_leaderboard(sender, instance, **kwargs):
+    transaction.on_commit(lambda: leaderboard.remove(instance.pk))
+
+
+@receiver(post_delete, sender=Contestant)
+def remove_contestant_votes(sender, instance, **kwargs):
+    if instance.number_of_vote:
+        totals.add(votes=-instance.number_of_vote)
+
+
+@receiver(post_delete, sender=Transactions)
+def remove_settled_payment(sender, instance, **kwargs):
+    if instance.settled:
+        totals.add(amount_paid=-(instance.amount_paid or 0), transactions=-1)
+
+
+@receiver(post_save, sender=Transactions)
+def add_to_hourly_rollup(sender, instance, created, **kwargs):
+    if created:
+        rollups.add(instance)
+
+
+@receiver(pre_delete, sender=Transactions)
+def remember_transaction_votes(sender, instance, **kwargs):
+    # the vote event is detached from the transaction before post_delete
+    instance._votes = VoteEvent.objects.filter(transaction=instance).values_list("votes", flat=True).first() or 0
+
+
+@receiver(post_delete, sender=Transactions)
+def remove_from_hourly_rollup(sender, instance, **kwargs):
+    rollups.add(instance, sign=-1, votes=getattr(instance, "_votes", 0))
@@ -0,0 +1,53 @@
+"""Contestant standings for reporting: rank, votes, settled revenue and settled
+transaction count per contestant.
+
+They live in the ``users_contestant_standing`` materialized view (read through the
+unmanaged ``ContestantStanding`` model), which ``refresh`` rebuilds with
+``REFRESH MATERIALIZED VIEW CONCURRENTLY`` so readers are never blocked. The
+``refresh_standings`` command refreshes it once ``STANDINGS_REFRESH_INTERVAL``
+seconds have passed or ``STANDINGS_REFRESH_VOTES`` votes have been credited
+since the last refresh, whichever comes first.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from . import totals
+from .models import ContestantStanding
+
+LAST_REFRESH_KEY = "standings:last-refresh"
+
+
+def last_refresh():
+    """``{"at": timestamp, "votes": site vote total}`` of the last refresh, ``None`` if unknown."""
+    return cache.get(LAST_REFRESH_KEY)
+
+
+def refresh():
+    # read first: votes credited while the view refreshes count towards the next one
+    votes = totals.current().votes
+    with connection.cursor() as cursor:
+        cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {ContestantStanding._meta.db_table}")
+    cache.set(LAST_REFRESH_KEY, {"at": time.time(), "votes": votes}, timeout=None)
+
+
+def due():
+    last = last_refresh()
+    if last is None:
+        return True
+    return (
+        time.time() - last["at"] >= settings.STANDINGS_REFRESH_INTERVAL
+        or totals.current().votes - last["votes"] >= settings.STANDINGS_REFRESH_VOTES
+    )
+
+
+def refresh_if_due():
+    """Returns:
+        bool: ``True`` if the view was refreshed.
+    """
+    if not due():
+        return False
+    refresh()
+    return True
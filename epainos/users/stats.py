@@ -0,0 +1,132 @@
+"""Site-wide stats snapshot shared by the public pages.
+
+``snapshot`` returns the totals (read from ``totals``), counts, current stage and ordered contestant
+summaries (with their cover image) the home, contestant list and contestant
+details pages show, built in two queries and kept in the default cache.
+Crediting votes or editing a contestant only marks the snapshot stale (see
+``signals``); the next read rebuilds it, at most once every
+``SITE_STATS_DEBOUNCE`` seconds and by a single request, while the others keep
+reading the previous snapshot.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from helpers import pagecache
+
+from . import leaderboard, ledger
+from .models import Contestant, SiteTotals
+
+SNAPSHOT_KEY = "site-stats:snapshot"
+STALE_KEY = "site-stats:stale"
+REBUILD_LOCK_KEY = "site-stats:rebuild"
+LEADERBOARD_JSON_KEY = "site-stats:leaderboard-json:{generation}:{fields}:{limit}"
+
+LEADERBOARD_FIELDS = ("id", "contestant_id", "stage_name", "votes", "rank", "cover_image_url")
+
+_TOTALS_SQL = f"""
+    SELECT (SELECT SUM(amount_paid) FROM {SiteTotals._meta.db_table}),
+           (SELECT COALESCE(SUM(transactions), 0)::bigint FROM {SiteTotals._meta.db_table}),
+           (SELECT COALESCE(SUM(votes), 0)::bigint FROM {SiteTotals._meta.db_table}),
+           (SELECT COUNT(*) FROM {Contestant._meta.db_table}),
+           ({ledger.CURRENT_STAGE_SQL})
+"""
+
+
+@dataclass
+class ContestantSummary:
+    pk: str
+    contestant_id: str
+    name: str
+    stage_name: str
+    number_of_vote: int
+    cover_image_url: str = ""
+
+
+@dataclass
+class SiteStats:
+    total_amount_paid: object
+    transaction_count: int
+    total_vote: int
+    contestant_count: int
+    stage: str
+    contestants: list = field(default_factory=list)
+    built_at: float = field(default_factory=time.time)
+
+
+def build():
+    """Compute a fresh snapshot: one query for the totals, one for the contestants."""
+    with connection.cursor() as cursor:
+        cursor.execute(_TOTALS_SQL)
+        total_amount_paid, transaction_count, total_vote, contestant_count, stage = cursor.fetchone()
+
+    rows = ledger.leaderboard().values_list(
+        "pk", "contestant_id", "name", "stage_name", "number_of_vote", "cover_image_url"
+    )
+    contestants = [
+        ContestantSummary(str(pk), contestant_id, name, stage_name, votes or 0, cover_image_url)
+        for pk, contestant_id, name, stage_name, votes, cover_image_url in rows
+    ]
+    return SiteStats(total_amount_paid, transaction_count, total_vote, contestant_count, stage, contestants)
+
+
+def refresh():
+    stats = build()
+    cache.set(SNAPSHOT_KEY, stats, timeout=settings.SITE_STATS_MAX_AGE)
+    return stats
+
+
+def snapshot():
+    stats = cache.get(SNAPSHOT_KEY)
+    if stats is None:
+        return refresh()
+    if time.time() - stats.built_at >= settings.SITE_STATS_DEBOUNCE and cache.get(STALE_KEY):
+        # one request rebuilds, the others serve the stale snapshot meanwhile
+        if cache.add(REBUILD_LOCK_KEY, 1, timeout=30):
+            try:
+                # cleared first so changes made during the rebuild mark it stale again
+                cache.delete(STALE_KEY)
+                stats = refresh()
+            finally:
+                cache.delete(REBUILD_LOCK_KEY)
+    return stats
+
+
+def mark_stale():
+    cache.set(STALE_KEY, 1, timeout=None)
+
+
+def leaderboard_json(fields, limit=None):
+    """The top ``limit`` contestants (all for ``None``) with ``fields``, as JSON bytes.
+
+    Serialized once per page cache generation, i.e. until votes or contestants
+    change, and at most ``LEADERBOARD_API_MAX_AGE`` seconds so live Redis totals
+    show up too.
+
+    Returns:
+        tuple: ``(etag, body)``.
+    """
+    key = LEADERBOARD_JSON_KEY.format(generation=pagecache.generation(), fields=",".join(fields), limit=limit)
+    cached = cache.get(key)
+    if cached is None:
+        ranked = leaderboard.with_scores(snapshot().contestants)[:limit]
+        rows = []
+        for position, summary in enumerate(ranked, start=1):
+            row = {
+                "id": summary.pk,
+                "contestant_id": summary.contestant_id,
+                "stage_name": summary.stage_name,
+                "votes": summary.number_of_vote,
+                "rank": position,
+                "cover_image_url": summary.cover_image_url,
+            }
+            rows.append({name: row[name] for name in fields})
+        body = json.dumps({"contestants": rows}, separators=(",", ":")).encode()
+        cached = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+        cache.set(key, cached, timeout=settings.LEADERBOARD_API_MAX_AGE)
+    return cached
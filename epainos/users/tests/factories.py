@@ -2,9 +2,13 @@ from collections.abc import Sequence
 from typing import Any
 
 from factory import Faker
+from factory import Sequence as FactorySequence
+from factory import SubFactory
 from factory import post_generation
 from factory.django import DjangoModelFactory
 
+from epainos.users.models import Contestant
+from epainos.users.models import Transactions
 from epainos.users.models import User
 
 
@@ -38,3 +42,22 @@ class UserFactory(DjangoModelFactory[User]):
     class Meta:
         model = User
         django_get_or_create = ["email"]
+
+
+class ContestantFactory(DjangoModelFactory[Contestant]):
+    first_name = Faker("first_name")
+    last_name = Faker("last_name")
+    stage_name = Faker("user_name")
+    contestant_inspiration = Faker("word")
+
+    class Meta:
+        model = Contestant
+
+
+class TransactionsFactory(DjangoModelFactory[Transactions]):
+    contestant = SubFactory(ContestantFactory)
+    amount_paid = 500
+    payment_ref = FactorySequence(lambda n: f"EPAINOS_REF_{n:010d}")
+
+    class Meta:
+        model = Transactions
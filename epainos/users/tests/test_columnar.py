@@ -0,0 +1,123 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from epainos.users import columnar
+from epainos.users.models import Contestant, Transactions
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.views import transaction_list
+
+pytestmark = pytest.mark.django_db
+
+
+def read(data, export_format=columnar.PARQUET):
+    if export_format == columnar.PARQUET:
+        return pq.read_table(io.BytesIO(data))
+    return pa.ipc.open_stream(data).read_all()
+
+
+class TestExport:
+    def test_parquet_keeps_the_types(self):
+        tranx = TransactionsFactory(amount_paid=Decimal("12.50"))
+
+        table = read(b"".join(columnar.Export(Transactions.objects.all()).stream()))
+
+        assert table.schema.field("id").type == pa.uuid()
+        assert table.schema.field("contestant_id").type == pa.uuid()
+        assert table.schema.field("amount_paid").type == pa.decimal128(20, 2)
+        assert table.schema.field("created_date").type == pa.timestamp("us", tz="UTC")
+        assert table.schema.field("settled").type == pa.bool_()
+        row = table.to_pylist()[0]
+        assert row["id"] == tranx.pk
+        assert row["contestant_id"] == tranx.contestant_id
+        assert row["amount_paid"] == Decimal("12.50")
+        assert row["created_date"] == tranx.created_date
+
+    def test_arrow_stream(self):
+        contestant = ContestantFactory()
+
+        export = columnar.Export(Contestant.objects.all(), columnar.ARROW)
+        table = read(b"".join(export.stream()), columnar.ARROW)
+
+        assert table.num_rows == 1
+        assert table.column("number_of_vote").type == pa.int32()
+        assert table.column("id").to_pylist() == [contestant.pk]
+        assert "contestant_images" not in table.column_names
+
+    def test_a_batch_and_row_group_per_chunk(self, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        TransactionsFactory.create_batch(5, contestant=ContestantFactory())
+
+        export = columnar.Export(Transactions.objects.all())
+        chunks = list(export.stream())
+
+        assert len(chunks) >= 3
+        assert pq.ParquetFile(io.BytesIO(b"".join(chunks))).metadata.num_row_groups == 3
+
+    def test_incremental_export(self):
+        contestant = ContestantFactory()
+        old, new = TransactionsFactory.create_batch(2, contestant=contestant)
+        since = timezone.now() - timedelta(hours=1)
+        Transactions.objects.filter(pk=old.pk).update(created_date=since - timedelta(hours=1))
+
+        export = columnar.Export(Transactions.objects.all(), watermark_field="created_date", since=since)
+        table = read(b"".join(export.stream()))
+
+        assert table.column("id").to_pylist() == [new.pk]
+        assert export.watermark == Transactions.objects.get(pk=new.pk).created_date
+        assert table.schema.metadata[b"watermark"].decode() == export.watermark.isoformat()
+
+    def test_nothing_new_keeps_the_watermark(self):
+        since = timezone.now()
+        export = columnar.Export(Transactions.objects.all(), watermark_field="modified_date", since=since)
+        assert read(b"".join(export.stream())).num_rows == 0
+        assert export.watermark == since
+
+    def test_unknown_watermark_field(self):
+        with pytest.raises(ValueError):
+            columnar.Export(Transactions.objects.all(), watermark_field="voter_name")
+
+
+class TestCommand:
+    def test_incremental_runs(self, tmp_path):
+        contestant = ContestantFactory()
+        first = TransactionsFactory(contestant=contestant)
+        path = tmp_path / "first.parquet"
+        call_command("export_columnar", "transactions", str(path), watermark_field="created_date")
+        assert pq.read_table(path).num_rows == 1
+
+        second = TransactionsFactory(contestant=contestant)
+        Transactions.objects.filter(pk=second.pk).update(created_date=first.created_date + timedelta(seconds=1))
+        next_path = tmp_path / "second.parquet"
+        call_command("export_columnar", "transactions", str(next_path), since_file=str(path))
+
+        table = pq.read_table(next_path)
+        assert table.column("id").to_pylist() == [second.pk]
+        assert columnar.read_watermark(next_path)[0] == "created_date"
+
+    def test_arrow_file(self, tmp_path):
+        ContestantFactory()
+        path = tmp_path / "contestants.arrows"
+        call_command("export_columnar", "contestants", str(path), format="arrow", watermark_field="modified_date")
+        field, watermark = columnar.read_watermark(path)
+        assert field == "modified_date"
+        assert watermark == Contestant.objects.get().modified_date
+
+
+def test_dashboard_parquet(rf, user):
+    TransactionsFactory()
+    kept = TransactionsFactory()
+    request = rf.post(f"/?contestant={kept.contestant_id}", {"format": "parquet"}, secure=True)
+    request.user = user
+
+    response = transaction_list(request)
+
+    assert response["Content-Disposition"] == "attachment; filename=transactions.parquet"
+    table = read(b"".join(response.streaming_content))
+    assert table.column("id").to_pylist() == [kept.pk]
@@ -0,0 +1,105 @@
+import pytest
+import redis
+from django.conf import settings as django_settings
+
+from epainos.users import counters
+from epainos.users.models import VoteEvent
+from epainos.users.tests.factories import ContestantFactory
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.voting import credit_votes
+from helpers import pagecache
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def redis_counters(settings):
+    try:
+        redis.Redis.from_url(django_settings.REDIS_URL).ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": django_settings.REDIS_URL,
+            "KEY_PREFIX": "test",
+        },
+    }
+    settings.VOTE_COUNTER_BACKEND = "redis"
+    conn = counters.get_connection()
+    conn.delete(counters.FLUSHING_KEY, *counters.shard_keys())
+    yield
+    conn.delete(counters.FLUSHING_KEY, *counters.shard_keys())
+
+
+def test_credit_votes_goes_to_counters():
+    tranx = TransactionsFactory(amount_paid=300)
+
+    credit_votes(tranx.payment_ref, "successful")
+    credit_votes(tranx.payment_ref, "successful")
+
+    tranx.contestant.refresh_from_db()
+    assert tranx.contestant.number_of_vote == 0
+    assert counters.pending_votes()[str(tranx.contestant.pk)] == 3
+    assert counters.with_pending([tranx.contestant])[0].number_of_vote == 3
+
+
+def test_flush_folds_the_ledger_into_contestants():
+    first, second = ContestantFactory(), ContestantFactory(number_of_vote=10)
+    for _ in range(4):
+        credit_votes(TransactionsFactory(contestant=first, amount_paid=200).payment_ref, "successful")
+    credit_votes(TransactionsFactory(contestant=second, amount_paid=500).payment_ref, "successful")
+
+    assert counters.flush() == 13
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.number_of_vote == 8
+    assert second.number_of_vote == 15
+    assert not counters.pending_votes()
+    assert not VoteEvent.objects.filter(flushed=False).exists()
+    assert counters.flush() == 0
+
+
+def test_flush_invalidates_the_public_pages(django_capture_on_commit_callbacks):
+    tranx = TransactionsFactory(amount_paid=300)
+    with django_capture_on_commit_callbacks(execute=True):
+        credit_votes(tranx.payment_ref, "successful")
+    before = pagecache.generation()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        counters.flush()
+
+    assert pagecache.generation() > before
+
+
+def test_votes_missing_from_redis_are_still_flushed(monkeypatch):
+    tranx = TransactionsFactory(amount_paid=400)
+
+    def unavailable(contestant_id, votes):
+        raise redis.ConnectionError("redis down")
+
+    monkeypatch.setattr(counters, "incr", unavailable)
+    # the settlement commits even though the counters cannot be reached
+    assert credit_votes(tranx.payment_ref, "successful") == (tranx.contestant.pk, 4)
+    assert not counters.pending_votes()
+
+    assert counters.flush() == 4
+    tranx.contestant.refresh_from_db()
+    assert tranx.contestant.number_of_vote == 4
+
+
+def test_flush_after_crash_does_not_double_count():
+    tranx = TransactionsFactory(amount_paid=400)
+    credit_votes(tranx.payment_ref, "successful")
+    conn = counters.get_connection()
+    batch = counters.BATCH_KEY.format(batch="crashed")
+    shard = next(key for key in counters.shard_keys() if conn.exists(key))
+    conn.rename(shard, batch)
+    conn.sadd(counters.FLUSHING_KEY, batch)
+    # a flush died after setting the counters aside
+    assert counters.flush() == 4
+
+    assert counters.flush() == 0
+    tranx.contestant.refresh_from_db()
+    assert tranx.contestant.number_of_vote == 4
+    assert not conn.exists(batch)
@@ -0,0 +1,74 @@
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from epainos.users.forms import ContestantEditProfileForm
+from epainos.users.models import Contestant, ContestantImage
+from epainos.users.tests.factories import ContestantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_storage(settings, tmp_path):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": str(tmp_path)},
+        },
+    }
+
+
+def upload(name):
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class TestCoverImage:
+    def test_form_save_sets_newest_image(self):
+        contestant = ContestantFactory()
+        form = ContestantEditProfileForm(
+            {
+                "first_name": "Ada",
+                "last_name": "Obi",
+                "stage_name": "ada",
+                "contestant_inspiration": "music",
+                "contestant_videos": '["https://www.youtube.com/watch?v=6v2L2UGZJAM"]',
+            },
+            {"contestant_images": [upload("first.png"), upload("second.png")]},
+            instance=contestant,
+        )
+        assert form.is_valid(), form.errors
+        form.save()
+
+        contestant.refresh_from_db()
+        assert contestant.cover_image_url == contestant.contestant_images.first().image.url
+        assert contestant.cover_image_url.endswith("/contestant_images/second.png")
+
+    def test_cleared_when_image_deleted(self):
+        contestant = ContestantFactory()
+        image = ContestantImage.objects.create(image=upload("only.png"))
+        contestant.contestant_images.add(image)
+        contestant.refresh_from_db()
+        assert contestant.cover_image_url
+
+        image.delete()
+
+        contestant.refresh_from_db()
+        assert contestant.cover_image_url == ""
+
+    def test_leaderboard_has_covers_in_one_query(self):
+        for _ in range(5):
+            ContestantFactory().contestant_images.add(ContestantImage.objects.create(image=upload("cover.png")))
+
+        with CaptureQueriesContext(connection) as queries:
+            covers = [contestant.cover_image_url for contestant in Contestant.objects.leaderboard()]
+
+        assert len(queries) == 1
+        assert all(covers)
@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+import pytest
+from django.http import Http404, QueryDict
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from epainos.users import export_jobs
+from epainos.users.admin import TransactionsResource
+from epainos.users.models import ExportJob
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.views import export_job_download, export_job_status
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_storage(settings, tmp_path):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": str(tmp_path), "base_url": "/media/"},
+        },
+    }
+
+
+def rows_of(job):
+    with job.file.open("rb") as spreadsheet:
+        return list(load_workbook(spreadsheet, read_only=True).active.iter_rows(values_only=True))
+
+
+class TestRequestExport:
+    def test_writes_the_filtered_rows(self, user):
+        contestant = ContestantFactory()
+        kept = TransactionsFactory.create_batch(3, contestant=contestant)
+        TransactionsFactory()
+
+        job = export_jobs.request_export(ExportJob.TRANSACTIONS, QueryDict(f"contestant={contestant.pk}"), user)
+
+        job.refresh_from_db()
+        assert job.status == ExportJob.DONE
+        assert (job.rows_done, job.rows_total) == (3, 3)
+        assert job.requested_by == user
+        assert job.file.name.endswith(".xlsx")
+        rows = rows_of(job)
+        assert list(rows[0]) == TransactionsResource().get_export_headers()
+        assert sorted(row[0] for row in rows[1:]) == sorted(str(tranx.pk) for tranx in kept)
+
+    def test_progress_recorded_every_chunk(self, settings, monkeypatch):
+        settings.EXPORT_CHUNK_SIZE = 2
+        TransactionsFactory.create_batch(5)
+        job = ExportJob.objects.create(kind=ExportJob.TRANSACTIONS, params_hash="x")
+        seen = []
+        rows = export_jobs.export_rows
+
+        def watched(resource, queryset):
+            for row in rows(resource, queryset):
+                seen.append(ExportJob.objects.values_list("rows_done", "rows_total").get(pk=job.pk))
+                yield row
+
+        monkeypatch.setattr(export_jobs, "export_rows", watched)
+        export_jobs.run_export(job)
+
+        assert seen == [(0, 5), (0, 5), (2, 5), (2, 5), (4, 5)]
+        job.refresh_from_db()
+        assert job.rows_done == 5
+
+    def test_reuses_a_recent_job_with_the_same_filters(self):
+        first = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict("first_name=Ada&cursor=abc"))
+        again = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict("first_name=Ada"))
+        other = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict("first_name=Grace"))
+        assert again == first
+        assert other != first
+        assert ExportJob.objects.count() == 2
+
+    def test_regenerates_old_or_failed_jobs(self, settings):
+        first = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict(""))
+        ExportJob.objects.filter(pk=first.pk).update(
+            created_date=timezone.now() - timedelta(seconds=settings.EXPORT_JOB_REUSE_SECONDS + 1)
+        )
+        second = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict(""))
+        ExportJob.objects.filter(pk=second.pk).update(status=ExportJob.FAILED)
+        third = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict(""))
+        assert len({first.pk, second.pk, third.pk}) == 3
+
+    def test_queued_in_background(self, settings, django_capture_on_commit_callbacks, monkeypatch):
+        settings.EXPORTS_IN_BACKGROUND = True
+        queued = []
+        monkeypatch.setattr(export_jobs.export_queue, "enqueue", lambda payload, dedupe: queued.append(payload))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            job = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict(""))
+
+        assert job.status == ExportJob.PENDING
+        assert queued == [{"job": str(job.pk)}]
+        export_jobs.handle_export_job(queued[0])
+        job.refresh_from_db()
+        assert job.status == ExportJob.DONE
+
+    def test_handle_skips_claimed_jobs(self):
+        job = ExportJob.objects.create(kind=ExportJob.CONTESTANTS, params_hash="x", status=ExportJob.RUNNING)
+        export_jobs.handle_export_job({"job": str(job.pk)})
+        job.refresh_from_db()
+        assert job.status == ExportJob.RUNNING
+        assert not job.file
+
+    def test_failure_is_recorded(self, monkeypatch):
+        job = ExportJob.objects.create(kind=ExportJob.CONTESTANTS, params_hash="x")
+        monkeypatch.setattr(export_jobs, "write_xlsx", lambda job, path: 1 / 0)
+        export_jobs.run_export(job)
+        job.refresh_from_db()
+        assert job.status == ExportJob.FAILED
+        assert "ZeroDivisionError" in job.last_error
+
+
+class TestExportJobViews:
+    def test_status_and_download(self, rf, user):
+        job = export_jobs.request_export(ExportJob.CONTESTANTS, QueryDict(""))
+        request = rf.get("/", secure=True)
+        request.user = user
+
+        data = export_job_status(request, pk=job.pk)
+        assert data.status_code == 200
+        assert b'"status": "done"' in data.content
+        assert f"/exports/{job.pk}/download/".encode() in data.content
+
+        response = export_job_download(request, pk=job.pk)
+        assert response.status_code == 302
+        assert response.url == job.file.url
+
+    def test_no_download_before_done(self, rf, user):
+        job = ExportJob.objects.create(kind=ExportJob.CONTESTANTS, params_hash="x")
+        request = rf.get("/", secure=True)
+        request.user = user
+        assert b'"download_url": null' in export_job_status(request, pk=job.pk).content
+        with pytest.raises(Http404):
+            export_job_download(request, pk=job.pk)
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from epainos.users import exports
+from epainos.users.admin import ContestantResource, TransactionsResource
+from epainos.users.models import ExportJob, Transactions
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.views import contestant_list, transaction_list
+
+pytestmark = pytest.mark.django_db
+
+
+def export(rf, user, view, export_format, query=""):
+    request = rf.post(f"/dashboard/export/{query}", {"format": export_format}, secure=True)
+    request.user = user
+    return view(request)
+
+
+def content(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class TestTransactionExport:
+    def test_csv_streams_the_filtered_rows(self, rf, user):
+        settled = ContestantFactory()
+        TransactionsFactory.create_batch(3, contestant=settled, settled=True)
+        TransactionsFactory.create_batch(2, contestant=settled, settled=False)
+        TransactionsFactory(contestant=ContestantFactory(), settled=True)
+
+        response = export(rf, user, transaction_list, "csv", f"?contestant={settled.pk}&settled=true")
+
+        assert isinstance(response, StreamingHttpResponse)
+        assert response["Content-Type"] == "text/csv"
+        assert response["Content-Disposition"] == "attachment; filename=transactions.csv"
+        rows = list(csv.reader(io.StringIO(content(response))))
+        assert rows[0] == TransactionsResource().get_export_headers()
+        expected = Transactions.objects.filter(contestant=settled, settled=True)
+        assert sorted(row[0] for row in rows[1:]) == sorted(str(pk) for pk in expected.values_list("pk", flat=True))
+
+    def test_json_is_a_list_of_objects(self, rf, user):
+        transaction = TransactionsFactory()
+
+        response = export(rf, user, transaction_list, "json")
+
+        assert response["Content-Type"] == "application/json"
+        rows = json.loads(content(response))
+        assert [row["id"] for row in rows] == [str(transaction.pk)]
+        assert set(rows[0]) == set(TransactionsResource().get_export_headers())
+
+    def test_unknown_format_is_json(self, rf, user):
+        response = export(rf, user, transaction_list, "pdf")
+        assert response["Content-Disposition"] == "attachment; filename=transactions.json"
+        assert json.loads(content(response)) == []
+
+    def test_xlsx_becomes_an_export_job(self, rf, user, settings):
+        settings.EXPORTS_IN_BACKGROUND = True
+        kept = TransactionsFactory()
+
+        response = export(rf, user, transaction_list, "xlsx", f"?contestant={kept.contestant_id}")
+
+        job = ExportJob.objects.get()
+        assert response.status_code == 302
+        assert response.url == reverse("users:export_job", kwargs={"pk": job.pk})
+        assert job.params == {"contestant": [str(kept.contestant_id)]}
+
+
+class TestContestantExport:
+    def test_csv_streams_the_filtered_rows(self, rf, user):
+        kept = ContestantFactory(first_name="Ada")
+        ContestantFactory(first_name="Grace")
+
+        response = export(rf, user, contestant_list, "csv", "?first_name=Ada")
+
+        rows = list(csv.reader(io.StringIO(content(response))))
+        assert rows[0] == ContestantResource().get_export_headers()
+        assert [row[rows[0].index("id")] for row in rows[1:]] == [str(kept.pk)]
+
+
+class TestStreaming:
+    def test_header_before_any_query(self, settings):
+        TransactionsFactory()
+        lines = exports.csv_lines(TransactionsResource(), Transactions.objects.all())
+        with CaptureQueriesContext(connection) as queries:
+            header = next(lines)
+        assert header.rstrip("\r\n").split(",") == TransactionsResource().get_export_headers()
+        assert len(queries) == 0
+
+    def test_rows_are_fetched_in_chunks(self, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        contestant = ContestantFactory()
+        TransactionsFactory.create_batch(5, contestant=contestant)
+
+        lines = list(exports.csv_lines(TransactionsResource(), Transactions.objects.all()))
+
+        # the header, then the rows in chunks of two
+        assert [line.count("\n") for line in lines] == [1, 2, 2, 1]
+
+    def test_related_rows_loaded_with_the_chunk(self, settings):
+        settings.EXPORT_CHUNK_SIZE = 100
+        TransactionsFactory.create_batch(4)
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(exports.export_rows(TransactionsResource(), Transactions.objects.all()))
+        assert len(rows) == 4
+        assert len(queries) == 1
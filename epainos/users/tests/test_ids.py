@@ -0,0 +1,92 @@
+import pytest
+import tablib
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from epainos.users import leaderboard
+from epainos.users.admin import ContestantResource
+from epainos.users.ids import CONTESTANT_ID, PAYMENT_REF, IdSpace
+from epainos.users.models import Contestant, Transactions
+from epainos.users.tests.factories import ContestantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def contestant_ids(settings):
+    settings.ID_BLOCK_SIZE = 10
+    return IdSpace("users_contestant_id_block_seq", "users.Contestant", "contestant_id")
+
+
+class TestIdSpace:
+    def test_ids_are_unique_ten_digits(self, contestant_ids):
+        ids = contestant_ids.allocate_many(250)
+        assert len(set(ids)) == 250
+        assert all(len(value) == 10 and value.isdigit() for value in ids)
+
+    def test_one_block_per_round_trip(self, contestant_ids):
+        with CaptureQueriesContext(connection) as queries:
+            contestant_ids.allocate_many(25)
+            contestant_ids.allocate_many(5)
+        # one nextval and one collision check for all three blocks, then served from memory
+        assert len(queries) == 2
+
+    def test_sortable_ids_follow_allocation_order(self):
+        refs = PAYMENT_REF.allocate_many(5)
+        assert refs == sorted(refs)
+        assert all(ref.startswith("EPAINOS_REF_") for ref in refs)
+
+    def test_payment_refs_cannot_be_guessed(self):
+        first, second = PAYMENT_REF.allocate_many(2)
+        number, secret = first.removeprefix("EPAINOS_REF_").split("_")
+        assert len(number) == 10
+        assert len(secret) == 16
+        # the next reference is not the next number with the same random part
+        assert second != f"EPAINOS_REF_{int(number) + 1:010d}_{secret}"
+        assert second.split("_")[-1] != secret
+
+    def test_skips_ids_already_taken(self, contestant_ids, settings):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END FROM users_contestant_id_block_seq")
+            (next_block,) = cursor.fetchone()
+        taken = contestant_ids.format(next_block * settings.ID_BLOCK_SIZE)
+        ContestantFactory(contestant_id=taken)
+
+        assert taken not in contestant_ids.allocate_many(settings.ID_BLOCK_SIZE)
+
+
+class TestAssignment:
+    def test_save_allocates_contestant_id(self):
+        contestant = ContestantFactory()
+        assert len(contestant.contestant_id) == 10
+
+    def test_bulk_create(self):
+        contestants = CONTESTANT_ID.assign([Contestant(first_name=f"First {n}") for n in range(3)])
+        Contestant.objects.bulk_create(contestants)
+        assert Contestant.objects.exclude(contestant_id=None).count() == 3
+
+    def test_import_saves_every_contestant(self, django_capture_on_commit_callbacks, monkeypatch):
+        added = []
+        monkeypatch.setattr(leaderboard, "add", lambda entries: added.extend(entries))
+        dataset = tablib.Dataset(headers=["first_name", "last_name"])
+        dataset.append(["Ada", "Obi"])
+        dataset.append(["Grace", "Eze"])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = ContestantResource().import_data(dataset)
+
+        assert not result.has_errors()
+        contestants = Contestant.objects.order_by("first_name")
+        assert [contestant.name for contestant in contestants] == ["Ada Obi", "Grace Eze"]
+        assert all(len(contestant.contestant_id) == 10 for contestant in contestants)
+        assert sorted(pk for pk, _ in added) == sorted(contestant.pk for contestant in contestants)
+
+    def test_vote_uses_allocated_payment_ref(self, client):
+        contestant = ContestantFactory()
+        response = client.post(
+            reverse("users:vote_submit"), {"contestant_id": contestant.pk, "number_of_vote": 2}, secure=True
+        )
+        tx_ref = response.json()["tx_ref"]
+        assert tx_ref.startswith("EPAINOS_REF_")
+        assert Transactions.objects.get(payment_ref=tx_ref).contestant == contestant
@@ -0,0 +1,113 @@
+"""The vote and payment hot paths must be served by their indexes at scale."""
+import importlib
+import json
+
+import pytest
+from django.db import connection, utils
+from django.db.models import Sum
+
+from epainos.users import ledger
+from epainos.users.models import Contestant
+from epainos.users.models import Transactions
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+TRANSACTIONS = 1_000_000
+CONTESTANTS = 50_000
+
+
+@pytest.fixture
+def hot_tables():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Contestant._meta.db_table}
+                   (id, created_date, modified_date, contestant_id, name, number_of_vote, contestant_videos)
+            SELECT gen_random_uuid(), NOW(), NOW(), LPAD(i::text, 10, '0'), '', i %% 1000, '[]'
+              FROM generate_series(1, %s) AS i
+            """,
+            [CONTESTANTS],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {Transactions._meta.db_table}
+                   (id, created_date, modified_date, payment_ref, amount_paid, settled)
+            SELECT gen_random_uuid(), NOW() - i * INTERVAL '1 second', NOW(),
+                   'EPAINOS_REF_' || LPAD(i::text, 10, '0'), 100 * (i %% 50 + 1), i %% 5 = 0
+              FROM generate_series(1, %s) AS i
+            """,
+            [TRANSACTIONS],
+        )
+        cursor.execute(f"VACUUM ANALYZE {Contestant._meta.db_table}")
+        cursor.execute(f"VACUUM ANALYZE {Transactions._meta.db_table}")
+
+
+def used_indexes(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    names = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return names
+
+
+def queryset_indexes(queryset):
+    return used_indexes(*queryset.query.sql_with_params())
+
+
+def test_hot_queries_use_their_indexes(hot_tables):
+    # PaymentVerify / credit_votes
+    assert "users_transactions_payment_ref_uniq" in queryset_indexes(
+        Transactions.objects.filter(payment_ref="EPAINOS_REF_0000500000")
+    )
+    # Contestant.save collision probe
+    assert "users_contestant_contestant_id_uniq" in queryset_indexes(
+        Contestant.objects.filter(contestant_id="0000012345")
+    )
+    # public leaderboards
+    assert "users_contestant_rank_idx" in queryset_indexes(ledger.leaderboard()[:10])
+    # dashboard settled revenue and latest settled payments
+    settled = Transactions.objects.filter(settled=True)
+    amounts_sql, params = settled.order_by().values("amount_paid").query.sql_with_params()
+    assert "users_tranx_settled_amount_idx" in used_indexes(
+        f"SELECT SUM(amount_paid) FROM ({amounts_sql}) AS settled", params
+    )
+    assert "users_tranx_settled_amount_idx" in queryset_indexes(settled[:10])
+    assert settled.aggregate(total=Sum("amount_paid"))["total"] > 0
+
+
+@pytest.fixture
+def duplicated_table(monkeypatch):
+    """A table with a duplicated value, standing in for the ones 0007 constrains."""
+    migration = importlib.import_module("epainos.users.migrations.0007_hot_path_unique_constraints")
+    monkeypatch.setattr(migration, "CONSTRAINTS", [("users_probe", "value", "users_probe_value_uniq")])
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TABLE users_probe (value text)")
+        cursor.execute("INSERT INTO users_probe VALUES ('a'), ('a'), ('b'), (NULL), (NULL)")
+    yield migration
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE users_probe")
+
+
+def test_unique_migration_stops_on_duplicates(duplicated_table):
+    with connection.schema_editor() as schema_editor, pytest.raises(RuntimeError, match="'a' \\(2 rows\\)"):
+        duplicated_table.check_duplicates(None, schema_editor)
+
+
+def test_unique_migration_drops_invalid_index(duplicated_table):
+    with connection.cursor() as cursor:
+        with pytest.raises(utils.IntegrityError):
+            cursor.execute('CREATE UNIQUE INDEX CONCURRENTLY "users_probe_value_uniq" ON users_probe (value)')
+        cursor.execute("DELETE FROM users_probe WHERE value = 'a'")
+
+        with connection.schema_editor(atomic=False) as schema_editor:
+            duplicated_table.drop_invalid_indexes(None, schema_editor)
+
+        cursor.execute("SELECT 1 FROM pg_class WHERE relname = 'users_probe_value_uniq'")
+        assert cursor.fetchone() is None
@@ -0,0 +1,98 @@
+import pytest
+import redis
+from django.conf import settings as django_settings
+from django.urls import reverse
+
+from epainos.users import leaderboard
+from epainos.users.admin import reset_count
+from epainos.users.models import Contestant
+from epainos.users.tests.factories import ContestantFactory
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.voting import credit_votes
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def redis_leaderboard(settings):
+    try:
+        redis.Redis.from_url(django_settings.REDIS_URL).ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    settings.CACHES = {
+        "default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": django_settings.REDIS_URL},
+    }
+    settings.LEADERBOARD_BACKEND = "redis"
+    leaderboard.get_connection().delete(leaderboard.LEADERBOARD_KEY)
+    yield
+    leaderboard.get_connection().delete(leaderboard.LEADERBOARD_KEY)
+
+
+@pytest.fixture
+def ranked():
+    """Five contestants with 50, 40, 30, 20 and 10 votes, best first."""
+    return [ContestantFactory(number_of_vote=votes) for votes in (50, 40, 30, 20, 10)]
+
+
+def ids(entries):
+    return [contestant_id for _, contestant_id, _ in entries]
+
+
+@pytest.mark.parametrize("backend", ["database", "redis"])
+class TestQueries:
+    @pytest.fixture(autouse=True)
+    def backend_setup(self, backend, request, ranked):
+        if backend == "redis":
+            request.getfixturevalue("redis_leaderboard")
+            leaderboard.rebuild()
+
+    def test_top(self, ranked):
+        assert leaderboard.top(3) == [(n + 1, str(c.pk), c.number_of_vote) for n, c in enumerate(ranked[:3])]
+        assert ids(leaderboard.top(2, offset=3)) == [str(c.pk) for c in ranked[3:]]
+
+    def test_rank_and_around(self, ranked):
+        assert leaderboard.rank(ranked[2].pk) == 3
+        assert ids(leaderboard.around(ranked[2].pk, radius=1)) == [str(c.pk) for c in ranked[1:4]]
+        assert ids(leaderboard.around(ranked[0].pk, radius=1)) == [str(c.pk) for c in ranked[:2]]
+
+
+class TestRedisLeaderboard:
+    def test_credit_moves_contestant_up(self, redis_leaderboard, ranked, django_capture_on_commit_callbacks):
+        leaderboard.rebuild()
+        tranx = TransactionsFactory(contestant=ranked[4], amount_paid=4500)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            credit_votes(tranx.payment_ref, "successful")
+
+        assert leaderboard.rank(ranked[4].pk) == 1
+        assert leaderboard.top(1) == [(1, str(ranked[4].pk), 55)]
+
+    def test_new_contestant_and_reset(self, redis_leaderboard, ranked, rf, django_capture_on_commit_callbacks):
+        leaderboard.rebuild()
+        with django_capture_on_commit_callbacks(execute=True):
+            newcomer = ContestantFactory()
+        assert leaderboard.rank(newcomer.pk) == 6
+
+        with django_capture_on_commit_callbacks(execute=True):
+            reset_count(None, rf.get("/"), Contestant.objects.filter(pk=ranked[0].pk))
+        assert leaderboard.top(1)[0][1] == str(ranked[1].pk)
+
+    def test_rebuild_keeps_votes_added_while_it_reads(self, redis_leaderboard, ranked, monkeypatch):
+        read = leaderboard._scores
+
+        def read_then_vote():
+            scores = read()
+            leaderboard.add([(ranked[4].pk, 100)])
+            return scores
+
+        monkeypatch.setattr(leaderboard, "_scores", read_then_vote)
+
+        assert leaderboard.rebuild() == 5
+        assert leaderboard.top(1) == [(1, str(ranked[4].pk), 110)]
+        conn = leaderboard.get_connection()
+        assert not conn.exists(leaderboard.JOURNAL_KEY, leaderboard.REBUILDING_KEY, leaderboard.REBUILD_KEY)
+
+    def test_details_rank(self, redis_leaderboard, ranked, admin_client):
+        leaderboard.rebuild()
+        response = admin_client.get(reverse("contestant_view", args=[ranked[1].pk]), secure=True)
+        assert response.context["rank"] == 2
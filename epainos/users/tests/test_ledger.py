@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+
+from epainos.users import ledger
+from epainos.users.models import Contestant
+from epainos.users.models import ContestantStage
+from epainos.users.models import ContestantVoteTotal
+from epainos.users.models import VoteEvent
+from epainos.users.tests.factories import ContestantFactory
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.voting import credit_votes
+
+pytestmark = pytest.mark.django_db
+
+
+def test_credit_votes_records_event_and_total():
+    ContestantStage.objects.create(stage="semi final")
+    tranx = TransactionsFactory(amount_paid=700)
+
+    credit_votes(tranx.payment_ref, "successful")
+    credit_votes(tranx.payment_ref, "successful")
+
+    event = VoteEvent.objects.get()
+    assert (event.contestant, event.transaction, event.votes, event.stage) == (
+        tranx.contestant, tranx, 7, "semi final",
+    )
+    assert ContestantVoteTotal.objects.get(contestant=tranx.contestant).votes == 7
+
+
+def test_leaderboard_orders_by_total():
+    low, high = TransactionsFactory(amount_paid=100), TransactionsFactory(amount_paid=900)
+    idle = ContestantFactory()
+    for tranx in (low, high):
+        credit_votes(tranx.payment_ref, "successful")
+
+    assert list(ledger.leaderboard()) == [high.contestant, low.contestant, idle]
+
+
+def test_adjust_and_rebuild_totals():
+    tranx = TransactionsFactory(amount_paid=400)
+    credit_votes(tranx.payment_ref, "successful")
+    ledger.adjust(Contestant.objects.filter(pk=tranx.contestant.pk), lambda contestant: -1)
+    # a hand edit the rebuild has to undo
+    Contestant.objects.update(number_of_vote=1000)
+    ContestantVoteTotal.objects.update(votes=1000)
+
+    assert ledger.rebuild_totals() == {str(tranx.contestant.pk): 3}
+    tranx.contestant.refresh_from_db()
+    assert tranx.contestant.number_of_vote == 3
+    assert tranx.contestant.vote_total.votes == 3
+
+
+def test_rebuild_totals_locks_out_writers(monkeypatch):
+    repair = ledger.site_totals.repair
+    locked = []
+
+    def check_locks():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relation::regclass::text FROM pg_locks WHERE pid = pg_backend_pid() AND mode = 'ExclusiveLock'"
+            )
+            locked.extend(table for table, in cursor.fetchall())
+        return repair()
+
+    monkeypatch.setattr(ledger.site_totals, "repair", check_locks)
+    ledger.rebuild_totals()
+
+    assert {VoteEvent._meta.db_table, ContestantVoteTotal._meta.db_table, Contestant._meta.db_table} <= set(locked)
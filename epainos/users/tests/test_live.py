@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+import redis
+from django.conf import settings as django_settings
+from django.urls import reverse
+
+from epainos.users import leaderboard, live
+from epainos.users.tests.factories import ContestantFactory
+
+
+@pytest.fixture
+def redis_leaderboard(settings):
+    try:
+        redis.Redis.from_url(django_settings.REDIS_URL).ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    settings.CACHES = {
+        "default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": django_settings.REDIS_URL},
+    }
+    settings.LEADERBOARD_BACKEND = "redis"
+    settings.LIVE_LEADERBOARD_INTERVAL_MS = 200
+    leaderboard.get_connection().delete(leaderboard.LEADERBOARD_KEY)
+    yield
+    leaderboard.get_connection().delete(leaderboard.LEADERBOARD_KEY)
+
+
+def parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_updates_are_coalesced(redis_leaderboard):
+    async def scenario():
+        events = live.stream()
+        assert await anext(events) == "retry: 3000\n\n"
+        # the first read subscribes; give the subscription a moment to reach Redis
+        first = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(leaderboard.add, [("a", 5), ("b", 3)])
+        await asyncio.to_thread(leaderboard.add, [("b", 4)])
+        message = await asyncio.wait_for(first, timeout=2)
+        await events.aclose()
+        return message
+
+    event, updates = parse(asyncio.run(scenario()))
+    assert event == "leaderboard"
+    assert updates == [{"contestant": "b", "votes": 7, "rank": 1}, {"contestant": "a", "votes": 5, "rank": 2}]
+    assert not live.broadcaster.subscribers
+
+
+def test_subscription_is_retried(redis_leaderboard, monkeypatch):
+    from_url = live.aioredis.from_url
+    attempts = []
+
+    def flaky_from_url(url):
+        attempts.append(url)
+        if len(attempts) == 1:
+            return from_url("redis://127.0.0.1:1/0")
+        return from_url(url)
+
+    monkeypatch.setattr(live.aioredis, "from_url", flaky_from_url)
+    monkeypatch.setattr(live, "RETRY_DELAY", 0.01)
+
+    async def scenario():
+        events = live.stream()
+        await anext(events)
+        first = asyncio.ensure_future(anext(events))
+        while len(attempts) < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(leaderboard.add, [("a", 2)])
+        message = await asyncio.wait_for(first, timeout=2)
+        await events.aclose()
+        return message
+
+    assert parse(asyncio.run(scenario())) == ("leaderboard", [{"contestant": "a", "votes": 2, "rank": 1}])
+
+
+def test_keepalive(redis_leaderboard, settings):
+    settings.LIVE_LEADERBOARD_KEEPALIVE = 0.1
+
+    async def scenario():
+        events = live.stream()
+        await anext(events)
+        message = await anext(events)
+        await events.aclose()
+        return message
+
+    assert asyncio.run(scenario()) == ": keepalive\n\n"
+
+
+@pytest.mark.parametrize("page", ["home", "home_contestant_list"])
+def test_grids_listen_to_the_stream(db, client, redis_leaderboard, page):
+    contestant = ContestantFactory(number_of_vote=4)
+    leaderboard.rebuild()
+    response = client.get(reverse(page), secure=True)
+    content = response.content.decode()
+    assert f'data-stream-url="{reverse("users:leaderboard_stream")}"' in content
+    assert f'data-contestant="{contestant.pk}"' in content
+
+
+def test_grids_skip_the_stream_without_redis_leaderboard(db, client, settings):
+    settings.LEADERBOARD_BACKEND = "database"
+    ContestantFactory()
+    assert b"live-leaderboard.js" not in client.get(reverse("home"), secure=True).content
+
+
+def test_stream_needs_redis_leaderboard(client, settings):
+    settings.LEADERBOARD_BACKEND = "database"
+    response = client.get(reverse("users:leaderboard_stream"), secure=True)
+    assert response.status_code == 404
@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from epainos.users import outbox, verification
+from epainos.users.models import OutboxEmail
+from epainos.users.tests.factories import TransactionsFactory
+from helpers.payment import FlutterWave
+from helpers.queue import RetryJob
+
+pytestmark = pytest.mark.django_db
+
+
+class FailingBackend(BaseEmailBackend):
+    """An email backend whose every send fails."""
+
+    def send_messages(self, messages):
+        raise ConnectionError("provider down")
+
+
+class UnreachableBackend(BaseEmailBackend):
+    """An email backend that cannot connect."""
+
+    def open(self):
+        raise ConnectionRefusedError("cannot connect")
+
+    def send_messages(self, messages):
+        raise AssertionError("sent without a connection")
+
+
+@pytest.fixture
+def failing_backend(settings):
+    settings.EMAIL_BACKEND = f"{__name__}.FailingBackend"
+
+
+class TestSendBatch:
+    def test_queue_email_sends_nothing(self):
+        outbox.queue_email("Hello", "Body", ["voter@example.com"])
+        assert mail.outbox == []
+        assert OutboxEmail.objects.get().status == OutboxEmail.PENDING
+
+    def test_sends_due_emails(self):
+        for n in range(3):
+            outbox.queue_email(f"Hello {n}", "Body", ["voter@example.com"])
+        later = outbox.queue_email("Later", "Body", ["voter@example.com"])
+        OutboxEmail.objects.filter(pk=later.pk).update(next_attempt_date=timezone.now() + timedelta(hours=1))
+
+        assert outbox.send_batch(10) == (3, 0)
+
+        assert sorted(message.subject for message in mail.outbox) == ["Hello 0", "Hello 1", "Hello 2"]
+        assert OutboxEmail.objects.filter(status=OutboxEmail.SENT).count() == 3
+        assert outbox.send_batch(10) == (0, 0)
+
+    def test_per_minute_cap(self, settings):
+        settings.EMAIL_OUTBOX_PER_MINUTE = 2
+        for _ in range(3):
+            outbox.queue_email("Hello", "Body", ["voter@example.com"])
+
+        assert outbox.send_batch(10) == (2, 0)
+        assert outbox.send_batch(10) == (0, 0)
+        assert len(mail.outbox) == 2
+
+    def test_failures_are_retried_then_dead_lettered(self, settings, failing_backend):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        email = outbox.queue_email("Hello", "Body", ["voter@example.com"])
+
+        assert outbox.send_batch(10) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_date > timezone.now()
+        assert "provider down" in email.last_error
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_date=timezone.now())
+        assert outbox.send_batch(10) == (0, 1)
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.DEAD
+
+        assert outbox.requeue(OutboxEmail.objects.all()) == 1
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (OutboxEmail.PENDING, 0)
+
+    def test_connection_failure_counts_as_an_attempt(self, settings):
+        settings.EMAIL_BACKEND = f"{__name__}.UnreachableBackend"
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 1
+        emails = [outbox.queue_email("Hello", "Body", ["voter@example.com"]) for _ in range(2)]
+
+        assert outbox.send_batch(10) == (0, 2)
+
+        for email in emails:
+            email.refresh_from_db()
+            assert (email.status, email.attempts) == (OutboxEmail.DEAD, 1)
+            assert "cannot connect" in email.last_error
+
+    def test_claimed_emails_are_not_due(self, monkeypatch):
+        email = outbox.queue_email("Hello", "Body", ["voter@example.com"])
+        claimed = []
+
+        def send(message):
+            claimed.append(OutboxEmail.objects.get(pk=email.pk).next_attempt_date)
+            # another sender finds nothing due meanwhile
+            assert outbox._claim(10) == []
+
+        monkeypatch.setattr("django.core.mail.EmailMessage.send", send)
+        assert outbox.send_batch(10) == (1, 0)
+        assert claimed[0] > timezone.now()
+
+
+class TestPaymentNotifications:
+    @pytest.fixture
+    def flutterwave(self, monkeypatch):
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return {"status": "success", "data": {"status": "pending"}}
+
+        monkeypatch.setattr(FlutterWave.session, "get", lambda *args, **kwargs: Response())
+
+    def test_api_call_queues_nothing(self, flutterwave):
+        assert FlutterWave().verify_payment_flutterwave("EPAINOS_REF_1") == ("success", {"status": "pending"})
+        assert not OutboxEmail.objects.exists()
+
+    def test_verification_queues_its_email_when_configured(self, flutterwave, settings):
+        settings.VERIFICATION_EMAIL_RECIPIENTS = ["payments@example.com"]
+        tranx = TransactionsFactory()
+
+        with pytest.raises(RetryJob):
+            verification.verify_payment(tranx.payment_ref)
+
+        assert mail.outbox == []
+        assert OutboxEmail.objects.get().recipients == ["payments@example.com"]
@@ -0,0 +1,128 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+
+from epainos.users.tests.factories import ContestantFactory
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.voting import credit_votes
+from helpers import pagecache
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def page_cache(settings):
+    settings.PAGE_CACHE_ENABLED = True
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def get(client, url):
+    return client.get(url, secure=True)
+
+
+class TestPageCache:
+    def test_hit_after_miss(self, client):
+        url = reverse("home")
+        assert get(client, url)["X-Page-Cache"] == "miss"
+        assert get(client, url)["X-Page-Cache"] == "hit"
+        assert pagecache.counts() == {"hit": 1, "miss": 1, "stale": 0, "bypass": 0}
+
+    def test_keyed_on_the_params_the_view_reads(self, client):
+        url = reverse("home_contestant_list")
+        get(client, url)
+        response = get(client, f"{url}?utm_source=mail&_=123")
+        assert response["X-Page-Cache"] == "hit"
+        assert b"utm_source" not in response.content
+        # the cursor is passed on
+        assert get(client, f"{url}?cursor=bad").status_code == 404
+
+    def test_signed_in_users_bypass(self, admin_client):
+        response = get(admin_client, reverse("policy_page"))
+        assert "X-Page-Cache" not in response
+        assert pagecache.counts()["bypass"] == 1
+
+    def test_contestant_edit_invalidates(self, client, django_capture_on_commit_callbacks):
+        url = reverse("home_contestant_list")
+        get(client, url)
+        with django_capture_on_commit_callbacks(execute=True):
+            ContestantFactory(stage_name="newcomer")
+        response = get(client, url)
+        assert response["X-Page-Cache"] == "miss"
+        assert b"Newcomer" in response.content
+
+    def test_vote_credit_invalidates(self, client, django_capture_on_commit_callbacks):
+        tranx = TransactionsFactory(amount_paid=500)
+        url = reverse("contestant_view", args=[tranx.contestant.pk])
+        get(client, url)
+        with django_capture_on_commit_callbacks(execute=True):
+            credit_votes(tranx.payment_ref, "successful")
+        assert get(client, url)["X-Page-Cache"] == "miss"
+
+    def test_stale_served_while_another_request_renders(self, client):
+        url = reverse("home")
+        response = get(client, url)
+        pagecache.invalidate()
+        # another worker holds the rebuild lock
+        _, lock = pagecache.cache_keys(url, response.wsgi_request.LANGUAGE_CODE)
+        cache.add(lock, 1)
+        assert get(client, url)["X-Page-Cache"] == "stale"
+        cache.delete(lock)
+        assert get(client, url)["X-Page-Cache"] == "miss"
+        assert get(client, url)["X-Page-Cache"] == "hit"
+
+    def test_cached_page_gets_visitor_csrf_token(self, client, settings):
+        contestant = ContestantFactory()
+        url = reverse("contestant_view", args=[contestant.pk])
+        get(client, url)
+        response = get(client, url)
+        assert response["X-Page-Cache"] == "hit"
+        assert pagecache.CSRF_PLACEHOLDER not in response.content
+        assert b'name="csrfmiddlewaretoken" value="' in response.content
+        assert settings.CSRF_COOKIE_NAME in response.cookies
+
+    def test_stats_command(self, client, capsys):
+        get(client, reverse("home"))
+        call_command("page_cache_stats")
+        assert "miss: 1 (100.0%)" in capsys.readouterr().out
+
+
+class TestConditionalGet:
+    def test_not_modified(self, client, settings):
+        settings.PAGE_CACHE_ENABLED = False
+        contestant = ContestantFactory()
+        url = reverse("contestant_view", args=[contestant.pk])
+        response = get(client, url)
+        assert response.status_code == 200
+        # the page embeds the visitor's CSRF token, shared caches must not keep it
+        assert "private" in response["Cache-Control"]
+        assert "s-maxage" not in response["Cache-Control"]
+
+        response = client.get(url, secure=True, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 304
+        assert "private" in response["Cache-Control"]
+
+    def test_changes_invalidate_validators(self, client, django_capture_on_commit_callbacks):
+        tranx = TransactionsFactory(amount_paid=500)
+        url = reverse("contestant_view", args=[tranx.contestant.pk])
+        first = get(client, url)
+        with django_capture_on_commit_callbacks(execute=True):
+            credit_votes(tranx.payment_ref, "successful")
+        response = client.get(
+            url, secure=True, HTTP_IF_NONE_MATCH=first["ETag"], HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        assert response.status_code == 200
+        assert response["ETag"] != first["ETag"]
+
+    def test_signed_in_users_get_their_own_etag(self, client, admin_client):
+        contestant = ContestantFactory()
+        url = reverse("contestant_view", args=[contestant.pk])
+        anonymous = get(client, url)
+        response = admin_client.get(url, secure=True, HTTP_IF_NONE_MATCH=anonymous["ETag"])
+        assert response.status_code == 200
+        assert "private" in response["Cache-Control"]
+
+    def test_unknown_contestant(self, client):
+        assert get(client, reverse("contestant_view", args=["not-a-uuid"])).status_code == 404
@@ -0,0 +1,127 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.http import Http404
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from epainos.users.models import Contestant, Transactions
+from epainos.users.tests.factories import ContestantFactory
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.views import TransactionList, transaction_list
+from helpers.pagination import KeysetPaginator, encode_cursor
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def transactions():
+    """Seven transactions, several sharing a created_date, newest first."""
+    contestant = ContestantFactory()
+    now = timezone.now()
+    tranx = TransactionsFactory.create_batch(7, contestant=contestant)
+    for index, row in enumerate(tranx):
+        Transactions.objects.filter(pk=row.pk).update(created_date=now - timedelta(minutes=index // 3))
+    return list(Transactions.objects.order_by("-created_date", "-id"))
+
+
+def walk(paginator):
+    pages, page = [], paginator.page()
+    pages.append(list(page))
+    while page.has_next():
+        page = paginator.page(page.next_cursor)
+        pages.append(list(page))
+    return pages, page
+
+
+class TestKeysetPaginator:
+    def test_walks_forward_and_back(self, transactions):
+        paginator = KeysetPaginator(Transactions.objects.all(), 3, ("-created_date", "-id"))
+        pages, last = walk(paginator)
+        assert pages == [transactions[:3], transactions[3:6], transactions[6:]]
+        assert not last.has_next()
+
+        previous = paginator.page(last.previous_cursor)
+        assert list(previous) == transactions[3:6]
+        first = paginator.page(previous.previous_cursor)
+        assert list(first) == transactions[:3]
+        assert not first.has_previous() and first.has_next()
+
+    def test_one_bounded_query_per_page(self, transactions):
+        paginator = KeysetPaginator(Transactions.objects.all(), 3, ("-created_date", "-id"))
+        cursor = paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            list(paginator.page(cursor))
+        assert len(queries) == 1
+        assert "OFFSET" not in queries[0]["sql"]
+
+    def test_nullable_key(self):
+        contestants = [ContestantFactory(number_of_vote=votes) for votes in (5, 3, 3, 0)]
+        Contestant.objects.filter(pk=contestants[3].pk).update(number_of_vote=None)
+        expected = list(Contestant.objects.order_by("-number_of_vote", "id"))
+        paginator = KeysetPaginator(Contestant.objects.all(), 1, ("-number_of_vote", "id"))
+        pages, last = walk(paginator)
+        assert [page[0] for page in pages] == expected
+
+        backwards = []
+        page = last
+        while page.has_previous():
+            page = paginator.page(page.previous_cursor)
+            backwards.insert(0, page.object_list[0])
+        assert backwards == expected[:-1]
+
+    def test_votes_moving_do_not_repeat_rows(self):
+        contestants = [ContestantFactory(number_of_vote=votes) for votes in (50, 40, 30, 20)]
+        paginator = KeysetPaginator(Contestant.objects.all(), 2, ("-number_of_vote", "id"))
+        first = paginator.page()
+        Contestant.objects.filter(pk=contestants[0].pk).update(number_of_vote=10)
+        second = paginator.page(first.next_cursor)
+        # the moved contestant is now behind the cursor; no other row is skipped or repeated
+        assert list(second) == contestants[2:]
+
+
+class TestListViews:
+    def get(self, rf, admin_user, view, **params):
+        request = rf.get("/", params, secure=True)
+        request.user = admin_user
+        return view(request)
+
+    def test_transaction_list_keeps_filters(self, rf, admin_user, transactions, monkeypatch):
+        monkeypatch.setattr(TransactionList, "paginate_by", 3)
+        other = TransactionsFactory()
+        response = self.get(rf, admin_user, transaction_list, contestant=transactions[0].contestant.pk)
+        page = response.context_data["page_obj"]
+        assert list(response.context_data["tranx_qs"]) == transactions[:3]
+        assert other not in page.object_list
+        assert page.next_query == f"contestant={transactions[0].contestant.pk}&cursor={page.next_cursor}"
+
+        response = self.get(
+            rf, admin_user, transaction_list, contestant=transactions[0].contestant.pk, cursor=page.next_cursor
+        )
+        assert list(response.context_data["tranx_qs"]) == transactions[3:6]
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "nonsense",
+            encode_cursor("n", ["not a date", "x"]),
+            encode_cursor("n", [1]),
+            encode_cursor("n", ["2024-01-01T00:00:00+00:00", str(uuid.uuid4()), "extra"]),
+        ],
+    )
+    def test_invalid_cursor(self, rf, admin_user, cursor):
+        with pytest.raises(Http404):
+            self.get(rf, admin_user, transaction_list, cursor=cursor)
+
+    def test_public_contestant_list_pages(self, client):
+        contestants = [ContestantFactory(number_of_vote=votes) for votes in range(60, 0, -1)]
+        response = client.get(reverse("home_contestant_list"), secure=True)
+        page = response.context["page_obj"]
+        assert [c.pk for c in response.context["contestant_qs"]] == [c.pk for c in contestants[:48]]
+
+        response = client.get(f"{reverse('home_contestant_list')}?{page.next_query}", secure=True)
+        assert [c.pk for c in response.context["contestant_qs"]] == [c.pk for c in contestants[48:]]
+        assert not response.context["page_obj"].has_next()
@@ -0,0 +1,97 @@
+import pytest
+import redis
+from django.conf import settings as django_settings
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from helpers import ratelimit
+from epainos.users.models import Transactions
+from epainos.users.tests.factories import ContestantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def limiter(settings):
+    try:
+        redis.Redis.from_url(django_settings.REDIS_URL).ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    settings.CACHES = {
+        "default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": django_settings.REDIS_URL},
+    }
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMITS = {
+        "vote_submit": {"ip": (0.01, 2), "contestant": (0.01, 3)},
+        "payment_verify": {"ip": (0.01, 1)},
+    }
+    conn = ratelimit.get_redis_connection("default")
+    keys = conn.keys("ratelimit:*")
+    if keys:
+        conn.delete(*keys)
+    return conn
+
+
+def vote(client, contestant, ip="10.0.0.1"):
+    return client.post(
+        reverse("users:vote_submit"),
+        {"contestant_id": contestant.pk, "number_of_vote": 1},
+        secure=True,
+        REMOTE_ADDR=ip,
+    )
+
+
+class TestVoteSubmitLimit:
+    def test_sheds_after_burst(self, client, limiter):
+        contestant = ContestantFactory()
+        assert [vote(client, contestant).status_code for _ in range(3)] == [200, 200, 429]
+
+        response = vote(client, contestant)
+        assert response.json() == {"success": False, "error": "Too many requests"}
+        assert int(response["Retry-After"]) >= 1
+        assert Transactions.objects.count() == 2
+        assert ratelimit.shed_counts() == {"vote_submit:ip": 2}
+
+    def test_per_contestant_bucket_spans_clients(self, client, limiter):
+        contestant = ContestantFactory()
+        codes = [vote(client, contestant, ip=f"10.0.0.{n}").status_code for n in range(4)]
+        assert codes == [200, 200, 200, 429]
+        assert ratelimit.shed_counts() == {"vote_submit:contestant": 1}
+
+    def test_rejected_before_any_query(self, client, limiter):
+        contestant = ContestantFactory()
+        vote(client, contestant)
+        vote(client, contestant)
+        with CaptureQueriesContext(connection) as queries:
+            assert vote(client, contestant).status_code == 429
+        assert len(queries) == 0
+
+
+class TestPaymentVerifyLimit:
+    def test_sheds_after_burst(self, client, limiter):
+        url = reverse("users:payment_verify")
+        assert client.get(url, {"tx_ref": "EPAINOS_REF_MISSING"}, secure=True).status_code == 404
+        assert client.get(url, {"tx_ref": "EPAINOS_REF_MISSING"}, secure=True).status_code == 429
+
+
+def test_admits_requests_without_redis(client, settings):
+    settings.RATE_LIMIT_ENABLED = True
+    contestant = ContestantFactory()
+    assert all(vote(client, contestant).status_code == 200 for _ in range(25))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_non_atomic_views_stay_out_of_the_transaction(rf, settings):
+    settings.RATE_LIMIT_ENABLED = False
+    seen = []
+
+    def view(request):
+        seen.append(connection.in_atomic_block)
+        return HttpResponse()
+
+    ratelimit.rate_limited("payment_verify")(view)(rf.get("/"))
+    ratelimit.rate_limited("payment_verify")(transaction.non_atomic_requests(view))(rf.get("/"))
+
+    assert seen == [True, False]
@@ -0,0 +1,144 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from helpers.payment import FlutterWave
+from epainos.users import reconciliation
+from epainos.users.models import OutboxEmail, Transactions
+from epainos.users.tests.factories import TransactionsFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def flutterwave_api(monkeypatch):
+    """A local HTTP stand-in for the Flutterwave verify endpoint, keyed by payment reference.
+
+    A response is the transaction data, or a ``(code, body)`` pair answered as is.
+    """
+    responses = {}
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            tx_ref = parse_qs(urlparse(self.path).query)["tx_ref"][0]
+            requested.append(tx_ref)
+            if isinstance(responses.get(tx_ref), tuple):
+                code, body = responses[tx_ref]
+            elif tx_ref in responses:
+                code, body = 200, {"status": "success", "message": "Transaction fetched", "data": responses[tx_ref]}
+            else:
+                code, body = 400, {"status": "error", "message": "No transaction was found for this id", "data": None}
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(FlutterWave, "base_url", f"http://127.0.0.1:{server.server_port}/")
+    yield responses, requested
+    server.shutdown()
+    server.server_close()
+
+
+def pending(**kwargs):
+    tranx = TransactionsFactory(**kwargs)
+    # backdate past the reconciliation grace period
+    Transactions.objects.filter(pk=tranx.pk).update(created_date=timezone.now() - timedelta(hours=1))
+    return tranx
+
+
+class TestReconcile:
+    def test_applies_every_outcome(self, flutterwave_api):
+        responses, _ = flutterwave_api
+        paid = pending(amount_paid=300)
+        underpaid = pending(amount_paid=300)
+        failed = pending()
+        abandoned = pending()
+        responses[paid.payment_ref] = {"status": "successful", "amount": 300}
+        responses[underpaid.payment_ref] = {"status": "successful", "amount": 100}
+        responses[failed.payment_ref] = {"status": "failed", "amount": 500}
+
+        stats = reconciliation.reconcile(chunk_size=2, concurrency=4, rate=0, older_than=timedelta(minutes=30))
+
+        assert stats.checked == 4
+        assert stats.outcomes == {"successful": 1, "amount mismatch": 1, "failed": 1, "abandoned": 1}
+        statuses = dict(Transactions.objects.values_list("payment_ref", "status"))
+        assert statuses[underpaid.payment_ref] == "amount mismatch"
+        assert statuses[failed.payment_ref] == "failed"
+        assert statuses[abandoned.payment_ref] == "abandoned"
+        paid.refresh_from_db()
+        paid.contestant.refresh_from_db()
+        assert paid.settled is True
+        assert paid.contestant.number_of_vote == 3
+
+    def test_unknown_references_go_by_the_http_status(self, flutterwave_api):
+        responses, _ = flutterwave_api
+        unknown, failing = pending(), pending()
+        responses[unknown.payment_ref] = (404, {"status": "error", "message": "Reference not recognised"})
+        responses[failing.payment_ref] = (500, {"status": "error", "message": "No transaction was found for this id"})
+
+        stats = reconciliation.reconcile(rate=0, older_than=timedelta(minutes=30))
+
+        assert stats.outcomes == {"abandoned": 1}
+        assert stats.errors == 1
+        statuses = dict(Transactions.objects.values_list("payment_ref", "status"))
+        assert statuses == {unknown.payment_ref: "abandoned", failing.payment_ref: None}
+
+    def test_skips_recent_and_closed_transactions(self, flutterwave_api):
+        _, requested = flutterwave_api
+        TransactionsFactory()
+        pending(settled=True)
+        pending(status="failed")
+
+        stats = reconciliation.reconcile(rate=0, older_than=timedelta(minutes=30))
+
+        assert stats.checked == 0
+        assert requested == []
+
+    def test_resumes_after_cursor(self, flutterwave_api):
+        _, requested = flutterwave_api
+        for _ in range(3):
+            pending()
+        ordered = list(reconciliation.pending_chunks(chunk_size=10))[0]
+        cursor = reconciliation.decode_cursor(reconciliation.encode_cursor(ordered[0]))
+
+        reconciliation.reconcile(rate=0, after=cursor, dry_run=True)
+
+        assert sorted(requested) == sorted(tranx.payment_ref for tranx in ordered[1:])
+
+    def test_dry_run_writes_nothing(self, flutterwave_api):
+        responses, _ = flutterwave_api
+        tranx = pending()
+        responses[tranx.payment_ref] = {"status": "successful", "amount": 500}
+
+        out = StringIO()
+        call_command("reconcile_transactions", "--dry-run", "--rate=0", stdout=out)
+
+        assert "Dry run: 1 checked (1 successful" in out.getvalue()
+        tranx.refresh_from_db()
+        assert tranx.settled is not True
+        assert tranx.status is None
+        assert OutboxEmail.objects.count() == 0
+
+
+class TestRateLimiter:
+    def test_spaces_calls(self):
+        limiter = reconciliation.RateLimiter(100)
+        start = timezone.now()
+        for _ in range(6):
+            limiter.wait()
+        assert timezone.now() - start >= timedelta(seconds=0.05)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from epainos.users import reports, standings
+from epainos.users.forms import RankingReportForm
+from epainos.users.models import ContestantStage, VoteEvent
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.views import ContestantVoteList
+from epainos.users.voting import credit_votes
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def vote(contestant, amount, days_ago=0):
+    tranx = TransactionsFactory(contestant=contestant, amount_paid=amount)
+    credit_votes(tranx.payment_ref, "successful")
+    if days_ago:
+        VoteEvent.objects.filter(transaction=tranx).update(created_date=timezone.now() - timedelta(days=days_ago))
+    return tranx
+
+
+class TestRanking:
+    def test_unfiltered_is_the_standings_view(self):
+        first, second = ContestantFactory(), ContestantFactory()
+        vote(first, 300)
+        vote(second, 100)
+        standings.refresh()
+
+        rows = list(reports.ranking())
+
+        assert [(row.contestant_id, row.rank, row.votes) for row in rows] == [(first.pk, 1, 3), (second.pk, 2, 1)]
+        assert [row.percent for row in rows] == [Decimal("75.00"), Decimal("25.00")]
+        assert rows[0].last_vote_date is not None
+
+    def test_date_range(self):
+        first, second = ContestantFactory(), ContestantFactory()
+        vote(first, 900, days_ago=10)
+        vote(second, 200)
+        vote(first, 100)
+
+        today = timezone.localdate()
+        rows = reports.ranking(start_date=today - timedelta(days=1), end_date=today)
+
+        assert [(row.contestant_id, row.rank, row.votes) for row in rows] == [(second.pk, 1, 2), (first.pk, 2, 1)]
+        assert [row.amount_paid for row in rows] == [Decimal("200.00"), Decimal("100.00")]
+        assert [row.transactions for row in rows] == [1, 1]
+        assert [row.percent for row in rows] == [Decimal("66.67"), Decimal("33.33")]
+
+    def test_stage_and_contestants_without_votes(self):
+        ContestantStage.objects.create(stage="semi final")
+        first, idle = ContestantFactory(), ContestantFactory()
+        vote(first, 400)
+        ContestantStage.objects.create(stage="final")
+        vote(first, 100)
+
+        rows = reports.ranking(stage="semi final")
+
+        assert [(row.contestant_id, row.votes, row.rank) for row in rows] == [(first.pk, 4, 1), (idle.pk, 0, 2)]
+        assert rows[1].last_vote_date is None
+        assert rows[1].percent == Decimal("0.00")
+
+    def test_one_query_then_cached(self):
+        vote(ContestantFactory(), 100)
+        with CaptureQueriesContext(connection) as queries:
+            reports.ranking(stage="final")
+            reports.ranking(stage="final")
+        assert len(queries) == 1
+        assert "RANK() OVER" in queries[0]["sql"]
+
+
+def test_end_before_start_is_invalid():
+    today = timezone.localdate()
+    form = RankingReportForm({"start_date": today, "end_date": today - timedelta(days=1)})
+    assert not form.is_valid()
+
+
+def test_ranking_page_filtered(rf, user):
+    contestants = [ContestantFactory() for _ in range(3)]
+    for contestant, amount in zip(contestants, (300, 200, 100), strict=True):
+        vote(contestant, amount)
+    today = timezone.localdate().isoformat()
+
+    view = ContestantVoteList.as_view(paginate_by=2)
+    request = rf.get(reverse("users:contestant_vote_list"), {"start_date": today}, secure=True)
+    request.user = user
+    context = view(request).context_data
+
+    assert context["report_filtered"]
+    assert [row.contestant_id for row in context["contestant_qs"]] == [c.pk for c in contestants[:2]]
+    assert "standings_refreshed_at" not in context
+
+    request = rf.get(f"/?{context['page_obj'].next_query}", secure=True)
+    request.user = user
+    context = view(request).context_data
+    assert [row.contestant_id for row in context["contestant_qs"]] == [contestants[2].pk]
+    assert context["page_obj"].previous_query
+
@@ -0,0 +1,174 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+from django.utils import timezone
+
+from epainos.users import rollups
+from epainos.users.models import ContestantStage, HourlyRollup, Transactions
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.views import DashboardIndex, rollup_series
+from epainos.users.voting import credit_votes, credit_votes_many
+
+pytestmark = pytest.mark.django_db
+
+
+def rollup_rows():
+    """The rollups summed over their slots, without the empty ones."""
+    rows = (
+        HourlyRollup.objects.values_list("hour", "contestant_id", "settled")
+        .annotate(Sum("transactions"), Sum("amount_paid"), Sum("votes"))
+        .order_by()
+    )
+    return sorted(row for row in rows if row[3])
+
+
+def pending(contestant, amount, hours_ago=0):
+    tranx = TransactionsFactory(contestant=contestant, amount_paid=amount, settled=False)
+    if hours_ago:
+        created = timezone.now() - timedelta(hours=hours_ago)
+        # moved by hand, as the rollups are rebuilt from
+        Transactions.objects.filter(pk=tranx.pk).update(created_date=created)
+        rollups.add(tranx, sign=-1)
+        tranx.created_date = created
+        rollups.add(tranx)
+    return tranx
+
+
+class TestMaintained:
+    def test_created_then_settled(self):
+        contestant = ContestantFactory()
+        tranx = pending(contestant, 500)
+        hour = rollups.floor_hour(tranx.created_date)
+        assert rollup_rows() == [(hour, contestant.pk, False, 1, Decimal("500.00"), 0)]
+
+        credit_votes(tranx.payment_ref, "successful")
+
+        assert rollup_rows() == [(hour, contestant.pk, True, 1, Decimal("500.00"), 5)]
+
+    def test_settled_in_one_statement_across_hours(self):
+        contestant = ContestantFactory()
+        recent, earlier = pending(contestant, 200), pending(contestant, 300, hours_ago=3)
+
+        credit_votes_many([recent.payment_ref, earlier.payment_ref], "successful")
+
+        assert rollup_rows() == [
+            (rollups.floor_hour(earlier.created_date), contestant.pk, True, 1, Decimal("300.00"), 3),
+            (rollups.floor_hour(recent.created_date), contestant.pk, True, 1, Decimal("200.00"), 2),
+        ]
+
+    def test_submissions_spread_over_slots(self, settings):
+        settings.HOURLY_ROLLUP_SLOTS = 4
+        contestant = ContestantFactory()
+        for _ in range(20):
+            pending(contestant, 100)
+
+        assert set(HourlyRollup.objects.values_list("slot", flat=True)) <= {0, 1, 2, 3}
+        assert HourlyRollup.objects.count() > 1
+        assert rollup_rows()[0][3:] == (20, Decimal("2000.00"), 0)
+
+    def test_deleted(self):
+        tranx = pending(ContestantFactory(), 400)
+        credit_votes(tranx.payment_ref, "successful")
+        Transactions.objects.filter(pk=tranx.pk).delete()
+        assert rollup_rows() == []
+
+    def test_backfill_matches(self):
+        contestants = ContestantFactory(), ContestantFactory()
+        for hours_ago, contestant in enumerate(contestants * 3):
+            tranx = pending(contestant, 100 * (hours_ago + 1), hours_ago=hours_ago * 7)
+            if hours_ago % 2:
+                credit_votes(tranx.payment_ref, "successful")
+        TransactionsFactory(contestant=None)
+        maintained = rollup_rows()
+
+        HourlyRollup.objects.all().delete()
+        chunks = list(rollups.backfill(chunk=timedelta(hours=10)))
+
+        assert len(chunks) == 4
+        assert rollup_rows() == maintained
+
+    def test_backfill_command_window(self):
+        contestant = ContestantFactory()
+        pending(contestant, 100, hours_ago=48)
+        recent = pending(contestant, 200)
+        HourlyRollup.objects.all().delete()
+
+        call_command("backfill_rollups", since=(timezone.now() - timedelta(hours=2)).isoformat(), chunk_hours=1)
+
+        # the older transaction is outside the window
+        assert rollup_rows() == [
+            (rollups.floor_hour(recent.created_date), contestant.pk, False, 1, Decimal("200.00"), 0)
+        ]
+
+
+class TestSeries:
+    def test_hours_filled(self):
+        contestant = ContestantFactory()
+        credit_votes(pending(contestant, 300, hours_ago=2).payment_ref, "successful")
+        pending(contestant, 900)
+        now = timezone.now()
+
+        points = rollups.series(now - timedelta(hours=2), now)
+
+        assert [point["votes"] for point in points] == [3, 0, 0]
+        assert points[0]["bucket"] == rollups.floor_hour(now - timedelta(hours=2))
+        assert rollups.series(now - timedelta(hours=2), now, settled=None, fill=False)[-1]["amount_paid"] == 900
+
+    def test_days_and_stages(self):
+        contestant = ContestantFactory()
+        ContestantStage.objects.create(stage="semi final")
+        credit_votes(pending(contestant, 400).payment_ref, "successful")
+        ContestantStage.objects.filter(stage="semi final").update(
+            created_date=timezone.now() - timedelta(days=3)
+        )
+        now = timezone.now()
+
+        days = rollups.series(now - timedelta(days=2), now, granularity=rollups.DAY)
+        stages = rollups.series(now - timedelta(days=2), now, granularity=rollups.STAGE)
+
+        assert [point["votes"] for point in days] == [0, 0, 4]
+        assert stages == [
+            {"bucket": "semi final", "votes": 4, "amount_paid": Decimal("400.00"), "transactions": 1}
+        ]
+
+    def test_unknown_granularity(self):
+        with pytest.raises(ValueError):
+            rollups.series(timezone.now() - timedelta(hours=1), timezone.now(), granularity="week")
+
+
+class TestViews:
+    def test_series_endpoint(self, rf, user):
+        contestant = ContestantFactory()
+        credit_votes(pending(contestant, 200).payment_ref, "successful")
+        start = (timezone.now() - timedelta(hours=1)).isoformat()
+        request = rf.get("/", {"start": start, "contestant": str(contestant.pk)}, secure=True)
+        request.user = user
+
+        response = rollup_series(request)
+
+        data = json.loads(response.content)
+        assert data["granularity"] == "hour"
+        assert [point["votes"] for point in data["points"]] == [0, 2]
+
+    def test_series_endpoint_rejects_long_hourly_ranges(self, rf, user, settings):
+        settings.ROLLUP_SERIES_MAX_HOURS = 24
+        start = (timezone.now() - timedelta(days=2)).isoformat()
+        request = rf.get("/", {"start": start}, secure=True)
+        request.user = user
+        assert rollup_series(request).status_code == 400
+
+    def test_dashboard_chart(self, rf, user):
+        credit_votes(pending(ContestantFactory(), 700).payment_ref, "successful")
+        request = rf.get("/", secure=True)
+        request.user = user
+
+        chart = DashboardIndex.as_view()(request).context_data["today_chart"]
+
+        assert len(chart["labels"]) == 24
+        assert sum(chart["revenue"]) == 700
+        assert sum(chart["votes"]) == 7
+        assert sum(chart["transactions"]) == 1
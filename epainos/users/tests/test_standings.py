@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+
+from epainos.users import standings
+from epainos.users.models import ContestantStanding
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.voting import credit_votes
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_last_refresh():
+    cache.delete(standings.LAST_REFRESH_KEY)
+    yield
+    cache.delete(standings.LAST_REFRESH_KEY)
+
+
+class TestStandings:
+    def test_rank_votes_and_revenue(self):
+        first, second, third = (ContestantFactory(number_of_vote=votes) for votes in (0, 0, 4))
+        for contestant, amount in ((first, 500), (second, 500), (first, 200)):
+            credit_votes(TransactionsFactory(contestant=contestant, amount_paid=amount).payment_ref, "successful")
+        TransactionsFactory(contestant=third, amount_paid=900)  # never settled
+        standings.refresh()
+
+        rows = {row.contestant_id: row for row in ContestantStanding.objects.all()}
+        assert [(rows[c.pk].rank, rows[c.pk].votes) for c in (first, second, third)] == [(1, 7), (2, 5), (3, 4)]
+        assert rows[first.pk].amount_paid == Decimal("700.00")
+        assert rows[first.pk].transactions == 2
+        assert rows[third.pk].transactions == 0
+
+    def test_ties_share_a_rank(self):
+        ContestantFactory.create_batch(2, number_of_vote=3)
+        ContestantFactory(number_of_vote=1)
+        standings.refresh()
+        assert list(ContestantStanding.objects.values_list("rank", flat=True)) == [1, 1, 3]
+
+    def test_refresh_when_due(self, settings):
+        settings.STANDINGS_REFRESH_VOTES = 5
+        assert standings.refresh_if_due()
+        assert not standings.refresh_if_due()
+
+        credit_votes(TransactionsFactory(amount_paid=400).payment_ref, "successful")
+        assert not standings.refresh_if_due()
+        credit_votes(TransactionsFactory(amount_paid=100).payment_ref, "successful")
+        assert standings.refresh_if_due()
+
+        settings.STANDINGS_REFRESH_INTERVAL = 0
+        assert standings.refresh_if_due()
+
+    def test_command(self, capsys):
+        call_command("refresh_standings")
+        call_command("refresh_standings")
+        assert capsys.readouterr().out.count("Refreshed") == 1
+
+
+def test_ranking_page_reads_the_view(admin_client):
+    contestants = [ContestantFactory(number_of_vote=votes) for votes in (9, 5, 1)]
+    standings.refresh()
+    ContestantFactory(number_of_vote=20)  # not in the view until the next refresh
+
+    response = admin_client.get(reverse("users:contestant_vote_list"), secure=True)
+    assert [row.contestant_id for row in response.context["contestant_qs"]] == [c.pk for c in contestants]
+    assert response.context["standings_refreshed_at"] is not None
@@ -0,0 +1,116 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from epainos.users import stats
+from epainos.users.tests.factories import ContestantFactory, TransactionsFactory
+from epainos.users.voting import credit_votes
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    settings.SITE_STATS_DEBOUNCE = 0
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestSnapshot:
+    def test_built_in_two_queries(self):
+        ContestantFactory(number_of_vote=3)
+        ContestantFactory(number_of_vote=7)
+        TransactionsFactory(amount_paid=500)
+
+        with CaptureQueriesContext(connection) as queries:
+            site_stats = stats.snapshot()
+
+        assert len(queries) == 2
+        assert site_stats.contestant_count == 3
+        # only settled transactions count
+        assert site_stats.transaction_count == 0
+        assert [contestant.number_of_vote for contestant in site_stats.contestants] == [7, 3, 0]
+
+    def test_served_from_cache(self):
+        ContestantFactory()
+        stats.snapshot()
+        with CaptureQueriesContext(connection) as queries:
+            stats.snapshot()
+        assert len(queries) == 0
+
+    def test_refreshed_after_credit(self, django_capture_on_commit_callbacks):
+        tranx = TransactionsFactory(amount_paid=300)
+        assert stats.snapshot().total_vote == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            credit_votes(tranx.payment_ref, "successful")
+
+        assert stats.snapshot().total_vote == 3
+
+    def test_refresh_is_debounced(self, settings, django_capture_on_commit_callbacks):
+        settings.SITE_STATS_DEBOUNCE = 60
+        stats.snapshot()
+        with django_capture_on_commit_callbacks(execute=True):
+            ContestantFactory(stage_name="late")
+
+        with CaptureQueriesContext(connection) as queries:
+            assert stats.snapshot().contestant_count == 0
+        assert len(queries) == 0
+
+
+class TestPublicViews:
+    @pytest.mark.parametrize("name", ["home", "home_contestant_list"])
+    def test_read_snapshot(self, client, name):
+        contestant = ContestantFactory(stage_name="starlight")
+        response = client.get(reverse(name), secure=True)
+
+        assert response.status_code == 200
+        assert [str(summary.pk) for summary in response.context["contestant_qs"]] == [str(contestant.pk)]
+        assert b"Starlight" in response.content
+
+
+class TestLeaderboardApi:
+    def get(self, client, **params):
+        return client.get(reverse("users:leaderboard"), params, secure=True)
+
+    def test_ranked_contestants(self, client):
+        low = ContestantFactory(number_of_vote=3)
+        high = ContestantFactory(number_of_vote=7)
+        response = self.get(client)
+
+        assert response.status_code == 200
+        assert "s-maxage=5" in response["Cache-Control"]
+        rows = response.json()["contestants"]
+        assert [(row["id"], row["votes"], row["rank"]) for row in rows] == [(str(high.pk), 7, 1), (str(low.pk), 3, 2)]
+        assert set(rows[0]) == set(stats.LEADERBOARD_FIELDS)
+
+    def test_fields_and_limit(self, client):
+        best = ContestantFactory(number_of_vote=9)
+        ContestantFactory(number_of_vote=1)
+        response = self.get(client, fields="votes,id", limit=1)
+        assert response.json() == {"contestants": [{"id": str(best.pk), "votes": 9}]}
+
+    @pytest.mark.parametrize("params", [{"fields": "id,password"}, {"limit": "0"}, {"limit": "ten"}])
+    def test_bad_parameters(self, client, params):
+        assert self.get(client, **params).status_code == 400
+
+    def test_body_reused_until_votes_change(self, client, django_capture_on_commit_callbacks):
+        tranx = TransactionsFactory(amount_paid=500)
+        first = self.get(client)
+        with CaptureQueriesContext(connection) as queries:
+            again = self.get(client)
+        assert len(queries) == 0
+        assert again.content == first.content
+
+        with django_capture_on_commit_callbacks(execute=True):
+            credit_votes(tranx.payment_ref, "successful")
+        assert self.get(client).json()["contestants"][0]["votes"] == 5
+
+    def test_not_modified(self, client):
+        ContestantFactory()
+        etag = self.get(client)["ETag"]
+        response = client.get(reverse("users:leaderboard"), secure=True, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from epainos.users import counters, ledger, totals
+from epainos.users.models import Contestant, SiteTotals
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.voting import credit_votes, credit_votes_many
+
+pytestmark = pytest.mark.django_db
+
+
+def assert_consistent():
+    stored, actual = totals.verify()
+    assert stored == actual
+
+
+class TestSiteTotals:
+    def test_crediting_updates_totals(self):
+        first = TransactionsFactory(amount_paid=500)
+        second = TransactionsFactory(amount_paid=300)
+        TransactionsFactory(amount_paid=900)  # never settled
+        credit_votes_many([first.payment_ref, second.payment_ref], "successful")
+        credit_votes(first.payment_ref, "successful")
+
+        assert totals.current() == totals.Totals(Decimal("800.00"), 2, 8)
+        assert_consistent()
+
+    def test_spread_over_slots(self, settings, monkeypatch):
+        settings.SITE_TOTALS_SLOTS = 4
+        slots = iter([1, 3])
+        monkeypatch.setattr(totals, "slot", lambda: next(slots))
+        for amount in (200, 400):
+            credit_votes(TransactionsFactory(amount_paid=amount).payment_ref, "successful")
+
+        assert sorted(SiteTotals.objects.filter(votes__gt=0).values_list("slot", "votes")) == [(1, 2), (3, 4)]
+        assert totals.current().votes == 6
+
+    def test_adjustments_and_deletes(self):
+        tranx = TransactionsFactory(amount_paid=700)
+        credit_votes(tranx.payment_ref, "successful")
+        ledger.adjust(Contestant.objects.all(), lambda contestant: -2)
+        assert totals.current().votes == 5
+
+        tranx.refresh_from_db()
+        tranx.delete()
+        Contestant.objects.get().delete()
+        assert totals.current() == totals.Totals(Decimal(0), 0, 0)
+        assert_consistent()
+
+    def test_counter_backend_counts_votes_on_flush(self, settings, monkeypatch):
+        monkeypatch.setattr(counters, "enabled", lambda: True)
+        monkeypatch.setattr(counters, "incr", lambda *args: None)
+        credit_votes(TransactionsFactory(amount_paid=500).payment_ref, "successful")
+        assert totals.current() == totals.Totals(Decimal("500.00"), 1, 0)
+
+    def test_dashboard_reads_totals(self, admin_client):
+        credit_votes(TransactionsFactory(amount_paid=500).payment_ref, "successful")
+        SiteTotals.objects.all().delete()
+        SiteTotals.objects.create(slot=0, amount_paid=123, transactions=1, votes=5)
+        response = admin_client.get("/users/upload/", secure=True)
+        assert response.context["total_amount_paid"] == Decimal("123.00")
+        assert response.context["total_vote"] == 5
+
+
+class TestVerifyCommand:
+    def test_reports_and_repairs(self, capsys):
+        credit_votes(TransactionsFactory(amount_paid=500).payment_ref, "successful")
+        call_command("verify_site_totals")
+        assert "correct" in capsys.readouterr().out
+
+        SiteTotals.objects.all().delete()
+        SiteTotals.objects.create(slot=0, amount_paid=500, transactions=1, votes=99)
+        with pytest.raises(CommandError):
+            call_command("verify_site_totals")
+        assert "votes: stored 99, actual 5" in capsys.readouterr().out
+
+        call_command("verify_site_totals", "--repair")
+        assert_consistent()
+        assert SiteTotals.objects.count() == 1
@@ -0,0 +1,132 @@
+import pytest
+import redis
+from django.conf import settings as django_settings
+from django.db import connection
+from django.urls import reverse
+
+from helpers.payment import FlutterWave
+from helpers.queue import RetryJob
+from helpers.queue import run_job
+from epainos.users import verification
+from epainos.users.models import Transactions
+from epainos.users.tests.factories import TransactionsFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def flutterwave(monkeypatch):
+    """Stand-in for the Flutterwave verify API, keyed by payment reference."""
+    responses = {}
+
+    def verify_payment_flutterwave(self, payment_ref, *args, **kwargs):
+        return responses.get(payment_ref, ("error", "No transaction was found for this id"))
+
+    monkeypatch.setattr(FlutterWave, "verify_payment_flutterwave", verify_payment_flutterwave)
+    return responses
+
+
+@pytest.fixture
+def redis_queue(settings):
+    try:
+        redis.Redis.from_url(django_settings.REDIS_URL).ping()
+    except redis.ConnectionError:
+        pytest.skip("Redis is not available")
+    settings.CACHES = {
+        "default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": django_settings.REDIS_URL},
+    }
+    settings.VERIFY_PAYMENTS_IN_BACKGROUND = True
+    queue = verification.verification_queue
+    conn = queue.connection
+    conn.delete(queue.key, queue.processing_key, queue.delayed_key, *conn.keys(f"{queue.key}:dedupe:*"))
+    return queue
+
+
+class TestVerifyPayment:
+    def test_successful_payment_is_settled(self, flutterwave):
+        tranx = TransactionsFactory(amount_paid=300)
+        flutterwave[tranx.payment_ref] = ("success", {"status": "successful", "amount": 300})
+
+        verification.verify_payment(tranx.payment_ref)
+
+        assert verification.payment_state(tranx.payment_ref) == verification.SETTLED
+        tranx.contestant.refresh_from_db()
+        assert tranx.contestant.number_of_vote == 3
+
+    def test_underpaid_payment_is_not_settled(self, flutterwave):
+        tranx = TransactionsFactory(amount_paid=300)
+        flutterwave[tranx.payment_ref] = ("success", {"status": "successful", "amount": 100})
+
+        verification.verify_payment(tranx.payment_ref)
+
+        assert verification.payment_state(tranx.payment_ref) == verification.FAILED
+
+    def test_unknown_payment_is_retried(self, flutterwave):
+        tranx = TransactionsFactory()
+        with pytest.raises(RetryJob):
+            verification.verify_payment(tranx.payment_ref)
+        assert verification.payment_state(tranx.payment_ref) == verification.PENDING
+
+
+class TestPaymentVerifyView:
+    def test_verifies_inline(self, client, flutterwave):
+        tranx = TransactionsFactory(amount_paid=200)
+        flutterwave[tranx.payment_ref] = ("success", {"status": "successful", "amount": 200})
+
+        url = reverse("users:payment_verify")
+        response = client.get(url, {"status": "successful", "tx_ref": tranx.payment_ref}, secure=True)
+
+        assert response.status_code == 200
+        assert response.context["payment_state"] == verification.SETTLED
+
+    @pytest.mark.django_db(transaction=True)
+    def test_provider_is_called_outside_any_transaction(self, client, monkeypatch):
+        tranx = TransactionsFactory(amount_paid=200)
+        in_transaction = []
+
+        def verify_payment_flutterwave(self, payment_ref, *args, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return "success", {"status": "successful", "amount": 200}
+
+        monkeypatch.setattr(FlutterWave, "verify_payment_flutterwave", verify_payment_flutterwave)
+
+        url = reverse("users:payment_verify")
+        response = client.get(url, {"status": "successful", "tx_ref": tranx.payment_ref}, secure=True)
+
+        assert response.context["payment_state"] == verification.SETTLED
+        assert in_transaction == [False]
+
+    def test_status(self, client):
+        tranx = TransactionsFactory()
+        url = reverse("users:payment_verify_status")
+        assert client.get(url, {"tx_ref": tranx.payment_ref}, secure=True).json() == {"state": "pending"}
+        assert client.get(url, {"tx_ref": "missing"}, secure=True).status_code == 404
+
+    def test_enqueues_once(self, client, flutterwave, redis_queue):
+        tranx = TransactionsFactory()
+        url = reverse("users:payment_verify")
+        for _ in range(3):
+            response = client.get(url, {"status": "successful", "tx_ref": tranx.payment_ref}, secure=True)
+            assert response.context["payment_state"] == verification.PENDING
+        assert len(redis_queue) == 1
+        # a client-reported status no longer settles the payment
+        assert not Transactions.objects.get(pk=tranx.pk).settled
+
+
+def test_worker_retries_then_settles(flutterwave, redis_queue):
+    tranx = TransactionsFactory(amount_paid=100)
+    verification.enqueue_verification(tranx.payment_ref)
+
+    raw, payload = redis_queue.reserve(timeout=0.1)
+    run_job(redis_queue, raw, payload, verification.handle_verification_job, backoff=0)
+    assert redis_queue.connection.zcard(redis_queue.delayed_key) == 1
+
+    flutterwave[tranx.payment_ref] = ("success", {"status": "successful", "amount": 100})
+    raw, payload = redis_queue.reserve(timeout=0.1)
+    assert payload["attempts"] == 1
+    run_job(redis_queue, raw, payload, verification.handle_verification_job, backoff=0)
+
+    assert verification.payment_state(tranx.payment_ref) == verification.SETTLED
+    assert redis_queue.connection.llen(redis_queue.processing_key) == 0
+    # done, so the reference can be queued again
+    assert redis_queue.enqueue({"payment_ref": tranx.payment_ref}, dedupe=tranx.payment_ref)
@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from epainos.users.models import Transactions
+from epainos.users.tests.factories import TransactionsFactory
+from epainos.users.voting import cancel_transaction
+from epainos.users.voting import credit_votes
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCreditVotes:
+    def test_credits_votes_once(self):
+        tranx = TransactionsFactory(amount_paid=500)
+
+        assert credit_votes(tranx.payment_ref, "successful") == (tranx.contestant.pk, 5)
+        assert credit_votes(tranx.payment_ref, "successful") is None
+
+        tranx.refresh_from_db()
+        tranx.contestant.refresh_from_db()
+        assert tranx.settled is True
+        assert tranx.status == "successful"
+        assert tranx.contestant.number_of_vote == 5
+
+    def test_unknown_reference(self):
+        assert credit_votes("EPAINOS_REF_missing", "successful") is None
+
+    def test_single_round_trip(self):
+        tranx = TransactionsFactory()
+        with CaptureQueriesContext(connection) as ctx:
+            credit_votes(tranx.payment_ref, "successful")
+        statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        assert len(statements) == 1
+
+
+class TestCancelTransaction:
+    def test_cancel_pending(self):
+        tranx = TransactionsFactory()
+        assert cancel_transaction(tranx.payment_ref)
+        assert Transactions.objects.get(pk=tranx.pk).status == "cancelled"
+
+    def test_cancel_does_not_unsettle(self):
+        tranx = TransactionsFactory()
+        credit_votes(tranx.payment_ref, "successful")
+        assert not cancel_transaction(tranx.payment_ref)
+        assert Transactions.objects.get(pk=tranx.pk).settled is True
@@ -0,0 +1,173 @@
+import json
+import threading
+
+import pytest
+import redis
+from django.conf import settings as django_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from epainos.users import webhooks
+from epainos.users.models import Transactions
+from epainos.users.tests.factories import ContestantFactory
+from epainos.users.tests.factories import TransactionsFactory
+
+pytestmark = pytest.mark.django_db
+
+SECRET_HASH = "webhook-secret"  # noqa: S105
+
+
+@pytest.fixture(autouse=True)
+def _secret_hash(settings):
+    settings.FLUTTERWAVE_SECRET_HASH = SECRET_HASH
+
+
+def charge(tranx, status="successful", amount=None):
+    return {"tx_ref": tranx.payment_ref, "status": status, "amount": str(amount or tranx.amount_paid)}
+
+
+def post_event(client, event, signature=SECRET_HASH):
+    return client.post(
+        reverse("users:flutterwave_webhook"),
+        json.dumps(event),
+        content_type="application/json",
+        headers={"verif-hash": signature},
+        secure=True,
+    )
+
+
+class TestApplyEvents:
+    def test_batch_is_settled_and_credited_per_contestant(self):
+        contestant = ContestantFactory()
+        paid = [TransactionsFactory(contestant=contestant, amount_paid=200) for _ in range(3)]
+        failed = TransactionsFactory()
+
+        assert webhooks.apply_events([charge(t) for t in paid] + [charge(failed, "failed")]) == (3, 1)
+
+        contestant.refresh_from_db()
+        assert contestant.number_of_vote == 6
+        assert Transactions.objects.get(pk=failed.pk).status == "failed"
+
+    def test_out_of_order_and_duplicate_events(self):
+        tranx = TransactionsFactory(amount_paid=100)
+        webhooks.apply_events([charge(tranx), charge(tranx, "failed"), charge(tranx)])
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert webhooks.apply_events([charge(tranx, "failed"), charge(tranx)]) == (0, 0)
+        assert [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith("SELECT")] == []
+
+        tranx.contestant.refresh_from_db()
+        assert tranx.contestant.number_of_vote == 1
+        assert Transactions.objects.get(pk=tranx.pk).settled
+
+    def test_underpaid(self):
+        tranx = TransactionsFactory(amount_paid=500)
+        assert webhooks.apply_events([charge(tranx, amount=100)]) == (0, 1)
+        assert Transactions.objects.get(pk=tranx.pk).status == "amount mismatch"
+
+
+@pytest.mark.parametrize("amount", [None, "", "abc", "NaN", "-5", True])
+def test_bad_amounts_are_rejected(amount):
+    data = {"tx_ref": "EPAINOS_REF_1", "status": "successful"}
+    if amount is not None:
+        data["amount"] = amount
+    with pytest.raises(ValueError):
+        webhooks.event_payload({"data": data})
+
+
+class TestConsume:
+    @pytest.fixture
+    def queue(self, settings, monkeypatch):
+        # would close the connection of the test transaction
+        monkeypatch.setattr(webhooks, "close_old_connections", lambda: None)
+        try:
+            redis.Redis.from_url(django_settings.REDIS_URL).ping()
+        except redis.ConnectionError:
+            pytest.skip("Redis is not available")
+        settings.CACHES = {
+            "default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": django_settings.REDIS_URL},
+        }
+        queue = webhooks.webhook_queue
+        queue.connection.delete(queue.key, queue.processing_key, queue.delayed_key, queue.dead_key)
+        yield queue
+        queue.connection.delete(queue.key, queue.processing_key, queue.delayed_key, queue.dead_key)
+
+    def consume_once(self, queue, **kwargs):
+        stop = threading.Event()
+        original = queue.reserve_many
+
+        def reserve_many(*args, **kw):
+            stop.set()
+            return original(*args, **kw)
+
+        queue.reserve_many = reserve_many
+        try:
+            webhooks.consume(retry_delay=0, stop=stop, **kwargs)
+        finally:
+            del queue.reserve_many
+
+    def test_bad_event_does_not_hold_back_the_batch(self, queue):
+        good = TransactionsFactory(amount_paid=100)
+        bad = TransactionsFactory(amount_paid=100)
+        queue.enqueue(charge(good))
+        # queued before events were validated
+        queue.enqueue({"tx_ref": bad.payment_ref, "status": "successful", "amount": "None"})
+
+        self.consume_once(queue, max_attempts=2)
+
+        assert Transactions.objects.get(pk=good.pk).settled
+        assert queue.connection.llen(queue.processing_key) == 0
+        assert queue.connection.zcard(queue.delayed_key) == 1
+
+        queue.promote_due()
+        self.consume_once(queue, max_attempts=2)
+
+        assert queue.connection.zcard(queue.delayed_key) == 0
+        assert queue.connection.llen(queue.dead_key) == 1
+        assert queue.requeue_dead() == 1
+        assert len(queue) == 1
+
+
+class TestFlutterwaveWebhook:
+    def test_rejects_bad_amount(self, client):
+        tranx = TransactionsFactory()
+        response = post_event(client, {"event": "charge.completed", "data": {**charge(tranx), "amount": None}})
+        assert response.status_code == 400
+        assert not Transactions.objects.get(pk=tranx.pk).settled
+
+    def test_rejects_bad_signature(self, client):
+        tranx = TransactionsFactory()
+        response = post_event(client, {"event": "charge.completed", "data": charge(tranx)}, "wrong")
+        assert response.status_code == 401
+        assert not Transactions.objects.get(pk=tranx.pk).settled
+
+    def test_applies_inline(self, client):
+        tranx = TransactionsFactory()
+        response = post_event(client, {"event": "charge.completed", "data": charge(tranx)})
+        assert response.status_code == 200
+        assert Transactions.objects.get(pk=tranx.pk).settled
+
+    def test_enqueues(self, client, settings):
+        try:
+            redis.Redis.from_url(django_settings.REDIS_URL).ping()
+        except redis.ConnectionError:
+            pytest.skip("Redis is not available")
+        settings.CACHES = {
+            "default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": django_settings.REDIS_URL},
+        }
+        settings.VERIFY_PAYMENTS_IN_BACKGROUND = True
+        queue = webhooks.webhook_queue
+        queue.connection.delete(queue.key, queue.processing_key)
+        tranx = TransactionsFactory()
+
+        with CaptureQueriesContext(connection) as ctx:
+            post_event(client, {"event": "charge.completed", "data": charge(tranx)})
+            post_event(client, {"event": "charge.completed", "data": charge(tranx)})
+        assert ctx.captured_queries == []
+
+        jobs = queue.reserve_many(10, timeout=0.1)
+        assert len(jobs) == 2
+        assert webhooks.apply_events([payload for _, payload in jobs]) == (1, 0)
+        queue.ack_many([raw for raw, _ in jobs])
+        assert queue.connection.llen(queue.processing_key) == 0
@@ -0,0 +1,100 @@
+"""Site-wide settled revenue, settled transaction count and vote total.
+
+The totals are kept in ``SiteTotals`` rows, updated in the statements that settle
+transactions and credit votes (see ``voting`` and ``ledger``), so reading them is
+a sum over ``SITE_TOTALS_SLOTS`` rows however many transactions there are. Each
+statement adds to one random slot, so concurrent payments do not queue on a
+single row lock.
+
+The totals equal the settled ``Transactions`` and ``Contestant.number_of_vote``
+sums; ``verify`` compares them and ``repair`` rewrites them (see the
+``verify_site_totals`` command).
+"""
+import random
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from .models import Contestant, SiteTotals, Transactions
+
+# expects the ``{source}`` relation in the surrounding query and the slot as parameter
+UPSERT_SQL = f"""
+    INSERT INTO {SiteTotals._meta.db_table}
+           (id, created_date, modified_date, slot, amount_paid, transactions, votes)
+    SELECT gen_random_uuid(), NOW(), NOW(), %s, {{amount_paid}}, {{transactions}}, {{votes}}
+      FROM {{source}}
+    HAVING COUNT(*) > 0
+        ON CONFLICT (slot) DO UPDATE
+       SET amount_paid = {SiteTotals._meta.db_table}.amount_paid + EXCLUDED.amount_paid,
+           transactions = {SiteTotals._meta.db_table}.transactions + EXCLUDED.transactions,
+           votes = {SiteTotals._meta.db_table}.votes + EXCLUDED.votes,
+           modified_date = NOW()
+"""
+
+
+@dataclass
+class Totals:
+    amount_paid: Decimal = Decimal(0)
+    transactions: int = 0
+    votes: int = 0
+
+
+def slot():
+    return random.randrange(settings.SITE_TOTALS_SLOTS)
+
+
+def upsert_sql(source, amount_paid="0", transactions="0", votes="0"):
+    return UPSERT_SQL.format(source=source, amount_paid=amount_paid, transactions=transactions, votes=votes)
+
+
+def add(amount_paid=0, transactions=0, votes=0):
+    """Add to the totals, e.g. to take out a deleted transaction or contestant."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH source AS (SELECT 1) {upsert_sql('source', '%s', '%s', '%s')}",
+            [slot(), amount_paid, transactions, votes],
+        )
+
+
+def current():
+    totals = SiteTotals.objects.aggregate(
+        amount_paid=Sum("amount_paid"), transactions=Sum("transactions"), votes=Sum("votes")
+    )
+    return Totals(totals["amount_paid"] or Decimal(0), totals["transactions"] or 0, totals["votes"] or 0)
+
+
+def actual():
+    """The totals computed from the transactions and contestants themselves."""
+    settled = Transactions.objects.filter(settled=True).aggregate(
+        amount_paid=Sum("amount_paid"), transactions=Count("pk")
+    )
+    votes = Contestant.objects.aggregate(votes=Sum("number_of_vote"))["votes"]
+    return Totals(settled["amount_paid"] or Decimal(0), settled["transactions"], votes or 0)
+
+
+def verify():
+    """Returns:
+        tuple: ``(stored, actual)`` totals.
+    """
+    return current(), actual()
+
+
+def repair():
+    """Rewrite the totals from the transactions and contestants.
+
+    Returns:
+        Totals: the repaired totals.
+    """
+    with transaction.atomic():
+        # every writer adds to a slot row: holding them all keeps the recount exact
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {SiteTotals._meta.db_table} IN EXCLUSIVE MODE")
+        totals = actual()
+        SiteTotals.objects.all().delete()
+        SiteTotals.objects.create(
+            slot=0, amount_paid=totals.amount_paid, transactions=totals.transactions, votes=totals.votes
+        )
+    return totals
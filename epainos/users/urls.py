@@ -24,8 +24,16 @@ urlpatterns = [
     path("<str:pk>/contestant-update/", views.update_contestant_profile, name="update_contestant_profile"),
     path("<str:pk>/contestant-delete/", views.delete_contestant_record, name="delete_contestant_record"),
     path("verify/", views.payment_verify, name="payment_verify"),
+    path("verify/status/", views.payment_verify_status, name="payment_verify_status"),
+    path("webhooks/flutterwave/", views.flutterwave_webhook, name="flutterwave_webhook"),
+    path("leaderboard/", views.leaderboard_api, name="leaderboard"),
+    path("leaderboard/stream/", views.leaderboard_stream, name="leaderboard_stream"),
     path("contestant-vote-list/", views.contestant_vote_list, name="contestant_vote_list"),
     path("transaction-list/", views.transaction_list, name="transaction_list"),
+    path("exports/<uuid:pk>/", views.export_job, name="export_job"),
+    path("exports/<uuid:pk>/status/", views.export_job_status, name="export_job_status"),
+    path("exports/<uuid:pk>/download/", views.export_job_download, name="export_job_download"),
+    path("rollups/", views.rollup_series, name="rollup_series"),
     path("policy-page/", views.policy_page, name="policy_page"),
     path("cancel-payment/", views.cancel_payment, name="cancel_payment"),
 
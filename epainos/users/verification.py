@@ -0,0 +1,98 @@
+"""Payment verification against Flutterwave.
+
+``PaymentVerify`` only queues the reference (``enqueue_verification``); the
+``run_verification_worker`` command verifies it with the provider and settles or
+cancels the transaction, so a slow Flutterwave API never holds a web worker. The
+verify page polls ``payment_state`` until the transaction leaves the pending state.
+"""
+import contextlib
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.db import transaction
+
+from helpers.payment import FlutterWave
+from helpers.queue import RedisQueue, RetryJob
+
+from .models import Transactions
+from .outbox import queue_email
+from .voting import cancel_transaction, credit_votes
+
+PENDING = "pending"
+SETTLED = "settled"
+FAILED = "failed"
+
+verification_queue = RedisQueue("payment-verification")
+
+
+def payment_state(payment_ref):
+    """Return the state the verify page shows, or ``None`` for an unknown reference."""
+    tranx = Transactions.objects.filter(payment_ref=payment_ref).values("settled", "status").first()
+    if tranx is None:
+        return None
+    if tranx["settled"]:
+        return SETTLED
+    if tranx["status"]:
+        return FAILED
+    return PENDING
+
+
+def enqueue_verification(payment_ref):
+    """Queue ``payment_ref`` for verification, once while it is waiting or running.
+
+    Without ``VERIFY_PAYMENTS_IN_BACKGROUND`` the payment is verified right away.
+    """
+    if not settings.VERIFY_PAYMENTS_IN_BACKGROUND:
+        # the page keeps polling while the payment is still pending
+        with contextlib.suppress(RetryJob, requests.RequestException):
+            verify_payment(payment_ref)
+        return True
+    return verification_queue.enqueue({"payment_ref": payment_ref}, dedupe=payment_ref)
+
+
+def apply_verification(payment_ref, data):
+    """Settle or cancel ``payment_ref`` from the provider's transaction ``data``.
+
+    Returns:
+        str: the resulting state, ``PENDING`` if the provider has no final answer yet.
+    """
+    tranx_status = data.get("status")
+    if tranx_status == "successful":
+        expected = Transactions.objects.filter(payment_ref=payment_ref).values_list("amount_paid", flat=True).first()
+        if expected is not None and Decimal(str(data.get("amount", 0))) < expected:
+            cancel_transaction(payment_ref, "amount mismatch")
+            return FAILED
+        credit_votes(payment_ref, tranx_status)
+        return SETTLED
+    if tranx_status in ("failed", "cancelled"):
+        cancel_transaction(payment_ref, tranx_status)
+        return FAILED
+    return PENDING
+
+
+def verify_payment(payment_ref):
+    """Ask Flutterwave about ``payment_ref`` and apply the answer.
+
+    Raises:
+        RetryJob: when the provider has no final answer for the payment yet.
+    """
+    # asked before the transaction opens, so no connection or row lock waits on the provider
+    status, data = FlutterWave().verify_payment_flutterwave(payment_ref)
+    # the outbox email of the verification commits with the settlement
+    with transaction.atomic():
+        if settings.VERIFICATION_EMAIL_RECIPIENTS:
+            queue_email(
+                f"Verification of {payment_ref}",
+                f"{status}: {data}",
+                settings.VERIFICATION_EMAIL_RECIPIENTS,
+                settings.EMAIL_HOST_USER,
+            )
+        state = apply_verification(payment_ref, data) if status == "success" else PENDING
+    if state == PENDING:
+        raise RetryJob(payment_ref)
+
+
+def handle_verification_job(payload):
+    if payment_state(payload["payment_ref"]) == PENDING:
+        verify_payment(payload["payment_ref"])
@@ -1,4 +1,9 @@
-import random
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.urls import reverse
@@ -11,22 +16,38 @@ from django.views.generic import DeleteView
 from django.views.generic import FormView
 from django.views.generic import TemplateView
 from django.views import View
-from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.timezone import localtime
+from django.core.paginator import InvalidPage, Paginator
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
-from django.db.models import Sum
 from django.shortcuts import redirect
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import HttpResponseRedirect, HttpResponse, Http404
 from django.shortcuts import render, redirect, get_object_or_404
 
-from epainos.users.models import User, Contestant, ContestantImage, Transactions, ContestantVideo, ContestantStage
-from .forms import ContestantProfileForm, ContestantVote, ContestantEditProfileForm, FormatForm
+from helpers import pagecache
+from helpers.pagecache import cache_public_page
+from helpers.pagination import KeysetPaginationMixin
+from helpers.ratelimit import rate_limited
+from epainos.users.models import User, Contestant, ContestantImage, Transactions, ContestantVideo, ContestantStage, ContestantStanding, ExportJob
+from .forms import (
+    ContestantProfileForm, ContestantVote, ContestantEditProfileForm, FormatForm, RankingReportForm, RollupSeriesForm
+)
 # from .tasks import sendSMS
 from .filters import ContestantFilter, TransactionsFilter, ContestantFilter
 from .admin import TransactionsResource, ContestantResource
-
-
-def generate_random_10_digits():
-    return "".join([str(random.randint(0, 9)) for _ in range(10)])
+from .ids import PAYMENT_REF
+from .voting import cancel_transaction
+from .verification import PENDING, enqueue_verification, payment_state
+from . import (
+    columnar, counters, export_jobs, exports, leaderboard, ledger, live, reports, rollups, standings, stats, totals,
+    webhooks,
+)
 
 class UserDetailView(LoginRequiredMixin, DetailView):
     model = User
@@ -36,81 +57,51 @@ class UserDetailView(LoginRequiredMixin, DetailView):
 
 user_detail_view = UserDetailView.as_view()
 
-class HomeIndex(TemplateView):
-    template_name = "pages/index.html"
+class SiteStatsMixin:
+    """Context of the public pages, read from the shared ``stats`` snapshot."""
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        tranx_qs = Transactions.objects.all()
-        contestant_qs = Contestant.objects.all().order_by("-number_of_vote")
-        total_amount_paid = Transactions.objects.aggregate(total=Sum('amount_paid'))['total']
-        total_vote = Contestant.objects.aggregate(total=Sum('number_of_vote'))['total']
-        contestant_stage = ContestantStage.objects.all().first()
-
-
-        # Add additional context data if needed
-        context["tranx_qs"] = tranx_qs[:10]
-        context["tranx_qs_count"] = tranx_qs.count()
-        context["contestant_qs"] = contestant_qs
-        context["contestant_qs_count"] = contestant_qs.count()
-        context["total_amount_paid"] = total_amount_paid
-        context["total_vote"] = total_vote
+        site_stats = stats.snapshot()
+        context["tranx_qs_count"] = site_stats.transaction_count
+        # a paginated view's page of contestants, else all of them
+        context["contestant_qs"] = leaderboard.with_scores(context.get("contestant_qs", site_stats.contestants))
+        context["contestant_qs_count"] = site_stats.contestant_count
+        context["total_amount_paid"] = site_stats.total_amount_paid
+        context["total_vote"] = counters.total_with_pending(site_stats.total_vote)
         context["form"] = ContestantProfileForm()
-        context["contestant_stage"] = contestant_stage
+        context["contestant_stage"] = ContestantStage(stage=site_stats.stage) if site_stats.stage else None
+        context["live_leaderboard"] = leaderboard.enabled()
         return context
 
 
-home_index = HomeIndex.as_view()
-
+class HomeIndex(SiteStatsMixin, TemplateView):
+    template_name = "pages/index.html"
 
-class HomeContestantList(TemplateView):
-    template_name = "pages/contestant_list.html"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        tranx_qs = Transactions.objects.all()
-        contestant_stage = ContestantStage.objects.all().first()
-        contestant_qs = Contestant.objects.all().order_by("-number_of_vote")
-        total_amount_paid = Transactions.objects.aggregate(total=Sum('amount_paid'))['total']
-        total_vote = Contestant.objects.aggregate(total=Sum('number_of_vote'))['total']
+home_index = cache_public_page(HomeIndex.as_view())
 
-        # Add additional context data if needed
-        context["tranx_qs"] = tranx_qs[:10]
-        context["tranx_qs_count"] = tranx_qs.count()
-        context["contestant_qs"] = contestant_qs
-        context["contestant_qs_count"] = contestant_qs.count()
-        context["total_amount_paid"] = total_amount_paid
-        context["total_vote"] = total_vote
-        context["form"] = ContestantProfileForm()
-        context["contestant_stage"] = contestant_stage
-        return context
 
+class HomeContestantList(KeysetPaginationMixin, SiteStatsMixin, ListView):
+    template_name = "pages/contestant_list.html"
+    context_object_name = "contestant_qs"
+    keyset_ordering = ("-number_of_vote", "id")
+    paginate_by = 48
 
-home_contestant_list = HomeContestantList.as_view()
+    def get_queryset(self):
+        return Contestant.objects.only(
+            "id", "contestant_id", "name", "stage_name", "number_of_vote", "cover_image_url"
+        )
 
 
-class HomeContestantDetails(TemplateView):
-    template_name = "pages/index.html"
+home_contestant_list = cache_public_page(HomeContestantList.as_view(), params=[HomeContestantList.cursor_kwarg])
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        tranx_qs = Transactions.objects.all()
-        contestant_qs = Contestant.objects.all().order_by("-number_of_vote")
-        total_amount_paid = Transactions.objects.aggregate(total=Sum('amount_paid'))['total']
-        total_vote = Contestant.objects.aggregate(total=Sum('number_of_vote'))['total']
 
-        # Add additional context data if needed
-        context["tranx_qs"] = tranx_qs[:10]
-        context["tranx_qs_count"] = tranx_qs.count()
-        context["contestant_qs"] = contestant_qs
-        context["contestant_qs_count"] = contestant_qs.count()
-        context["total_amount_paid"] = total_amount_paid
-        context["total_vote"] = total_vote
-        context["form"] = ContestantProfileForm()
-        return context
+class HomeContestantDetails(SiteStatsMixin, TemplateView):
+    template_name = "pages/index.html"
 
 
-home_contestant_details = HomeContestantDetails.as_view()
+home_contestant_details = cache_public_page(HomeContestantDetails.as_view())
 
 
 class UserUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
@@ -145,20 +136,30 @@ class DashboardIndex(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         tranx_qs = Transactions.objects.filter(settled=True)
-        contestant_qs = Contestant.objects.all().order_by("-number_of_vote")
-        total_amount_paid = Transactions.objects.filter(settled=True).aggregate(total=Sum('amount_paid'))['total']
-        total_vote = Contestant.objects.aggregate(total=Sum('number_of_vote'))['total']
+        contestant_qs = ledger.leaderboard()
+        site_totals = totals.current()
 
         # Add additional context data if needed
         context["tranx_qs"] = tranx_qs[:10]
-        context["tranx_qs_count"] = tranx_qs.count()
-        context["contestant_qs"] = contestant_qs
+        context["tranx_qs_count"] = site_totals.transactions
+        context["contestant_qs"] = counters.with_pending(contestant_qs)
         context["contestant_qs_count"] = contestant_qs.count()
-        context["total_amount_paid"] = total_amount_paid
-        context["total_vote"] = total_vote
+        context["total_amount_paid"] = site_totals.amount_paid
+        context["total_vote"] = counters.total_with_pending(site_totals.votes)
         context["form"] = ContestantProfileForm()
+        context["today_chart"] = self.today_chart()
         return context
 
+    def today_chart(self):
+        """Today's settled revenue, votes and transactions per hour, for the charts."""
+        points = rollups.today()
+        return {
+            "labels": [f"{localtime(point['bucket']):%I%p}" for point in points],
+            "revenue": [float(point["amount_paid"]) for point in points],
+            "votes": [point["votes"] for point in points],
+            "transactions": [point["transactions"] for point in points],
+        }
+
 
 dashboard_index = DashboardIndex.as_view()
 
@@ -204,7 +205,7 @@ class ContestantUpload(LoginRequiredMixin ,TemplateView):
 contestant_upload = ContestantUpload.as_view()
 
 
-class ContestantList(LoginRequiredMixin, ListView):
+class ContestantList(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Contestant
     template_name = "dashboard/contestant_list.html"
     context_object_name = "contestant_qs"
@@ -217,26 +218,14 @@ class ContestantList(LoginRequiredMixin, ListView):
         return self.filter.qs
 
     def post(self, request, *args, **kwargs):
-        export_format = request.POST.get('format')
-
-        dataset = ContestantResource().export()
-        if export_format == "xls":
-            exported_data = dataset.export('xls')
-            content_type = 'application/vnd.ms-excel'
-            filename = 'contestants.xls'
-        elif export_format == "csv":
-            exported_data = dataset.export('csv')
-            content_type = 'text/csv'
-            filename = 'contestants.csv'
-        else:
-            # Default to JSON if format is not specified or unknown
-            exported_data = dataset.export('json')
-            content_type = 'application/json'
-            filename = 'contestants.json'
-
-        response = HttpResponse(exported_data, content_type=content_type)
-        response['Content-Disposition'] = f"attachment; filename={filename}"
-        return response
+        # the export form posts to the current URL, so the active filter is in the query string
+        export_format = request.POST.get("format")
+        if export_format == "xlsx":
+            job = export_jobs.request_export(ExportJob.CONTESTANTS, request.GET, request.user)
+            return redirect("users:export_job", pk=job.pk)
+        if export_format in columnar.CONTENT_TYPES:
+            return columnar.export_response(self.get_queryset(), export_format, "contestants")
+        return exports.export_response(ContestantResource(), self.get_queryset(), export_format, "contestants")
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -250,20 +239,45 @@ class ContestantList(LoginRequiredMixin, ListView):
 contestant_list = ContestantList.as_view()
 
 
-class ContestantVoteList(LoginRequiredMixin, ListView):
-    model = Contestant
+class ContestantVoteList(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    model = ContestantStanding
     template_name = "dashboard/contestant_rank.html"
     context_object_name = "contestant_qs"
     # form_class = FormatForm
+    # one range scan of users_standing_rank_idx per page
+    keyset_ordering = ("rank", "contestant")
     paginate_by = 100
 
+    def get_queryset(self):
+        self.report_form = RankingReportForm(self.request.GET or None)
+        return reports.ranking(**(self.report_form.cleaned_data if self.report_form.is_valid() else {}))
+
+    def page_query(self, number):
+        query = self.request.GET.copy()
+        query.pop(self.cursor_kwarg, None)
+        query["page"] = number
+        return query.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        if not isinstance(queryset, list):
+            return super().paginate_queryset(queryset, page_size)
+        # a filtered report is one cached list
+        paginator = Paginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get("page") or 1)
+        except InvalidPage as exc:
+            raise Http404(str(exc)) from exc
+        page.next_query = self.page_query(page.next_page_number()) if page.has_next() else ""
+        page.previous_query = self.page_query(page.previous_page_number()) if page.has_previous() else ""
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        tranx_qs = Transactions.objects.all()
-        contestant_qs = Contestant.objects.all().order_by("-number_of_vote")
-        # Add additional context data if needed
-        context["tranx_qs"] = tranx_qs
-        context["contestant_qs"] = contestant_qs
+        context["report_form"] = self.report_form
+        context["report_filtered"] = isinstance(self.object_list, list)
+        last_refresh = standings.last_refresh()
+        if last_refresh and not context["report_filtered"]:
+            context["standings_refreshed_at"] = datetime.fromtimestamp(last_refresh["at"], tz=timezone.utc)
         return context
 
 
@@ -320,13 +334,42 @@ class ContestantDetailsView(DetailView):
         # Add additional context data if needed
         context["more_contestant"] = Contestant.objects.all().order_by('-created_date')[:10]
         context["vote_form"] = ContestantVote(initial={'contestant_id': contestant_id_value})
+        context["rank"] = leaderboard.rank(contestant_id_value)
         return context
 
 
-contestant_view = ContestantDetailsView.as_view()
-
-
-class TransactionList(LoginRequiredMixin, ListView, FormView):
+def contestant_validators(request, pk):
+    """``(etag, last_modified)`` of a contestant page, from the contestant's
+    ``modified_date`` and the version of the public pages (votes, ranks and the
+    other contestants shown), without loading the contestant."""
+    if not hasattr(request, "_contestant_validators"):
+        try:
+            modified = Contestant.objects.filter(pk=pk).values_list("modified_date", flat=True).first()
+        except ValidationError as exc:
+            raise Http404(_("Contestant not found")) from exc
+        if modified is None:
+            request._contestant_validators = (None, None)
+        else:
+            version, changed_at = pagecache.generation(), pagecache.invalidated_at()
+            viewer = request.user.pk if request.user.is_authenticated else "anon"
+            etag = hashlib.sha256(f"{pk}:{modified.timestamp()}:{version}:{viewer}".encode()).hexdigest()[:32]
+            last_modified = modified
+            if changed_at is not None:
+                last_modified = max(modified, datetime.fromtimestamp(changed_at, tz=timezone.utc))
+            request._contestant_validators = (etag, last_modified)
+    return request._contestant_validators
+
+
+# private: the page embeds the visitor's CSRF token, so shared caches must not keep it
+contestant_view = cache_control(private=True, no_cache=True)(
+    condition(
+        etag_func=lambda request, pk: contestant_validators(request, pk)[0],
+        last_modified_func=lambda request, pk: contestant_validators(request, pk)[1],
+    )(cache_public_page(ContestantDetailsView.as_view()))
+)
+
+
+class TransactionList(LoginRequiredMixin, KeysetPaginationMixin, ListView, FormView):
     model = Transactions
     template_name = "dashboard/transactions.html"
     context_object_name = "tranx_qs"
@@ -339,26 +382,14 @@ class TransactionList(LoginRequiredMixin, ListView, FormView):
         return self.filter.qs
 
     def post(self, request, *args, **kwargs):
-        export_format = request.POST.get('format')
-
-        dataset = TransactionsResource().export()
-        if export_format == "xls":
-            exported_data = dataset.export('xls')
-            content_type = 'application/vnd.ms-excel'
-            filename = 'transactions.xls'
-        elif export_format == "csv":
-            exported_data = dataset.export('csv')
-            content_type = 'text/csv'
-            filename = 'transactions.csv'
-        else:
-            # Default to JSON if format is not specified or unknown
-            exported_data = dataset.export('json')
-            content_type = 'application/json'
-            filename = 'transactions.json'
-
-        response = HttpResponse(exported_data, content_type=content_type)
-        response['Content-Disposition'] = f"attachment; filename={filename}"
-        return response
+        # the export form posts to the current URL, so the active filter is in the query string
+        export_format = request.POST.get("format")
+        if export_format == "xlsx":
+            job = export_jobs.request_export(ExportJob.TRANSACTIONS, request.GET, request.user)
+            return redirect("users:export_job", pk=job.pk)
+        if export_format in columnar.CONTENT_TYPES:
+            return columnar.export_response(self.get_queryset(), export_format, "transactions")
+        return exports.export_response(TransactionsResource(), self.get_queryset(), export_format, "transactions")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -372,13 +403,68 @@ class TransactionList(LoginRequiredMixin, ListView, FormView):
 transaction_list = TransactionList.as_view()
 
 
+class ExportJobDetail(LoginRequiredMixin, DetailView):
+    model = ExportJob
+    template_name = "dashboard/export_job.html"
+    context_object_name = "job"
+
+
+export_job = ExportJobDetail.as_view()
+
+
+class ExportJobStatus(LoginRequiredMixin, View):
+    """The progress of an export job, polled by its page."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk)
+        download_url = None
+        if job.status == ExportJob.DONE:
+            download_url = reverse("users:export_job_download", kwargs={"pk": job.pk})
+        return JsonResponse(
+            {
+                "status": job.status,
+                "rows_done": job.rows_done,
+                "rows_total": job.rows_total,
+                "download_url": download_url,
+            }
+        )
+
+
+export_job_status = ExportJobStatus.as_view()
+
+
+class ExportJobDownload(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, status=ExportJob.DONE)
+        return redirect(job.file.url)
+
+
+export_job_download = ExportJobDownload.as_view()
+
+
+class RollupSeries(LoginRequiredMixin, View):
+    """Settled votes and revenue over time as JSON, from the hourly rollups:
+    ``?start=&end=&granularity=hour|day|stage&contestant=``."""
+
+    def get(self, request, *args, **kwargs):
+        form = RollupSeriesForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+        data = form.cleaned_data
+        points = rollups.series(data["start"], data["end"], data["granularity"], contestant=data["contestant"])
+        return JsonResponse({"granularity": data["granularity"], "points": points})
+
+
+rollup_series = RollupSeries.as_view()
+
+
 class Vote(TemplateView):
     template_name = "pages/upload.html"
 
     def post(self, request, *args, **kwargs):
         form = ContestantVote(request.POST, request.FILES)
-        ref = generate_random_10_digits()
         if form.is_valid():
+            payment_ref = PAYMENT_REF.allocate()
             vote_number=form.cleaned_data.get("number_of_vote")
             contestant_id=form.cleaned_data.get("contestant_id")
             number_of_vote=int(vote_number) * 100
@@ -388,21 +474,21 @@ class Vote(TemplateView):
             Transactions.objects.create(
                 contestant=contestant_qs,
                 amount_paid=number_of_vote,
-                payment_ref=f"EPAINOS_REF_{ref}",
+                payment_ref=payment_ref,
             )
             
             # Return JSON response with validated inputs
             return JsonResponse({
                 'success': True,
                 'number_of_vote': number_of_vote,
-                'tx_ref': f"EPAINOS_REF_{ref}"
+                'tx_ref': payment_ref
             })
 
         # Return JSON response indicating failure
         return JsonResponse({'success': False})
 
 
-vote_submit = Vote.as_view()
+vote_submit = rate_limited("vote_submit")(Vote.as_view())
 
 
 class Payment(TemplateView):
@@ -425,41 +511,121 @@ class PaymentVerify(TemplateView):
         status = self.request.GET.get('status')
         tx_ref = self.request.GET.get('tx_ref')
 
-        trans_qs = Transactions.objects.get(
-            payment_ref=tx_ref
-        )
+        self.payment_state = payment_state(tx_ref)
+        if self.payment_state is None:
+            raise Http404(_("Transaction not found"))
+
         if status == 'cancelled':
-            trans_qs.settled=False
-            trans_qs.status=status
-            trans_qs.save()
+            cancel_transaction(tx_ref, status)
             return redirect("users:cancel_payment")
-        else:
-            trans_qs.settled=True
-            trans_qs.status=status
-            trans_qs.save()
-            vote_count = trans_qs.amount_paid / 100
-            # add the vote to the contestant account
-            contestant_qs = Contestant.objects.get(id=trans_qs.contestant_id)
-            contestant_qs.number_of_vote += int(vote_count)
-            contestant_qs.save()
+        if self.payment_state == PENDING:
+            # verified with Flutterwave by the verification worker, the page polls payment_verify_status
+            enqueue_verification(tx_ref)
+            self.payment_state = payment_state(tx_ref)
 
         return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context["tx_ref"] = self.request.GET.get('tx_ref')
+        context["payment_state"] = self.payment_state
         context["contestant_qs"] = Contestant.objects.all()
         context["form"] = ContestantProfileForm()
         return context
 
 
-payment_verify = PaymentVerify.as_view()
+# verifying in the request calls Flutterwave, which must not hold the request's transaction open
+payment_verify = rate_limited("payment_verify")(transaction.non_atomic_requests(PaymentVerify.as_view()))
+
+
+class PaymentVerifyStatus(View):
+    def get(self, request, *args, **kwargs):
+        state = payment_state(request.GET.get('tx_ref'))
+        if state is None:
+            raise Http404(_("Transaction not found"))
+        return JsonResponse({'state': state})
+
+
+payment_verify_status = PaymentVerifyStatus.as_view()
+
+
+class LeaderboardApi(View):
+    """The leaderboard as JSON: ``?fields=id,votes`` picks the fields, ``?limit=10``
+    the top N. Shared caches may keep it for ``LEADERBOARD_API_MAX_AGE`` seconds."""
+
+    def get(self, request, *args, **kwargs):
+        fields = request.GET.get("fields")
+        fields = tuple(fields.split(",")) if fields else stats.LEADERBOARD_FIELDS
+        unknown = set(fields) - set(stats.LEADERBOARD_FIELDS)
+        if unknown:
+            return JsonResponse({"error": f"Unknown fields: {', '.join(sorted(unknown))}"}, status=400)
+        limit = request.GET.get("limit")
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                return JsonResponse({"error": "limit must be a positive integer"}, status=400)
+            limit = min(int(limit), settings.LEADERBOARD_API_MAX_LIMIT)
+        # canonical order, so equivalent queries share one cached body
+        fields = tuple(name for name in stats.LEADERBOARD_FIELDS if name in fields)
+
+        etag, body = stats.leaderboard_json(fields, limit)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=0, s_maxage=settings.LEADERBOARD_API_MAX_AGE, stale_while_revalidate=30
+        )
+        return response
+
+
+# read-only, and usually served without touching the database
+leaderboard_api = transaction.non_atomic_requests(LeaderboardApi.as_view())
+
+
+class LeaderboardStream(View):
+    """Server-Sent Events with the contestants whose votes or rank changed."""
+
+    async def get(self, request, *args, **kwargs):
+        if not leaderboard.enabled():
+            raise Http404(_("Live leaderboard is not enabled"))
+        response = StreamingHttpResponse(live.stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # stops nginx from buffering the events
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+# async views cannot run in the ATOMIC_REQUESTS transaction
+leaderboard_stream = transaction.non_atomic_requests(LeaderboardStream.as_view())
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(transaction.non_atomic_requests, name='dispatch')
+class FlutterwaveWebhook(View):
+    def post(self, request, *args, **kwargs):
+        if not webhooks.is_valid_signature(request.headers.get('verif-hash')):
+            return JsonResponse({'success': False}, status=401)
+        try:
+            payload = webhooks.event_payload(json.loads(request.body))
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False}, status=400)
+
+        if payload is not None:
+            if settings.VERIFY_PAYMENTS_IN_BACKGROUND:
+                webhooks.webhook_queue.enqueue(payload)
+            else:
+                webhooks.apply_events([payload])
+        return JsonResponse({'success': True})
+
+
+flutterwave_webhook = FlutterwaveWebhook.as_view()
 
 
 class PolicyPage(TemplateView):
     template_name = "pages/policy.html"
 
 
-policy_page = PolicyPage.as_view()
+policy_page = cache_public_page(PolicyPage.as_view())
 
 
 class CancelPaymentPage(TemplateView):
@@ -0,0 +1,134 @@
+"""Vote crediting for settled payments.
+
+Every paid vote goes through ``credit_votes``. The settle-once transition of the
+``Transactions`` row and the increment of ``Contestant.number_of_vote`` run as a
+single statement, together with the ``VoteEvent`` ledger entry and the
+``ContestantVoteTotal``, ``SiteTotals`` and ``HourlyRollup`` updates (see
+``ledger``, ``totals`` and ``rollups``), so a reloaded verify page or two racing
+verifications can never credit the same ``payment_ref`` twice or lose an
+increment.
+
+With the Redis counter backend (see ``counters``) only the transaction is settled
+and the ledger entry written, as not yet flushed, in the database; the votes go
+to the sharded counters once it commits and to the totals with the next flush.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters, leaderboard, ledger, rollups, totals
+from .models import Contestant, Transactions, VoteEvent
+
+# One vote is sold for 100 (the same rate ``Vote.post`` charges).
+VOTE_PRICE = 100
+
+_SETTLE_AND_RECORD_SQL = f"""
+    WITH settled AS (
+        UPDATE {Transactions._meta.db_table}
+           SET settled = TRUE, status = %s, modified_date = NOW()
+         WHERE payment_ref = ANY(%s) AND settled IS NOT TRUE
+     RETURNING id, created_date, contestant_id, amount_paid, FLOOR(amount_paid / {VOTE_PRICE})::integer AS votes
+    ),
+    events AS (
+        INSERT INTO {VoteEvent._meta.db_table}
+               (id, created_date, modified_date, contestant_id, transaction_id, votes, stage, flushed)
+        SELECT gen_random_uuid(), NOW(), NOW(), contestant_id, id, votes, ({ledger.CURRENT_STAGE_SQL}), {{flushed}}
+          FROM settled
+         WHERE contestant_id IS NOT NULL
+     RETURNING contestant_id, votes
+    ),
+    deltas AS (
+        SELECT contestant_id, SUM(votes)::integer AS votes FROM events GROUP BY contestant_id
+    ),
+    rollup_moves AS ({rollups.MOVES_SQL}),
+    rollups AS ({rollups.upsert_sql("rollup_moves")})
+"""
+
+# the events are left for the counter flush to apply
+_SETTLE_SQL = f"""
+    {_SETTLE_AND_RECORD_SQL.format(flushed="FALSE")},
+    site_totals AS ({totals.upsert_sql("settled", "COALESCE(SUM(amount_paid), 0)", "COUNT(*)")})
+    SELECT contestant_id, votes FROM deltas
+"""
+
+_SETTLE_AND_CREDIT_SQL = f"""
+    {_SETTLE_AND_RECORD_SQL.format(flushed="TRUE")},
+    totals AS ({ledger.UPSERT_TOTALS_SQL}),
+    credited AS (
+        UPDATE {Contestant._meta.db_table} AS contestant
+           SET number_of_vote = COALESCE(contestant.number_of_vote, 0) + deltas.votes,
+               modified_date = NOW()
+          FROM deltas
+         WHERE contestant.id = deltas.contestant_id
+     RETURNING contestant.id, deltas.votes
+    ),
+    site_totals AS ({totals.upsert_sql(
+        "settled",
+        "COALESCE(SUM(amount_paid), 0)",
+        "COUNT(*)",
+        "(SELECT COALESCE(SUM(votes), 0) FROM credited)",
+    )})
+    SELECT id, votes FROM credited
+"""
+
+
+def credit_votes(payment_ref, status):
+    """Settle ``payment_ref`` and credit its votes to the contestant.
+
+    Safe to call any number of times for the same reference: only the call that
+    flips the row from pending to settled credits anything.
+
+    Returns:
+        tuple: ``(contestant_id, votes)`` for the call that credited the votes,
+        or ``None`` when the transaction was already settled or does not exist.
+    """
+    credited = credit_votes_many([payment_ref], status)
+    return credited[0] if credited else None
+
+
+def credit_votes_many(payment_refs, status):
+    """Settle every pending transaction in ``payment_refs`` and credit their votes.
+
+    All of them are settled, recorded and credited with one statement, grouped by
+    contestant.
+
+    Returns:
+        list: ``(contestant_id, votes)`` for each contestant credited by this call.
+    """
+    use_counters = counters.enabled()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _SETTLE_SQL if use_counters else _SETTLE_AND_CREDIT_SQL,
+                [status, list(payment_refs), rollups.slot(), totals.slot()],
+            )
+            credited = [tuple(row) for row in cursor.fetchall()]
+        if use_counters and credited:
+            transaction.on_commit(lambda: counters.incr_many(credited))
+        elif credited:
+            ledger.notify_totals_changed()
+        if credited:
+            transaction.on_commit(lambda: leaderboard.add(credited))
+    return credited
+
+
+def cancel_transaction(payment_ref, status="cancelled"):
+    """Record a cancelled payment, leaving already settled transactions untouched.
+
+    Returns:
+        bool: ``True`` if a pending transaction was marked as cancelled.
+    """
+    return bool(cancel_transactions([payment_ref], status))
+
+
+def cancel_transactions(payment_refs, status="cancelled"):
+    """Record cancelled payments in one UPDATE, skipping settled or already recorded ones.
+
+    Returns:
+        int: the number of transactions marked as cancelled.
+    """
+    return (
+        Transactions.objects.filter(payment_ref__in=payment_refs)
+        .exclude(settled=True)
+        .exclude(status=status)
+        .update(settled=False, status=status, modified_date=timezone.now())
+    )
@@ -0,0 +1,127 @@
+"""Flutterwave webhook ingestion.
+
+``FlutterwaveWebhook`` only checks the ``verif-hash`` header and queues the event,
+so Flutterwave gets its 200 in a few milliseconds. ``run_webhook_consumer`` then
+applies the queued events in batches with ``apply_events``: one read of the
+affected transactions, one statement settling and crediting the paid ones and one
+UPDATE for the failed ones. A batch that fails is applied again one event at a
+time, and the events that keep failing end up in the queue's dead-letter list.
+Settled is final, so duplicate deliveries and events arriving out of order (a
+late ``failed`` after ``successful``) change nothing and write nothing.
+"""
+import hmac
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from helpers.queue import RedisQueue
+
+from .models import Transactions
+from .voting import cancel_transactions, credit_votes_many
+
+logger = logging.getLogger(__name__)
+
+webhook_queue = RedisQueue("flutterwave-webhooks")
+
+
+def is_valid_signature(signature):
+    secret_hash = settings.FLUTTERWAVE_SECRET_HASH
+    return bool(secret_hash and signature) and hmac.compare_digest(signature, secret_hash)
+
+
+def event_payload(event):
+    """The part of a Flutterwave event needed to settle the transaction, or ``None``.
+
+    Raises:
+        ValueError: when the event has no valid amount.
+    """
+    data = event.get("data") or {}
+    if not data.get("tx_ref") or not data.get("status"):
+        return None
+    return {"tx_ref": data["tx_ref"], "status": data["status"], "amount": str(parse_amount(data.get("amount")))}
+
+
+def parse_amount(value):
+    if value is None or isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation as exc:
+        raise ValueError(f"Invalid amount: {value!r}") from exc
+    if not amount.is_finite() or amount < 0:
+        raise ValueError(f"Invalid amount: {value!r}")
+    return amount
+
+
+def apply_events(payloads):
+    """Settle or cancel the transactions referenced by a batch of webhook events.
+
+    Returns:
+        tuple: ``(paid, cancelled)`` transaction counts.
+    """
+    outcome = {}
+    for payload in payloads:
+        # a successful event wins over any failure reported for the same reference
+        if outcome.get(payload["tx_ref"], {}).get("status") != "successful":
+            outcome[payload["tx_ref"]] = payload
+
+    pending = dict(
+        Transactions.objects.filter(payment_ref__in=list(outcome))
+        .exclude(settled=True)
+        .values_list("payment_ref", "amount_paid")
+    )
+    paid, failed, underpaid = [], [], []
+    for payment_ref, amount_paid in pending.items():
+        event = outcome[payment_ref]
+        if event["status"] == "successful":
+            if amount_paid is not None and Decimal(event["amount"]) < amount_paid:
+                underpaid.append(payment_ref)
+            else:
+                paid.append(payment_ref)
+        elif event["status"] in ("failed", "cancelled"):
+            failed.append(payment_ref)
+
+    if paid:
+        credit_votes_many(paid, "successful")
+    cancelled = cancel_transactions(failed, "failed") if failed else 0
+    cancelled += cancel_transactions(underpaid, "amount mismatch") if underpaid else 0
+    return len(paid), cancelled
+
+
+def consume(batch_size=200, retry_delay=5, max_attempts=5, stop=None):
+    """Apply queued webhook events in batches of up to ``batch_size`` until ``stop`` is set.
+
+    When a batch fails its events are applied one at a time, so a bad event does
+    not hold back the others; a failing event is retried with exponential backoff
+    and dead-lettered after ``max_attempts``.
+    """
+    while stop is None or not stop.is_set():
+        jobs = webhook_queue.reserve_many(batch_size, timeout=1)
+        if not jobs:
+            continue
+        try:
+            apply_events([payload for _, payload in jobs])
+        except Exception:
+            logger.exception("Could not apply %s webhook events, applying them one at a time", len(jobs))
+            for raw, payload in jobs:
+                _apply_one(raw, payload, retry_delay, max_attempts)
+        else:
+            webhook_queue.ack_many([raw for raw, _ in jobs])
+        finally:
+            close_old_connections()
+
+
+def _apply_one(raw, payload, retry_delay, max_attempts):
+    try:
+        apply_events([payload])
+    except Exception as exc:  # noqa: BLE001
+        attempts = payload.get("attempts", 0) + 1
+        if attempts >= max_attempts:
+            logger.error("Giving up on webhook event after %s attempts: %s (%r)", attempts, payload, exc)
+            webhook_queue.dead_letter(raw, payload)
+        else:
+            webhook_queue.retry(raw, {**payload, "attempts": attempts}, retry_delay * 2 ** (attempts - 1))
+    else:
+        webhook_queue.ack(raw)
@@ -0,0 +1,153 @@
+"""Shared page cache for the public pages anonymous visitors see.
+
+Rendered pages are kept in the default cache per path, language and the query
+parameters the view reads (``params``), with the generation they were rendered
+at; the view only sees those parameters, so tracking or random ones neither
+split the cache nor end up in the cached page. ``invalidate`` bumps the
+generation, which makes every cached page stale at once. A stale page, or one
+older than ``PAGE_CACHE_TIMEOUT`` seconds, is re-rendered by a single request
+while the others keep serving it, for up to ``PAGE_CACHE_STALE_TIMEOUT`` seconds.
+
+Signed-in users always get a freshly rendered page. The CSRF token of cached
+pages is swapped for the visitor's own on the way out, so forms keep working.
+Hits, misses, stale serves and bypasses are counted in ``pagecache:stats:*``.
+
+The generation and ``invalidated_at`` also serve as the version of the public
+pages for conditional GETs (see ``views.contestant_view``); those stay private,
+as the pages embed the visitor's CSRF token. With the Redis vote
+counters a credit only reaches the database, and so bumps the generation, with
+the next ``counters.flush``: the votes pages show may lag by the flush interval
+plus ``PAGE_CACHE_TIMEOUT``.
+"""
+import functools
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, QueryDict
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+GENERATION_KEY = "pagecache:generation"
+INVALIDATED_AT_KEY = "pagecache:invalidated-at"
+PAGE_KEY = "pagecache:page:{lang}:{digest}"
+LOCK_KEY = "pagecache:lock:{lang}:{digest}"
+STATS_KEY = "pagecache:stats:{outcome}"
+OUTCOMES = ("hit", "miss", "stale", "bypass")
+
+CSRF_TOKEN_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b"__PAGE_CACHE_CSRF_TOKEN__"
+
+
+def generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def invalidated_at():
+    """When the pages were last invalidated, as a timestamp; ``None`` if never."""
+    return cache.get(INVALIDATED_AT_KEY)
+
+
+def invalidate():
+    """Mark every cached page stale."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+    cache.set(INVALIDATED_AT_KEY, time.time(), timeout=None)
+
+
+def _count(outcome):
+    key = STATS_KEY.format(outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def counts():
+    """Requests served so far, per outcome."""
+    values = cache.get_many([STATS_KEY.format(outcome=outcome) for outcome in OUTCOMES])
+    return {outcome: values.get(STATS_KEY.format(outcome=outcome), 0) for outcome in OUTCOMES}
+
+
+def page_query(query, params):
+    """The ``params`` of ``query`` (a ``QueryDict``), in a stable order."""
+    page = QueryDict(mutable=True)
+    for name in sorted(params):
+        if name in query:
+            page.setlist(name, query.getlist(name))
+    return page
+
+
+def cache_keys(path, lang):
+    """The keys of the cached page and of its rebuild lock, ``path`` including the
+    ``page_query`` of the request."""
+    digest = hashlib.sha256(path.encode()).hexdigest()[:32]
+    return PAGE_KEY.format(lang=lang, digest=digest), LOCK_KEY.format(lang=lang, digest=digest)
+
+
+def _serve(request, entry, outcome):
+    content = entry["content"]
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+    response = HttpResponse(content, content_type=entry["content_type"])
+    response["X-Page-Cache"] = outcome
+    return response
+
+
+def _render(request, view, args, kwargs, keys, current):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, "render") and callable(response.render):
+        response.render()
+    response["X-Page-Cache"] = "miss"
+    if response.status_code == 200 and not response.streaming:
+        entry = {
+            "content": CSRF_TOKEN_RE.sub(rb"\1" + CSRF_PLACEHOLDER + rb"\2", response.content),
+            "content_type": response["Content-Type"],
+            "generation": current,
+            "built_at": time.time(),
+        }
+        cache.set(keys[0], entry, timeout=settings.PAGE_CACHE_STALE_TIMEOUT)
+    return response
+
+
+def cache_public_page(view, params=()):
+    """Serve ``view`` to anonymous visitors from the shared page cache.
+
+    ``params`` are the query parameters the view reads; the others are dropped.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.PAGE_CACHE_ENABLED or request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        if request.user.is_authenticated:
+            _count("bypass")
+            return view(request, *args, **kwargs)
+
+        request.GET = page_query(request.GET, params)
+        query = request.GET.urlencode()
+        keys = cache_keys(f"{request.path}?{query}" if query else request.path, get_language())
+        current = generation()
+        entry = cache.get(keys[0])
+        if entry is None:
+            _count("miss")
+            return _render(request, view, args, kwargs, keys, current)
+        if entry["generation"] == current and time.time() - entry["built_at"] < settings.PAGE_CACHE_TIMEOUT:
+            _count("hit")
+            return _serve(request, entry, "hit")
+        # one request re-renders, the others serve the stale page meanwhile
+        if cache.add(keys[1], 1, timeout=30):
+            try:
+                _count("miss")
+                return _render(request, view, args, kwargs, keys, current)
+            finally:
+                cache.delete(keys[1])
+        _count("stale")
+        return _serve(request, entry, "stale")
+
+    return wrapper
+
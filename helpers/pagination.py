@@ -0,0 +1,156 @@
+"""Keyset (cursor) pagination for list views.
+
+Pages are walked by the ordering key of the last (or first) row shown instead of
+an OFFSET, so every page is one range scan of ``per_page + 1`` rows on an index
+matching the ordering, however deep it is. The key must end with a unique column
+(e.g. ``("-created_date", "-id")``), so rows never repeat or go missing between
+pages when rows are added or their values change. Cursors are opaque to clients.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def _json_value(value):
+    # not DjangoJSONEncoder: it drops the microseconds of datetimes
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values], default=_json_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # computed now: views may change the rows' values (e.g. live vote totals)
+        self.next_cursor = paginator.cursor(NEXT, object_list[-1]) if has_next else None
+        self.previous_cursor = paginator.cursor(PREVIOUS, object_list[0]) if has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        opts = queryset.model._meta
+        self.keys = [
+            (opts.pk if name.lstrip("-") == "pk" else opts.get_field(name.lstrip("-")), name.startswith("-"))
+            for name in ordering
+        ]
+
+    def cursor(self, direction, obj):
+        return encode_cursor(direction, [getattr(obj, field.attname) for field, _ in self.keys])
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if direction not in (NEXT, PREVIOUS):
+                raise ValueError
+            # a cursor with too few or too many values fails the strict zip
+            return direction, [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(self.keys, values, strict=True)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError) as exc:
+            raise InvalidPage(_("Invalid cursor")) from exc
+
+    def _after(self, values, reverse):
+        """Rows strictly after ``values`` in the ordering (before them for ``reverse``).
+
+        NULLs sort as the largest value, as in Postgres.
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values, strict=True):
+            name = field.name
+            if descending != reverse:
+                after = Q(**{f"{name}__isnull": False}) if value is None else Q(**{f"{name}__lt": value})
+            elif value is None:
+                after = Q(pk__in=[])
+            else:
+                after = Q(**{f"{name}__gt": value})
+                if field.null:
+                    after |= Q(**{f"{name}__isnull": True})
+            condition |= equal & after
+            equal &= Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+        first, first_value = self.keys[0], values[0]
+        if first_value is not None and not first[0].null:
+            # redundant, but bounds the index scan on the leading column
+            lookup = "lte" if first[1] != reverse else "gte"
+            condition &= Q(**{f"{first[0].name}__{lookup}": first_value})
+        return condition
+
+    def _ordered(self, reverse):
+        ordering = [name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering]
+        return self.queryset.order_by(*(ordering if reverse else self.ordering))
+
+    def page(self, cursor=None):
+        """The ``per_page`` rows following the ``cursor`` of a page, the first ones without one."""
+        direction, values = self.decode_cursor(cursor) if cursor else (NEXT, None)
+        reverse = direction == PREVIOUS
+        queryset = self._ordered(reverse)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        rows = list(queryset[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=bool(rows), has_previous=more)
+        return KeysetPage(rows, self, has_next=more, has_previous=values is not None and bool(rows))
+
+
+class KeysetPaginationMixin:
+    """Paginate a ``ListView`` by ``keyset_ordering`` with ``?cursor=`` links.
+
+    ``page_obj.next_query`` and ``page_obj.previous_query`` are the current query
+    string with the cursor of the next and previous page, so filters carry over.
+    """
+
+    keyset_ordering = ("-created_date", "-id")
+    cursor_kwarg = "cursor"
+
+    def cursor_query(self, cursor):
+        query = self.request.GET.copy()
+        query.pop("page", None)
+        query[self.cursor_kwarg] = cursor
+        return query.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as exc:
+            raise Http404(str(exc)) from exc
+        page.next_query = self.cursor_query(page.next_cursor) if page.has_next() else ""
+        page.previous_query = self.cursor_query(page.previous_cursor) if page.has_previous() else ""
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -2,7 +2,29 @@ import json
 import requests
 
 from django.conf import settings
-from django.core.mail import send_mail
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# the status returned when Flutterwave has no transaction with the reference
+NOT_FOUND = "not found"
+# the HTTP statuses of the verify endpoint for an unknown reference
+NOT_FOUND_CODES = (400, 404)
+
+
+def build_session(pool_size=None):
+    """A keep-alive session retrying idempotent requests on connection errors and 429/5xx."""
+    retry = Retry(
+        total=settings.FLUTTERWAVE_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    pool_size = pool_size or settings.FLUTTERWAVE_POOL_SIZE
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+    return session
 
 
 class FlutterWave:
@@ -11,35 +33,25 @@ class FlutterWave:
     else:
         FLUTTERWAVE_SECRET_KEY = settings.FLUTTERWAVE_SECRET_KEY
 
-    base_url = 'https://api.flutterwave.com/v3/transactions/'
+    base_url = settings.FLUTTERWAVE_BASE_URL
+
+    # shared by every instance so connections to Flutterwave are reused
+    session = build_session()
 
     def verify_payment_flutterwave(self, payment_ref, *args, **kwargs):
-        path = 'verify_by_reference?tx_ref='f"{payment_ref}"
-       
         headers = {
             "Authorization": f"Bearer {self.FLUTTERWAVE_SECRET_KEY}",
             'Content-Type': 'application/json',
         }
 
-        url = self.base_url + path
-        response = requests.get(url, headers=headers)
+        url = self.base_url + 'verify_by_reference'
+        response = self.session.get(
+            url, params={"tx_ref": payment_ref}, headers=headers, timeout=settings.FLUTTERWAVE_TIMEOUT
+        )
 
+        response_data = response.json()
         if response.status_code == 200:
-            response_data = response.json()
-            send_mail(
-                'Response',
-                f'{response_data}',
-                f"{settings.EMAIL_HOST_USER}",
-                ['assanamamichael@gmail.com'],
-                fail_silently=False,
-            )
             return response_data['status'],response_data['data']
-        response_data = response.json()
-        send_mail(
-                'Response',
-                f'{response_data}',
-                f"{settings.EMAIL_HOST_USER}" ,
-                ['assanamamichael@gmail.com'],
-                fail_silently=False,
-            )
+        if response.status_code in NOT_FOUND_CODES:
+            return NOT_FOUND, response_data.get('message')
         return response_data['status'],response_data['message']
@@ -0,0 +1,179 @@
+"""Small reliable job queues on the default django-redis connection.
+
+A job is a JSON payload pushed on ``queue:<name>``. Workers move it atomically to
+``queue:<name>:processing`` while it runs and remove it once handled, so a job is
+never lost when a worker dies (``recover`` puts such jobs back). Failed jobs are
+retried with exponential backoff through the ``queue:<name>:delayed`` sorted set,
+and jobs given up on can be kept in the ``queue:<name>:dead`` list.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+class RedisQueue:
+    def __init__(self, name):
+        self.name = name
+        self.key = f"queue:{name}"
+        self.processing_key = f"{self.key}:processing"
+        self.delayed_key = f"{self.key}:delayed"
+        self.dead_key = f"{self.key}:dead"
+
+    @property
+    def connection(self):
+        return get_redis_connection("default")
+
+    def _dedupe_key(self, dedupe):
+        return f"{self.key}:dedupe:{dedupe}"
+
+    def enqueue(self, payload, dedupe=None, dedupe_ttl=3600):
+        """Queue ``payload``.
+
+        With ``dedupe`` the job is only queued if no job with the same key is
+        waiting or running; the key is released when the job is done.
+
+        Returns:
+            bool: ``False`` if the job was dropped as a duplicate.
+        """
+        conn = self.connection
+        if dedupe is not None:
+            if not conn.set(self._dedupe_key(dedupe), 1, nx=True, ex=dedupe_ttl):
+                return False
+            payload = {**payload, "dedupe": dedupe}
+        conn.lpush(self.key, json.dumps(payload))
+        return True
+
+    def promote_due(self):
+        """Move delayed jobs whose retry time has come back to the queue."""
+        conn = self.connection
+        for raw in conn.zrangebyscore(self.delayed_key, 0, time.time()):
+            # only the worker that removes the job from the set requeues it
+            if conn.zrem(self.delayed_key, raw):
+                conn.lpush(self.key, raw)
+
+    def reserve(self, timeout=1):
+        """Wait up to ``timeout`` seconds for a job.
+
+        Returns:
+            tuple: ``(raw, payload)``, or ``None`` if no job arrived.
+        """
+        self.promote_due()
+        raw = self.connection.blmove(self.key, self.processing_key, timeout, "RIGHT", "LEFT")
+        if raw is None:
+            return None
+        return raw, json.loads(raw)
+
+    def reserve_many(self, count, timeout=1):
+        """Wait up to ``timeout`` seconds for a job, then take up to ``count`` jobs at once."""
+        first = self.reserve(timeout)
+        if first is None:
+            return []
+        conn = self.connection
+        pipe = conn.pipeline(transaction=False)
+        for _ in range(count - 1):
+            pipe.lmove(self.key, self.processing_key, "RIGHT", "LEFT")
+        jobs = [first] + [(raw, json.loads(raw)) for raw in pipe.execute() if raw is not None]
+        return jobs
+
+    def ack(self, raw, payload=None):
+        """Mark a reserved job as done and release its dedupe key."""
+        pipe = self.connection.pipeline()
+        pipe.lrem(self.processing_key, 1, raw)
+        if payload and payload.get("dedupe") is not None:
+            pipe.delete(self._dedupe_key(payload["dedupe"]))
+        pipe.execute()
+
+    def ack_many(self, raws):
+        pipe = self.connection.pipeline()
+        for raw in raws:
+            pipe.lrem(self.processing_key, 1, raw)
+        pipe.execute()
+
+    def retry(self, raw, payload, delay):
+        """Put a reserved job back in ``delay`` seconds, with its new ``payload``."""
+        pipe = self.connection.pipeline()
+        pipe.zadd(self.delayed_key, {json.dumps(payload): time.time() + delay})
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.execute()
+
+    def dead_letter(self, raw, payload):
+        """Give up on a reserved job, keeping its ``payload`` for inspection."""
+        pipe = self.connection.pipeline()
+        pipe.lpush(self.dead_key, json.dumps(payload))
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.execute()
+
+    def requeue_dead(self):
+        """Put every dead-lettered job back on the queue with a fresh set of attempts."""
+        conn = self.connection
+        requeued = 0
+        while (raw := conn.rpop(self.dead_key)) is not None:
+            payload = json.loads(raw)
+            payload.pop("attempts", None)
+            conn.lpush(self.key, json.dumps(payload))
+            requeued += 1
+        return requeued
+
+    def recover(self):
+        """Requeue the jobs left in processing by workers that died."""
+        conn = self.connection
+        recovered = 0
+        while conn.lmove(self.processing_key, self.key, "RIGHT", "RIGHT") is not None:
+            recovered += 1
+        return recovered
+
+    def __len__(self):
+        return self.connection.llen(self.key)
+
+
+class RetryJob(Exception):  # noqa: N818
+    """Raised by a job handler to have the job retried later."""
+
+
+def run_job(queue, raw, payload, handler, max_attempts=5, backoff=2):
+    """Run ``handler`` for one reserved job, then ack it or schedule a retry."""
+    try:
+        handler(payload)
+    except Exception as exc:  # noqa: BLE001
+        attempts = payload.get("attempts", 0) + 1
+        if attempts < max_attempts:
+            if not isinstance(exc, RetryJob):
+                logger.warning("Job on %s failed, retrying: %r", queue.name, exc)
+            queue.retry(raw, {**payload, "attempts": attempts}, backoff**attempts)
+        else:
+            logger.exception("Job on %s failed %s times, giving up: %s", queue.name, attempts, payload)
+            queue.ack(raw, payload)
+    else:
+        queue.ack(raw, payload)
+
+
+def run_worker(queue, handler, concurrency=8, max_attempts=5, backoff=2, stop=None):
+    """Process jobs from ``queue`` with at most ``concurrency`` running at once.
+
+    Runs until ``stop`` (a ``threading.Event``) is set.
+    """
+    stop = stop or threading.Event()
+    slots = threading.BoundedSemaphore(concurrency)
+
+    def work(raw, payload):
+        try:
+            run_job(queue, raw, payload, handler, max_attempts=max_attempts, backoff=backoff)
+        finally:
+            close_old_connections()
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"{queue.name}-worker") as pool:
+        while not stop.is_set():
+            slots.acquire()
+            job = queue.reserve(timeout=1)
+            if job is None:
+                slots.release()
+                continue
+            pool.submit(work, *job)
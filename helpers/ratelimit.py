@@ -0,0 +1,133 @@
+"""Token-bucket admission control on the default django-redis connection.
+
+Each limited view has buckets per client IP, per session and per contestant
+(``RATE_LIMITS[<name>][<scope>] = (tokens per second, burst)``). All the buckets of
+a request are checked and charged in one Lua script, so a request either takes a
+token from every bucket or from none. Rejected requests get a 429 before the view
+runs, and are counted per view and scope in the ``ratelimit:shed`` hash. When
+Redis is unreachable requests are let through rather than refused.
+"""
+import functools
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = "ratelimit:{name}:{scope}:{ident}"
+SHED_KEY = "ratelimit:shed"
+
+# KEYS: the buckets, ARGV: rate and burst for each bucket. Returns {"0"} once a
+# token is taken from every bucket, else the seconds to wait and the empty buckets.
+TAKE_TOKEN_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels, wait, empty = {}, 0, {}
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or burst
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    levels[i] = math.min(burst, level + elapsed * rate)
+    if levels[i] < 1 then
+        wait = math.max(wait, (1 - levels[i]) / rate)
+        table.insert(empty, i)
+    end
+end
+if wait > 0 then
+    return {tostring(wait), unpack(empty)}
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return {'0'}
+"""
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+def client_ip(request):
+    # the first address of e.g. X-Forwarded-For when RATE_LIMIT_IP_META names it
+    return request.META.get(settings.RATE_LIMIT_IP_META, "").split(",")[0].strip()
+
+
+def request_idents(request):
+    """The value identifying the request for each scope, ``None`` if it has none."""
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    return {
+        "ip": client_ip(request) or None,
+        # hashed so session keys never end up in Redis
+        "session": _digest(session) if session else None,
+        "contestant": request.POST.get("contestant_id") or None,
+    }
+
+
+def take_token(name, idents):
+    """Take a token from the ``name`` bucket of every scope in ``idents``.
+
+    Returns:
+        float: ``0`` if the request is admitted, else the seconds until it would be.
+    """
+    limits = settings.RATE_LIMITS.get(name, {})
+    buckets = [(scope, ident) for scope, ident in idents.items() if ident and scope in limits]
+    if not buckets:
+        return 0
+    keys = [BUCKET_KEY.format(name=name, scope=scope, ident=ident) for scope, ident in buckets]
+    args = [value for scope, _ in buckets for value in limits[scope]]
+    conn = get_redis_connection("default")
+    wait, *empty = conn.register_script(TAKE_TOKEN_SCRIPT)(keys=keys, args=args)
+    if empty:
+        pipe = conn.pipeline(transaction=False)
+        for index in empty:
+            pipe.hincrby(SHED_KEY, f"{name}:{buckets[index - 1][0]}", 1)
+        pipe.execute()
+    return float(wait)
+
+
+def shed_counts():
+    """Requests rejected so far, per ``<view>:<scope>`` that was out of tokens."""
+    counts = get_redis_connection("default").hgetall(SHED_KEY)
+    return {name.decode(): int(count) for name, count in counts.items()}
+
+
+def rate_limited(name):
+    """Put the ``name`` token buckets in front of a view.
+
+    The wrapped view still runs in a transaction under ``ATOMIC_REQUESTS``, but
+    only once the request is admitted, so a rejected request never touches the
+    database. A view marked with ``transaction.non_atomic_requests`` stays out of it.
+    """
+
+    def decorator(view):
+        atomic = settings.DATABASES["default"]["ATOMIC_REQUESTS"] and "default" not in getattr(
+            view, "_non_atomic_requests", ()
+        )
+        atomic_view = transaction.atomic(view) if atomic else view
+
+        @functools.wraps(view)
+        @transaction.non_atomic_requests
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED:
+                try:
+                    wait = take_token(name, request_idents(request))
+                except (RedisError, NotImplementedError):
+                    logger.warning("Rate limiter unavailable, admitting request", exc_info=True)
+                    wait = 0
+                if wait:
+                    response = JsonResponse({"success": False, "error": "Too many requests"}, status=429)
+                    response["Retry-After"] = max(int(wait + 0.999), 1)
+                    return response
+            return atomic_view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator